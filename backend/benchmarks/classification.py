@@ -0,0 +1,97 @@
+"""
+Document classification benchmark.
+
+Measures speed and accuracy of DocumentExtractor._classify_document
+against the previous first-match classifier on a labeled local corpus.
+
+Corpus layout (one folder per expected label):
+
+    corpus/
+    ├── AVIS/    avis_ao_12.pdf ...
+    ├── RC/      ...
+    ├── CPS/     ...
+    ├── ANNEXE/  ...
+    └── OTHER/   ...
+
+Usage (from backend/):
+    python -m benchmarks.classification path/to/corpus [--repeat 50]
+"""
+import argparse
+import io
+import os
+import time
+from collections import Counter
+
+from services.document_extractor import DocumentExtractor
+
+LABELS = ("AVIS", "RC", "CPS", "ANNEXE", "OTHER")
+
+# Previous classifier, kept here as the comparison baseline
+LEGACY_KEYWORDS = {
+    "AVIS": ["avis de consultation", "aoon", "aooi", "avis d'appel"],
+    "RC": ["règlement de consultation", "reglement de consultation", "r.c."],
+    "CPS": ["cahier des prescriptions spéciales", "c.p.s.", "cahier des charges"],
+    "ANNEXE": ["annexe", "additif", "avenant"],
+}
+
+
+def legacy_classify(text: str, filename: str = "") -> str:
+    text_lower = text.lower()[:2000]
+    for doc_type, keywords in LEGACY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return doc_type
+    return "OTHER"
+
+
+def load_corpus(root: str, extractor: DocumentExtractor) -> list:
+    """Extract every labeled file once; classification is timed separately."""
+    samples = []
+    for label in LABELS:
+        folder = os.path.join(root, label)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), "rb") as f:
+                content, _, _ = extractor._extract_single(name, io.BytesIO(f.read()))
+            samples.append((label, name, content))
+    return samples
+
+
+def evaluate(name: str, classify, samples: list, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predictions = [classify(text, filename) for _, filename, text in samples]
+    elapsed = time.perf_counter() - start
+
+    correct = sum(1 for (label, _, _), p in zip(samples, predictions) if label == p)
+    confusion = Counter(
+        (label, p) for (label, _, _), p in zip(samples, predictions) if label != p
+    )
+    per_doc_us = elapsed / (repeat * len(samples)) * 1e6
+
+    print(f"\n{name}")
+    print(f"  accuracy: {correct}/{len(samples)} ({correct / len(samples):.1%})")
+    print(f"  speed:    {per_doc_us:.1f} µs/document")
+    for (expected, got), count in confusion.most_common():
+        print(f"  {expected:>6} -> {got:<6} x{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", help="Directory with one sub-folder per label")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    extractor = DocumentExtractor()
+    samples = load_corpus(args.corpus, extractor)
+    if not samples:
+        raise SystemExit(f"No labeled documents found under {args.corpus}")
+
+    print(f"{len(samples)} documents, {args.repeat} repetitions")
+    evaluate("legacy (first match, 2000 chars)", legacy_classify, samples, args.repeat)
+    evaluate("scored (regex + filename)", extractor._classify_document, samples, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+"""
+Local stand-ins for the external services of the pipeline.
+
+- FakePortal: the marchespublics.gov.ma pages TenderScraper drives
+  (search, consultation detail, DCE request form, download).
+- FakePostgrest: an in-memory PostgREST answering SupabaseClient.
+- FakeLLM: an OpenAI-compatible chat completions endpoint with
+  configurable latency, streamed or not.
+
+All three run on one aiohttp server in a separate process, so they
+compete with the pipeline for neither its event loop nor the GIL. This module must
+not import config: the benchmark points the settings at these servers
+before the application modules are imported.
+"""
+import asyncio
+import base64
+import fnmatch
+import html
+import json
+import multiprocessing
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DETAIL_PATH = "/index.php"
+DETAIL_PAGE = "entreprise.EntrepriseDetailConsultation"
+# Consultation links start with this after the base URL (TENDER_LINK_PREFIX)
+DETAIL_PREFIX = f"{DETAIL_PATH}?page={DETAIL_PAGE}&refConsultation="
+# PRADO control names of the search form
+SEARCH_BUTTON = "ctl0$CONTENU_PAGE$AdvancedSearch$lancerRecherche"
+PAGE_SIZE_SELECT = "ctl0$CONTENU_PAGE$resultSearch$listePageSizeTop"
+NEXT_PAGE_ID = "ctl0_CONTENU_PAGE_resultSearch_PagerTop_ctl2"
+NEXT_PAGE_TARGET = "ctl0$CONTENU_PAGE$resultSearch$PagerTop$ctl2"
+
+# Canned LLM answer for AVIS extraction (fields the rules left empty)
+AVIS_ANSWER = {
+    "reference_tender": "",
+    "tender_type": "AOON",
+    "issuing_institution": "Commune de Tanger",
+    "submission_deadline": {"date": "", "time": ""},
+    "folder_opening_location": "Salle des réunions du siège",
+    "subject": "Acquisition de matériel informatique",
+    "total_estimated_value": "",
+    "keywords": {
+        "keywords_eng": ["computers", "printers", "supplies"],
+        "keywords_fr": ["ordinateurs", "imprimantes", "fournitures"],
+        "keywords_ar": ["حواسيب", "طابعات", "لوازم"],
+    },
+    "lots": [],
+    "lot_subjects": [],
+}
+TEXT_ANSWER = (
+    "Résumé : marché de fournitures en un ou plusieurs lots. Les offres sont "
+    "remises avant la date limite; le cautionnement provisoire est exigé. "
+) * 4
+
+
+# ---------------------------------------------------------------------------
+# Portal
+# ---------------------------------------------------------------------------
+
+class FakePortal:
+    """Consultation search, detail, request form and DCE download."""
+
+    def __init__(self, archives: List[Tuple[str, bytes, str]], latency: float = 0.0):
+        # archives: (filename, zip bytes, deadline "DD/MM/YYYY HH:MM")
+        self.archives = archives
+        self.latency = latency
+        self.base_url = ""
+
+    def routes(self) -> list:
+        return [
+            web.get("/pmmp/", self.home),
+            web.get("/search", self.search),
+            web.post("/search", self.search),
+            web.get(DETAIL_PATH, self.detail),
+            web.get("/dce/{ref}", self.download),
+        ]
+
+    def detail_url(self, ref: int) -> str:
+        return f"{self.base_url}{DETAIL_PREFIX}{ref}"
+
+    async def _page(self, body: str) -> web.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(
+            text=f"<html><body>{body}</body></html>", content_type="text/html"
+        )
+
+    async def home(self, request):
+        return await self._page('<a href="/search">Consultations en cours</a>')
+
+    async def search(self, request):
+        """PRADO-style search: one form posted back to itself, the view
+        state round-tripping in PRADO_PAGESTATE."""
+        form = await request.post() if request.method == "POST" else {}
+        state = {"results": False, "page": 0, "size": 10}
+        if form:
+            if "PRADO_PAGESTATE" not in form:
+                raise web.HTTPBadRequest(text="Page state missing")
+            state = json.loads(base64.b64decode(form["PRADO_PAGESTATE"]))
+            target = form.get("PRADO_POSTBACK_TARGET", "")
+            if SEARCH_BUTTON in form or target == SEARCH_BUTTON:
+                state = {"results": True, "page": 0, "size": state["size"]}
+            elif target == PAGE_SIZE_SELECT:
+                state.update(page=0, size=int(form[PAGE_SIZE_SELECT]))
+            elif target == NEXT_PAGE_TARGET:
+                state["page"] += 1
+        page_state = base64.b64encode(json.dumps(state).encode()).decode()
+
+        results = ""
+        if state["results"]:
+            size, page = state["size"], state["page"]
+            refs = range(page * size, min(len(self.archives), (page + 1) * size))
+            links = "".join(
+                f'<li><a href="{html.escape(self.detail_url(ref))}">Consultation {ref}</a></li>'
+                for ref in refs
+            )
+            options = "".join(
+                f'<option value="{n}"{" selected" if n == size else ""}>{n}</option>'
+                for n in (10, 20, 500)
+            )
+            pager = ""
+            if (page + 1) * size < len(self.archives):
+                pager = (
+                    f'<a id="{NEXT_PAGE_ID}" href="javascript:;">Suivant</a>'
+                    f"<script>new Prado.WebUI.TLinkButton({{'ID':'{NEXT_PAGE_ID}',"
+                    f"'EventTarget':'{NEXT_PAGE_TARGET}'}});</script>"
+                )
+            results = f"""
+<div id="ctl0_CONTENU_PAGE_resultSearch_panel">
+  <select id="ctl0_CONTENU_PAGE_resultSearch_listePageSizeTop" name="{PAGE_SIZE_SELECT}"
+    onchange="this.form.PRADO_POSTBACK_TARGET.value=this.name; this.form.submit()">
+    {options}
+  </select>
+  <ul>{links}</ul>{pager}
+</div>"""
+        return await self._page(f"""
+<form id="ctl0_ctl1" action="/search" method="post">
+  <input type="hidden" name="PRADO_PAGESTATE" value="{page_state}">
+  <input type="hidden" name="PRADO_POSTBACK_TARGET" value="">
+  <input type="hidden" name="PRADO_POSTBACK_PARAMETER" value="">
+  <select id="ctl0_CONTENU_PAGE_AdvancedSearch_categorie"
+    name="ctl0$CONTENU_PAGE$AdvancedSearch$categorie">
+    <option value="0">Toutes</option><option value="1">Travaux</option>
+    <option value="2">Fournitures</option>
+  </select>
+  <div><span>Date de mise en ligne :</span>
+    <input name="ctl0$CONTENU_PAGE$AdvancedSearch$dateMiseEnLigneStart">
+    <input name="ctl0$CONTENU_PAGE$AdvancedSearch$dateMiseEnLigneEnd"></div>
+  <div><span>Date limite de remise des plis :</span>
+    <input name="ctl0$CONTENU_PAGE$AdvancedSearch$dateMiseEnLigneCalculeStart" value="01/01/2026">
+    <input name="ctl0$CONTENU_PAGE$AdvancedSearch$dateMiseEnLigneCalculeEnd" value="31/12/2026"></div>
+  <input type="submit" name="{SEARCH_BUTTON}" title="Lancer la recherche" value="OK">
+  {results}
+</form>""")
+
+    async def detail(self, request):
+        ref = int(request.query.get("refConsultation", -1))
+        if not 0 <= ref < len(self.archives):
+            raise web.HTTPNotFound()
+        step = request.query.get("step", "")
+        deadline = self.archives[ref][2]
+        url = html.escape(self.detail_url(ref))
+        if step == "form":
+            body = f"""
+<form action="{DETAIL_PATH}" method="get">
+  <input type="hidden" name="page" value="{DETAIL_PAGE}">
+  <input type="hidden" name="refConsultation" value="{ref}">
+  <input type="hidden" name="step" value="download">
+  <input type="checkbox" id="ctl0_CONTENU_PAGE_EntrepriseFormulaireDemande_accepterConditions">
+  <input id="ctl0_CONTENU_PAGE_EntrepriseFormulaireDemande_nom">
+  <input id="ctl0_CONTENU_PAGE_EntrepriseFormulaireDemande_prenom">
+  <input id="ctl0_CONTENU_PAGE_EntrepriseFormulaireDemande_email">
+  <input type="submit" id="ctl0_CONTENU_PAGE_validateButton" value="Valider">
+</form>"""
+        elif step == "download":
+            body = (
+                f'<a id="ctl0_CONTENU_PAGE_EntrepriseDownloadDce_completeDownload" '
+                f'href="/dce/{ref}">Télécharger le DCE</a>'
+            )
+        else:
+            body = f'<a id="ctl0_CONTENU_PAGE_linkDownloadDce" href="{url}&amp;step=form">DCE</a>'
+        return await self._page(
+            f"<div><label>Date et heure limite de remise des plis</label>"
+            f"<span>{deadline}</span></div>{body}"
+        )
+
+    async def download(self, request):
+        ref = int(request.match_info["ref"])
+        if not 0 <= ref < len(self.archives):
+            raise web.HTTPNotFound()
+        filename, data, _ = self.archives[ref]
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(
+            body=data,
+            content_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+
+# ---------------------------------------------------------------------------
+# PostgREST
+# ---------------------------------------------------------------------------
+
+def _text(value) -> str:
+    """Value as it appears in a PostgREST filter."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _split_list(raw: str) -> List[str]:
+    """Split "a,b.eq.(x,y),c" on top-level commas."""
+    parts, depth, current = [], 0, ""
+    for char in raw:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _condition(column: str, expression: str) -> Callable[[dict], bool]:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+
+    def test(row: dict) -> bool:
+        cell = row.get(column)
+        if op == "eq":
+            return _text(cell) == value
+        if op == "neq":
+            return _text(cell) != value
+        if op == "is":
+            return _text(cell) == value
+        if op == "in":
+            return _text(cell) in set(_split_list(value.strip("()")))
+        if op in ("like", "ilike"):
+            pattern = value.replace("%", "*")
+            if op == "ilike":
+                return fnmatch.fnmatch(_text(cell).lower(), pattern.lower())
+            return fnmatch.fnmatchcase(_text(cell), pattern)
+        if op in ("gt", "gte", "lt", "lte"):
+            if cell is None:
+                return False
+            try:
+                left, right = float(cell), float(value)
+            except (TypeError, ValueError):
+                left, right = _text(cell), value
+            return {
+                "gt": left > right, "gte": left >= right,
+                "lt": left < right, "lte": left <= right,
+            }[op]
+        raise web.HTTPBadRequest(text=f"unsupported operator {op}")
+
+    return (lambda row: not test(row)) if negate else test
+
+
+def _or_condition(raw: str) -> Callable[[dict], bool]:
+    tests = []
+    for part in _split_list(raw.strip("()")):
+        column, _, expression = part.partition(".")
+        tests.append(_condition(column, expression))
+    return lambda row: any(test(row) for test in tests)
+
+
+class FakePostgrest:
+    """In-memory tables behind /rest/v1/<table> (insert or upsert,
+    select, update, delete) and the functions the pipeline calls."""
+
+    RESERVED = {"select", "order", "limit", "offset", "on_conflict"}
+
+    def __init__(self, latency: float = 0.0):
+        self.tables: Dict[str, List[dict]] = {}
+        self.latency = latency
+
+    def routes(self) -> list:
+        return [
+            web.post("/rest/v1/{table}", self.insert),
+            web.get("/rest/v1/{table}", self.select),
+            web.patch("/rest/v1/{table}", self.update),
+            web.delete("/rest/v1/{table}", self.delete),
+            web.post("/rest/v1/rpc/{function}", self.rpc),
+        ]
+
+    def _filters(self, request) -> List[Callable[[dict], bool]]:
+        filters = []
+        for key, value in request.query.items():
+            if key == "or":
+                filters.append(_or_condition(value))
+            elif key not in self.RESERVED:
+                filters.append(_condition(key, value))
+        return filters
+
+    def _rows(self, request) -> List[dict]:
+        rows = self.tables.setdefault(request.match_info["table"], [])
+        filters = self._filters(request)
+        return [row for row in rows if all(f(row) for f in filters)]
+
+    @staticmethod
+    def _json(data) -> web.Response:
+        return web.json_response(data, dumps=lambda d: json.dumps(d, default=str))
+
+    async def _wait(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def insert(self, request):
+        await self._wait()
+        payload = await request.json()
+        rows = payload if isinstance(payload, list) else [payload]
+        if len({frozenset(row) for row in rows}) > 1:
+            # Like PostgREST: a bulk insert needs the same keys in every row
+            return web.json_response(
+                {"code": "PGRST102", "message": "All object keys must match"}, status=400
+            )
+        table = self.tables.setdefault(request.match_info["table"], [])
+        now = datetime.now().isoformat()
+        # Upsert (Prefer: resolution=merge-duplicates or ignore-duplicates)
+        keys = [c for c in request.query.get("on_conflict", "").split(",") if c]
+        ignore = "resolution=ignore-duplicates" in request.headers.get("Prefer", "")
+        stored = []
+        for row in rows:
+            existing = next(
+                (r for r in table if keys and all(r.get(k) == row.get(k) for k in keys)),
+                None,
+            )
+            if existing is not None:
+                if not ignore:
+                    existing.update(row)
+                    stored.append(existing)
+                continue
+            row = {"id": str(uuid.uuid4()), "created_at": now, **row}
+            table.append(row)
+            stored.append(row)
+        return self._json(stored)
+
+    async def rpc(self, request):
+        await self._wait()
+        function = request.match_info["function"]
+        params = await request.json()
+        if function == "record_duplicate":
+            original = next((
+                row for row in self.tables.get("tender_documents", [])
+                if row["id"] == params["p_original"] and not row.get("duplicate_of")
+            ), None)
+            if original is None:
+                return self._json(None)
+            original["duplicate_count"] = original.get("duplicate_count", 0) + 1
+            original["is_boilerplate"] = (
+                original["duplicate_count"] >= params["p_min_duplicates"]
+            )
+            return self._json(original["is_boilerplate"])
+        return web.json_response({"message": f"no function {function}"}, status=404)
+
+    async def select(self, request):
+        await self._wait()
+        rows = self._rows(request)
+        for key in reversed(request.query.get("order", "").split(",")):
+            if key:
+                column, _, direction = key.partition(".")
+                rows.sort(
+                    key=lambda row: (row.get(column) is None, _text(row.get(column))),
+                    reverse=direction.startswith("desc"),
+                )
+        offset = int(request.query.get("offset", 0))
+        limit = request.query.get("limit")
+        rows = rows[offset:offset + int(limit) if limit else None]
+        columns = request.query.get("select", "*")
+        if columns != "*":
+            names = [c for c in _split_list(columns) if "(" not in c]
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return self._json(rows)
+
+    async def update(self, request):
+        await self._wait()
+        changes = await request.json()
+        rows = self._rows(request)
+        for row in rows:
+            row.update(changes)
+        return self._json(rows)
+
+    async def delete(self, request):
+        await self._wait()
+        deleted = {id(row) for row in self._rows(request)}
+        table = self.tables.setdefault(request.match_info["table"], [])
+        table[:] = [row for row in table if id(row) not in deleted]
+        return web.Response(status=204)
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+
+class FakeLLM:
+    """OpenAI-compatible /v1/chat/completions with simulated latency.
+
+    The first token arrives after `latency` seconds, the rest at
+    `tokens_per_second`. Requests with a system message (AVIS extraction)
+    get a JSON object, others a text answer.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 200.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+
+    def routes(self) -> list:
+        return [web.post("/v1/chat/completions", self.completions)]
+
+    def _answer(self, messages: list) -> str:
+        if any(m.get("role") == "system" for m in messages):
+            return json.dumps(AVIS_ANSWER, ensure_ascii=False)
+        return TEXT_ANSWER
+
+    def _usage(self, messages: list, answer: str) -> dict:
+        prompt = sum(len(m.get("content") or "") for m in messages) // self.CHARS_PER_TOKEN
+        completion = len(answer) // self.CHARS_PER_TOKEN
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+
+    async def completions(self, request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        answer = self._answer(messages)
+        usage = self._usage(messages, answer)
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+        await asyncio.sleep(self.latency)
+
+        if not body.get("stream"):
+            await asyncio.sleep(len(answer) / self.CHARS_PER_TOKEN / self.tokens_per_second)
+            return web.json_response({
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(payload: dict):
+            chunk = {**base, "object": "chat.completion.chunk", **payload}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        # Eight tokens per chunk
+        step = self.CHARS_PER_TOKEN * 8
+        delay = 8 / self.tokens_per_second
+        for i in range(0, len(answer), step):
+            await send({"choices": [{
+                "index": 0,
+                "delta": {"content": answer[i:i + step]},
+                "finish_reason": None,
+            }]})
+            await asyncio.sleep(delay)
+        await send({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send({"choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def _serve(portal: FakePortal, postgrest: FakePostgrest, llm: FakeLLM, conn):
+    async def serve():
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.add_routes(portal.routes() + postgrest.routes() + llm.routes())
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        portal.base_url = f"http://127.0.0.1:{port}"
+        conn.send(portal.base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+class FakeServices:
+    """Serve the fakes on 127.0.0.1 from a separate process."""
+
+    def __init__(self, portal: FakePortal, postgrest: FakePostgrest, llm: FakeLLM):
+        self.portal = portal
+        self.postgrest = postgrest
+        self.llm = llm
+        self._process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> str:
+        """Start serving; returns the base URL."""
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=_serve,
+            args=(self.portal, self.postgrest, self.llm, sender),
+            name="fake-services",
+            daemon=True,
+        )
+        self._process.start()
+        return receiver.recv()
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+
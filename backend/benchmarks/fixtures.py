@@ -0,0 +1,215 @@
+"""
+Synthetic DCE fixture corpus for the pipeline benchmark.
+
+Builds tender archives shaped like marchespublics.gov.ma downloads: an
+AVIS and a CPS as PDF, an RC as DOCX, a BPU as XLSX and the standard
+annex forms (identical across tenders, as on the real portal), zipped
+together. Generation is deterministic for a given seed.
+"""
+import io
+import random
+import zipfile
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from docx import Document as DocxDocument
+from openpyxl import Workbook
+
+INSTITUTIONS = [
+    "Commune de Tanger",
+    "Office National de l'Electricité et de l'Eau Potable",
+    "Direction Provinciale de l'Agriculture de Settat",
+    "Université Cadi Ayyad - Marrakech",
+    "Centre Hospitalier Régional de Fès",
+]
+SUBJECTS = [
+    "Acquisition de matériel informatique",
+    "Fourniture de produits d'entretien",
+    "Achat de mobilier de bureau",
+    "Fourniture de consommables médicaux",
+    "Acquisition de pièces de rechange pour véhicules",
+]
+ITEMS = [
+    "Ordinateur portable", "Imprimante laser", "Onduleur 1500 VA",
+    "Armoire métallique", "Chaise de bureau", "Papier A4 80g",
+    "Gants d'examen", "Filtre à huile", "Toner noir", "Switch 24 ports",
+]
+MONTHS = [
+    "janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+    "août", "septembre", "octobre", "novembre", "décembre",
+]
+
+CPS_PAGES = 8
+ANNEX_PAGES = 3
+
+
+def _pdf_escape(line: str) -> bytes:
+    data = line.encode("cp1252", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Minimal text-layer PDF (Helvetica, WinAnsi), one string per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = b"BT /F1 10 Tf 14 TL 50 800 Td\n" + b"".join(
+            b"(" + _pdf_escape(line) + b") Tj T*\n" for line in text.splitlines()
+        ) + b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % len(kids)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def _avis(rng: random.Random, reference: str, institution: str, subject: str,
+          deadline: date, lots: int) -> str:
+    estimation = rng.randrange(50, 5000) * 1000
+    lines = [
+        "ROYAUME DU MAROC",
+        institution,
+        f"AVIS D'APPEL D'OFFRES OUVERT NATIONAL N° {reference}",
+        "",
+        f"Le {deadline.day} {MONTHS[deadline.month - 1]} {deadline.year} à 10 heures, il sera",
+        "procédé, dans les bureaux du maître d'ouvrage, à l'ouverture des plis",
+        f"relatifs à l'appel d'offres sur offres de prix pour : {subject}.",
+        "",
+        "Le dossier d'appel d'offres peut être retiré au service des marchés,",
+        "il peut également être téléchargé à partir du portail des marchés publics.",
+        "",
+        f"L'estimation des coûts des prestations est fixée à la somme de "
+        f"{estimation:,} DHS TTC".replace(",", " "),
+    ]
+    for lot in range(1, lots + 1):
+        caution = rng.randrange(1, 50) * 1000
+        lines.append(
+            f"Lot n° {lot} : {rng.choice(ITEMS)} - cautionnement provisoire : "
+            f"{caution:,} DHS".replace(",", " ")
+        )
+    return "\n".join(lines)
+
+
+def _cps_pages(rng: random.Random, reference: str, subject: str) -> List[str]:
+    pages = []
+    for number in range(1, CPS_PAGES + 1):
+        body = [
+            f"Marché n° {reference} - Cahier des Prescriptions Spéciales",
+            "",
+        ]
+        if number == 1:
+            body += ["CAHIER DES PRESCRIPTIONS SPECIALES", f"Objet : {subject}", ""]
+        for article in range(3):
+            body.append(f"Article {number * 3 + article} : {rng.choice(ITEMS)}")
+            body.append(
+                "Le titulaire s'engage à livrer les fournitures conformément aux "
+                "spécifications techniques du présent cahier."
+            )
+        body += ["", f"Page {number}/{CPS_PAGES}"]
+        pages.append("\n".join(body))
+    return pages
+
+
+def _rc_docx(reference: str, institution: str, subject: str) -> bytes:
+    document = DocxDocument()
+    document.add_heading("REGLEMENT DE CONSULTATION", 0)
+    document.add_paragraph(f"Appel d'offres ouvert n° {reference}")
+    document.add_paragraph(f"Maître d'ouvrage : {institution}")
+    document.add_paragraph(f"Objet : {subject}")
+    for article in range(1, 15):
+        document.add_paragraph(
+            f"Article {article} : Les concurrents doivent présenter un dossier "
+            "administratif, un dossier technique et une offre financière."
+        )
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def _bpu_xlsx(rng: random.Random, lots: int) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "BPU"
+    sheet.append(["Bordereau des prix - détail estimatif"])
+    sheet.append([])
+    sheet.append(["N° prix", "Désignation", "Unité", "Quantité", "Prix unitaire HT", "Prix total HT"])
+    for number in range(1, 10 * lots + 1):
+        quantity = rng.randrange(1, 200)
+        if number % 4 == 0:
+            # Left for bidders to fill in: blank unit and total price cells
+            sheet.append([number, rng.choice(ITEMS), "U", quantity, None, None])
+            continue
+        price = rng.randrange(10, 20000)
+        sheet.append([number, rng.choice(ITEMS), "U", quantity, price, quantity * price])
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def _annex_pages(title: str) -> List[str]:
+    return [
+        "\n".join([
+            title,
+            "",
+            "Je soussigné ......................................................",
+            "agissant au nom et pour le compte de ..............................",
+            "inscrit au registre du commerce de ......... sous le n° ...........",
+            "affilié à la CNSS sous le n° ......................................",
+            "déclare sur l'honneur l'exactitude des renseignements ci-dessus.",
+            "",
+            f"Page {page}/{ANNEX_PAGES}",
+        ])
+        for page in range(1, ANNEX_PAGES + 1)
+    ]
+
+
+# Annex forms are the same in every DCE
+ANNEXES = {
+    "Annexe_acte_engagement.pdf": make_pdf(_annex_pages("ANNEXE 1 - MODELE D'ACTE D'ENGAGEMENT")),
+    "Annexe_declaration_honneur.pdf": make_pdf(_annex_pages("ANNEXE 2 - DECLARATION SUR L'HONNEUR")),
+}
+
+
+def build_dce(index: int, seed: int = 0) -> Tuple[str, bytes, str]:
+    """One tender archive: (filename, zip bytes, deadline "DD/MM/YYYY HH:MM")."""
+    rng = random.Random(seed * 100003 + index)
+    reference = f"{rng.randrange(1, 99):02d}/{2026}/{rng.choice(['DAF', 'SM', 'DPA'])}"
+    institution = rng.choice(INSTITUTIONS)
+    subject = rng.choice(SUBJECTS)
+    deadline = date(2026, 11, 1) + timedelta(days=rng.randrange(60))
+    lots = rng.randrange(1, 4)
+
+    files = {
+        "AVIS.pdf": make_pdf([_avis(rng, reference, institution, subject, deadline, lots)]),
+        "CPS.pdf": make_pdf(_cps_pages(rng, reference, subject)),
+        "RC.docx": _rc_docx(reference, institution, subject),
+        "BPU.xlsx": _bpu_xlsx(rng, lots),
+        **ANNEXES,
+    }
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return f"DCE_{index}.zip", out.getvalue(), deadline.strftime("%d/%m/%Y") + " 10:00"
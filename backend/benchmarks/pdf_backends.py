@@ -0,0 +1,110 @@
+"""
+PDF backend benchmark.
+
+Compares the available PDF_BACKEND implementations on a fixture corpus
+for throughput and output quality.
+
+Corpus: a directory of PDFs. When "<name>.txt" sits next to "<name>.pdf"
+it is used as reference text and the similarity of each backend's output
+is reported; otherwise only text volume and garbage ratio are shown.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_backends path/to/pdfs [--backends pypdf pdfium pymupdf]
+"""
+import argparse
+import difflib
+import os
+import time
+
+from services.pdf_backends import PDF_BACKENDS, get_pdf_backend
+
+
+def garbage_ratio(text: str) -> float:
+    """Share of characters that are neither printable nor whitespace."""
+    if not text:
+        return 0.0
+    bad = sum(1 for c in text if not (c.isprintable() or c.isspace()) or c == "�")
+    return bad / len(text)
+
+
+def similarity(text: str, reference: str) -> float:
+    """Word-level similarity to the reference text."""
+    matcher = difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False)
+    return matcher.ratio()
+
+
+def run_backend(name: str, corpus: list) -> dict:
+    backend = get_pdf_backend(name)
+    if backend.name != name:
+        return {}
+
+    pages = chars = 0
+    elapsed = 0.0
+    garbage = []
+    scores = []
+    for _, data, reference in corpus:
+        start = time.perf_counter()
+        try:
+            count = backend.page_count(data)
+            text = "\n".join(backend.extract_pages(data, 0, count))
+        except Exception as e:
+            print(f"  {name}: error {e}")
+            continue
+        elapsed += time.perf_counter() - start
+        pages += count
+        chars += len(text)
+        garbage.append(garbage_ratio(text))
+        if reference is not None:
+            scores.append(similarity(text, reference))
+
+    return {
+        "pages/s": pages / elapsed if elapsed else 0.0,
+        "seconds": elapsed,
+        "chars": chars,
+        "garbage": sum(garbage) / len(garbage) if garbage else 0.0,
+        "similarity": sum(scores) / len(scores) if scores else None,
+    }
+
+
+def load_corpus(root: str) -> list:
+    corpus = []
+    for name in sorted(os.listdir(root)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        with open(os.path.join(root, name), "rb") as f:
+            data = f.read()
+        reference = None
+        reference_path = os.path.join(root, os.path.splitext(name)[0] + ".txt")
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        corpus.append((name, data, reference))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", help="Directory of PDF files")
+    parser.add_argument("--backends", nargs="+", default=list(PDF_BACKENDS))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No PDF files found under {args.corpus}")
+    print(f"{len(corpus)} PDFs")
+
+    print(f"\n{'backend':<10}{'pages/s':>10}{'seconds':>10}{'chars':>12}{'garbage':>10}{'similarity':>12}")
+    for name in args.backends:
+        result = run_backend(name, corpus)
+        if not result:
+            print(f"{name:<10}  not installed")
+            continue
+        score = f"{result['similarity']:.1%}" if result["similarity"] is not None else "-"
+        print(
+            f"{name:<10}{result['pages/s']:>10.1f}{result['seconds']:>10.2f}"
+            f"{result['chars']:>12}{result['garbage']:>10.2%}{score:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
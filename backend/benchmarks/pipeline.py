@@ -0,0 +1,302 @@
+"""
+End-to-end pipeline benchmark.
+
+Runs scraping, extraction, storage and AVIS analysis against local
+stand-ins (benchmarks.fakes) for marchespublics.gov.ma, Supabase and
+DeepSeek, on a synthetic DCE corpus (benchmarks.fixtures) or a directory
+of real DCE archives. Nothing leaves the machine.
+
+Reports tenders/minute, p50/p95 per stage and peak RSS.
+
+Modes:
+    browser  TenderScraper drives the fake portal with Playwright
+             (needs `playwright install chromium`)
+    http     links are collected by HttpLinkCollector, archives fetched
+             with httpx and handed to TenderScraper._store_tender,
+             skipping the browser
+
+Usage (from backend/):
+    python -m benchmarks.pipeline [--tenders 50] [--mode http]
+        [--corpus path/to/zips] [--llm-latency 0.5] [--db-latency 0.01]
+"""
+import argparse
+import asyncio
+import io
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+
+from benchmarks.fakes import (
+    DETAIL_PREFIX,
+    FakeLLM,
+    FakePortal,
+    FakePostgrest,
+    FakeServices,
+)
+from benchmarks.fixtures import build_dce
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEADLINE_SPAN = re.compile(
+    r"Date et heure limite de remise des plis</label>\s*<span>([^<]+)</span>"
+)
+
+# Samples per stage, in seconds
+samples = defaultdict(list)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples[name].append(time.perf_counter() - start)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def load_archives(args) -> list:
+    if not args.corpus:
+        return [build_dce(i, args.seed) for i in range(args.tenders)]
+    archives = []
+    for name in sorted(os.listdir(args.corpus)):
+        if name.lower().endswith(".zip"):
+            with open(os.path.join(args.corpus, name), "rb") as f:
+                archives.append((name, f.read(), ""))
+    return archives[:args.tenders]
+
+
+def configure(base_url: str, args):
+    """Point the settings at the fakes; must run before app imports."""
+    os.environ.update({
+        "SUPABASE_URL": base_url,
+        "SUPABASE_SERVICE_KEY": "benchmark",
+        "DEEPSEEK_API_KEY": "benchmark",
+        "DEEPSEEK_API_BASE": f"{base_url}/v1",
+        "SCRAPER_HEADLESS": "true",
+        "MAX_CONCURRENT_DOWNLOADS": str(args.concurrency),
+        "SCRAPER_REQUESTS_PER_SECOND": "0",  # Measure the pipeline, not the throttle
+        "EXTRACTION_WORKERS": str(args.workers),
+        "STORE_PRICE_SCHEDULES": "true",
+    })
+
+
+def record_metrics():
+    """Collect the pipeline's own timed() observations as stages."""
+    from services import metrics
+    from services.document_extractor import PREVIEW_SUFFIX
+
+    def observe(histogram, labels, seconds):
+        if histogram is metrics.SCRAPE_NAVIGATION_SECONDS:
+            name = f"navigation:{labels['step']}"
+        elif histogram is metrics.DOWNLOAD_SECONDS:
+            name = "download"
+        elif histogram is metrics.EXTRACTION_SECONDS:
+            preview = "_preview" if labels["method"].endswith(PREVIEW_SUFFIX) else ""
+            name = f"extraction:{labels['format']}{preview}"
+        elif histogram is metrics.SUPABASE_SECONDS:
+            name = f"supabase:{labels['operation']}"
+        elif histogram is metrics.LLM_SECONDS:
+            name = f"llm:{labels['pipeline']}"
+        else:
+            return
+        samples[name].append(seconds)
+
+    metrics.observers.append(observe)
+
+
+async def scrape_browser(base_url: str):
+    from services import tender_scraper
+
+    tender_scraper.HOMEPAGE_URL = f"{base_url}/pmmp/"
+    tender_scraper.TENDER_LINK_PREFIX = f"{base_url}{DETAIL_PREFIX}"
+
+    scraper = tender_scraper.TenderScraper()
+    download_tender = scraper._download_tender
+
+    async def timed_download(*args):
+        with stage("tender"):
+            return await download_tender(*args)
+
+    scraper._download_tender = timed_download
+    await scraper.run(date.today())
+
+
+async def scrape_http(base_url: str, concurrency: int):
+    import httpx
+    from services.link_collector import HttpLinkCollector
+    from services.metrics import DOWNLOAD_SECONDS, SCRAPE_NAVIGATION_SECONDS, timed
+    from services.tender_scraper import CATEGORY_FILTER, TenderScraper
+
+    scraper = TenderScraper()
+    semaphore = asyncio.Semaphore(concurrency)
+    collector = HttpLinkCollector(
+        f"{base_url}/pmmp/", f"{base_url}{DETAIL_PREFIX}", CATEGORY_FILTER
+    )
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        with timed(SCRAPE_NAVIGATION_SECONDS, step="collect_links"):
+            links = await collector.collect(date.today().strftime("%d/%m/%Y"))
+        print(f"Found {len(links)} tender links")
+
+        async def process(url: str):
+            async with semaphore:
+                with stage("tender"):
+                    with timed(SCRAPE_NAVIGATION_SECONDS, step="tender_page"):
+                        page = (await client.get(url)).text
+                    ref = url.rsplit("=", 1)[1]
+                    with timed(DOWNLOAD_SECONDS):
+                        response = await client.get(f"{base_url}/dce/{ref}")
+                    filename = re.search(
+                        r'filename="([^"]+)"', response.headers["content-disposition"]
+                    ).group(1)
+                    match = DEADLINE_SPAN.search(page)
+                    parts = match.group(1).split() if match else []
+                    deadline = (
+                        {"date": parts[0], "time": parts[1] if len(parts) > 1 else None}
+                        if parts else None
+                    )
+                    await scraper._store_tender(
+                        url, filename, io.BytesIO(response.content), deadline
+                    )
+
+        await asyncio.gather(*[process(url) for url in links])
+
+
+async def analyze(concurrency: int):
+    from database import supabase
+    from services.ai_analyzer import AIAnalyzer
+
+    analyzer = AIAnalyzer()
+    tenders = await supabase.select("tenders", "select=id")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(tender_id: str):
+        async with semaphore:
+            with stage("analysis:avis"):
+                try:
+                    await analyzer.extract_avis_metadata(tender_id)
+                except Exception as e:
+                    print(f"AVIS analysis failed for {tender_id}: {e}")
+
+    await asyncio.gather(*[process(t["id"]) for t in tenders])
+
+
+async def run(args, base_url: str) -> dict:
+    from database import supabase
+    from services.document_extractor import deferred_extractions, shutdown_extraction_pool
+
+    record_metrics()
+    timings = {}
+    start = time.perf_counter()
+    if args.mode == "browser":
+        await scrape_browser(base_url)
+    else:
+        await scrape_http(base_url, args.concurrency)
+    if deferred_extractions.queue is not None:
+        await deferred_extractions.queue.join()
+    timings["ingest"] = time.perf_counter() - start
+
+    if not args.no_analysis:
+        analysis_start = time.perf_counter()
+        await analyze(args.concurrency)
+        timings["analysis"] = time.perf_counter() - analysis_start
+    timings["total"] = time.perf_counter() - start
+
+    # Joins the workers so their peak RSS is reported (the fakes still run)
+    shutdown_extraction_pool()
+    return {
+        "timings": timings,
+        "rss": peak_rss_mb(),
+        "tenders": await supabase.select("tenders", "select=id"),
+        "documents": await supabase.select("tender_documents", "select=id,duplicate_of"),
+    }
+
+
+def peak_rss_mb() -> tuple:
+    """Peak RSS of this process and of its largest child, in MB."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in bytes on macOS, in KB elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / divisor, children / divisor
+
+
+def report(archives: list, result: dict):
+    timings = result["timings"]
+    stored = len(result["tenders"])
+    documents = result["documents"]
+    duplicates = sum(1 for d in documents if d.get("duplicate_of"))
+    llm_requests = sum(len(v) for k, v in samples.items() if k.startswith("llm:"))
+    minutes = timings["total"] / 60
+
+    print(f"\nTenders:    {stored}/{len(archives)} stored, {len(documents)} documents "
+          f"({duplicates} near-duplicates), {llm_requests} LLM requests")
+    print(f"Wall time:  ingest {timings['ingest']:.1f}s"
+          + (f", analysis {timings['analysis']:.1f}s" if "analysis" in timings else "")
+          + f", total {timings['total']:.1f}s")
+    print(f"Throughput: {stored / minutes if minutes else 0:.1f} tenders/min")
+    own, children = result["rss"]
+    if own is not None:
+        print(f"Peak RSS:   {own:.0f} MB (pipeline process), "
+              f"{children:.0f} MB (largest extraction worker or browser process)")
+
+    print(f"\n{'stage':<26}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for name in sorted(samples):
+        values = samples[name]
+        print(
+            f"{name:<26}{len(values):>7}{percentile(values, 0.5) * 1000:>10.1f}"
+            f"{percentile(values, 0.95) * 1000:>10.1f}{sum(values):>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tenders", type=int, default=20)
+    parser.add_argument("--mode", choices=("browser", "http"), default="http")
+    parser.add_argument("--corpus", help="Directory of DCE .zip archives (default: synthetic)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="EXTRACTION_WORKERS")
+    parser.add_argument("--portal-latency", type=float, default=0.05, help="Seconds per page")
+    parser.add_argument("--db-latency", type=float, default=0.01, help="Seconds per request")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds to first token")
+    parser.add_argument("--llm-tps", type=float, default=200.0, help="Tokens per second")
+    parser.add_argument("--no-analysis", action="store_true", help="Skip AVIS extraction")
+    args = parser.parse_args()
+
+    archives = load_archives(args)
+    if not archives:
+        raise SystemExit("No DCE archives to serve")
+    print(f"{len(archives)} DCE archives, "
+          f"{sum(len(a[1]) for a in archives) / 1024 / 1024:.1f} MB")
+
+    services = FakeServices(
+        FakePortal(archives, latency=args.portal_latency),
+        FakePostgrest(latency=args.db_latency),
+        FakeLLM(latency=args.llm_latency, tokens_per_second=args.llm_tps),
+    )
+    base_url = services.start()
+    configure(base_url, args)
+    try:
+        result = asyncio.run(run(args, base_url))
+    finally:
+        services.stop()
+    report(archives, result)
+
+
+if __name__ == "__main__":
+    main()
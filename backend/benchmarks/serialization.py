@@ -0,0 +1,113 @@
+"""
+List response serialization benchmark.
+
+Times a page of tender rows (as PostgREST returns them) through the
+previous path, response_model validation + jsonable_encoder + json, and
+through RowsResponse (orjson, no validation), then the size and time of
+gzip / brotli compression of the result.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--rows 500] [--repeat 50]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from responses import RowsResponse, brotli, compress
+from schemas import TenderResponse
+
+WORDS = (
+    "travaux construction entretien voirie fourniture materiel informatique "
+    "etude assistance technique reseau assainissement eau potable batiment "
+    "administratif rehabilitation equipement mobilier bureau lot unique"
+).split()
+INSTITUTIONS = [
+    "Commune de Casablanca", "Office National de l'Electricite et de l'Eau Potable",
+    "Ministere de l'Equipement et de l'Eau", "Universite Mohammed V - Rabat",
+    "Agence Urbaine de Marrakech", "Region de Souss-Massa",
+]
+
+
+def tender_rows(count: int, seed: int = 1) -> List[dict]:
+    """Rows shaped like filtered_tenders_page() with select=TenderResponse fields."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        published = date(2026, 10, 1) - timedelta(days=rng.randint(0, 60))
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "reference_url": f"https://www.marchespublics.gov.ma/index.php?page=entreprise."
+                             f"EntrepriseDetailConsultation&refConsultation={800000 + i}&orgAcronyme=x",
+            "scrape_date": published.isoformat(),
+            "status": rng.choice(["SCRAPED", "LISTED", "ANALYZED"]),
+            "reference_tender": f"{rng.randint(1, 99)}/2026/AO",
+            "tender_type": rng.choice(["AOON", "AOOI"]),
+            "issuing_institution": rng.choice(INSTITUTIONS),
+            "subject": " ".join(rng.choices(WORDS, k=rng.randint(8, 30))).capitalize(),
+            "total_estimated_value": round(rng.uniform(5e4, 5e7), 2),
+            "submission_deadline_date": (published + timedelta(days=30)).isoformat(),
+            "submission_deadline_time": "10:00:00",
+            "keywords_en": rng.sample(WORDS, 5),
+            "keywords_fr": rng.sample(WORDS, 5),
+            "keywords_ar": ["أشغال", "صيانة", "الطرق"],
+        })
+    return rows
+
+
+def timed_ms(fn, repeat: int) -> float:
+    """Median milliseconds of fn() over repeat runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = tender_rows(args.rows)
+    adapter = TypeAdapter(List[TenderResponse])
+
+    def before() -> bytes:
+        # What FastAPI does for response_model=List[TenderResponse] + JSONResponse
+        content = jsonable_encoder(adapter.dump_python(adapter.validate_python(rows)))
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode()
+
+    def after() -> bytes:
+        return RowsResponse(rows).body
+
+    print(f"{args.rows} rows, median of {args.repeat} runs\n")
+    print(f"{'serialization':<40}{'ms':>10}{'bytes':>12}")
+    before_ms, after_ms = timed_ms(before, args.repeat), timed_ms(after, args.repeat)
+    body = after()
+    print(f"{'validation + jsonable_encoder + json':<40}{before_ms:>10.2f}{len(before()):>12}")
+    print(f"{'RowsResponse (orjson)':<40}{after_ms:>10.2f}{len(body):>12}")
+    print(f"{'speedup':<40}{before_ms / after_ms:>9.1f}x")
+
+    print(f"\n{'compression':<40}{'ms':>10}{'bytes':>12}{'ratio':>10}")
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        ms = timed_ms(lambda: compress(body, encoding), args.repeat)
+        size = len(compress(body, encoding))
+        print(f"{encoding:<40}{ms:>10.2f}{size:>12}{len(body) / size:>9.1f}x")
+    if brotli is None:
+        print(f"{'br':<40}  not installed (pip install brotli)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+API startup benchmark.
+
+Measures, each in a fresh interpreter, the time to `import main` and the
+time from launching uvicorn to the first 200 from /health, then lists
+the slowest imports of `import main` (python -X importtime) and which
+heavy dependencies it loaded. Warm-up is off for the /health runs so
+the timing is the server's own.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--repeat 5] [--top 15]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from services.document_extractor import PARSER_MODULES
+from services.warmup import WARM_UP_MODULES
+
+IMPORT_MAIN = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+LOADED = "import sys, main; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))"
+
+
+def import_seconds() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_MAIN], capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def health_seconds(timeout: float = 60) -> float:
+    """Seconds from starting uvicorn to the first healthy /health."""
+    port = free_port()
+    env = dict(os.environ, WARM_UP="false")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"/health not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(top: int) -> list:
+    """(cumulative seconds, module) of the top-level imports of main."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Direct imports of main are indented one level below it
+        if not name.startswith("   ") or name.startswith("     "):
+            continue
+        imports.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    imports = [import_seconds() for _ in range(args.repeat)]
+    healths = [health_seconds() for _ in range(args.repeat)]
+    print(f"median of {args.repeat} runs")
+    print(f"{'import main':<30}{statistics.median(imports):>8.2f}s")
+    print(f"{'uvicorn start to /health':<30}{statistics.median(healths):>8.2f}s")
+
+    print("\nslowest imports of main (cumulative)")
+    for seconds, name in slowest_imports(args.top):
+        print(f"{name:<30}{seconds:>8.3f}s")
+
+    heavy = list(WARM_UP_MODULES) + list(PARSER_MODULES)
+    loaded = subprocess.run(
+        [sys.executable, "-c", LOADED, *heavy], capture_output=True, text=True, check=True
+    ).stdout.split()
+    print(f"\nloaded by import main: {', '.join(loaded) or 'none'} (of {', '.join(heavy)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,11 +20,66 @@ class Settings(BaseSettings):
     DEEPSEEK_API_KEY: Optional[str] = None
     DEEPSEEK_API_BASE: str = "https://api.deepseek.com/v1"
     DEEPSEEK_MODEL: str = "deepseek-chat"
+    DEEPSEEK_JSON_MODE: bool = True  # response_format=json_object when supported
+    # Identical concurrent analyses share one call; across API workers too
+    # with ANALYSIS_LOCKS (lease rows in analysis_locks)
+    ANALYSIS_LOCKS: bool = False
+    ANALYSIS_LOCK_TTL_SECONDS: int = 300  # Lease of a holder that died
+    ANALYSIS_LOCK_POLL_SECONDS: float = 1
+    SAVED_SEARCH_REFRESH_SECONDS: float = 60  # Reload of searches edited elsewhere
+    # Ask AI conversations (services/chat_memory.py)
+    ASK_CONTEXT_CHARS: int = 20000  # Document context block per tender
+    ASK_CONTEXT_TTL_SECONDS: float = 900  # Cached context block lifetime
+    CHAT_RECENT_TURNS: int = 4  # Latest turns always sent verbatim
+    CHAT_SUMMARY_BATCH: int = 4  # Older turns folded into the summary at once
+    CHAT_SUMMARY_MAX_CHARS: int = 2000
     
     # Scraper settings
     SCRAPER_HEADLESS: bool = False
     SCRAPER_DOWNLOAD_DIR: str = "downloads"
-    MAX_CONCURRENT_DOWNLOADS: int = 5
+    MAX_CONCURRENT_DOWNLOADS: int = 5  # Initial concurrency, adapted during the run
+    SCRAPER_MIN_CONCURRENCY: int = 1
+    SCRAPER_MAX_CONCURRENCY: int = 10
+    SCRAPER_LATENCY_TARGET_SECONDS: float = 10  # Slower page loads reduce concurrency
+    SCRAPER_REQUESTS_PER_SECOND: float = 2  # Navigations per portal host (0 = unlimited)
+    SCRAPER_BURST: int = 5
+    SCRAPER_MAX_RETRIES: int = 2  # Retries of a timed-out tender
+    SCRAPER_RETRY_BASE_SECONDS: float = 5  # Backoff base, jittered
+    SCRAPER_RETRY_MAX_SECONDS: float = 60
+
+    # Scraper workers (python -m services.worker)
+    SCRAPER_QUEUE: bool = False  # API enqueues runs in scrape_jobs instead of scraping
+    WORKER_POLL_SECONDS: float = 2  # Idle delay between claims
+    WORKER_HEARTBEAT_SECONDS: float = 30
+    WORKER_STALE_SECONDS: int = 300  # Jobs without heartbeat are claimed again
+    WORKER_MAX_ATTEMPTS: int = 3
+    WORKER_METRICS_PORT: int = 0  # Prometheus endpoint of each worker (0 = off)
+    SCRAPER_STOP_GRACE_SECONDS: float = 60  # In-flight downloads on stop/shutdown
+    SCRAPER_HTTP_LINKS: bool = True  # Collect links over HTTP, browser as fallback
+
+    # Extraction
+    EXTRACTION_WORKERS: int = 2  # Worker processes per pool (0 = run in a thread)
+    PDF_BACKEND: str = "pypdf"  # pypdf | pdfium | pymupdf
+    PDF_MAX_PAGES: int = 300  # Pages extracted per PDF
+    PDF_PAGES_PER_TASK: int = 25  # Page range handed to one worker
+    PDF_TIMEOUT_SECONDS: float = 120  # Per-document extraction deadline
+    TWO_PHASE_EXTRACTION: bool = True  # Classify PDFs from a preview first
+    CLASSIFY_PREVIEW_PAGES: int = 2
+    DEFERRED_EXTRACTION_MAX: int = 200  # Documents waiting; more are extracted at once
+    DEDUPLICATE_DOCUMENTS: bool = True  # Store near-duplicate annexes once
+    BOILERPLATE_MIN_DUPLICATES: int = 5  # Copies before a text is boilerplate
+    STORE_PRICE_SCHEDULES: bool = False  # Keep BPU rows in tender_price_items
+
+    # Original DCE archives, kept for re-extraction (services/blob_store.py)
+    BLOB_STORE: str = ""  # "" (off) | local | s3
+    BLOB_STORE_PATH: str = "blobs"  # local
+    BLOB_STORE_MAX_GB: float = 20  # local; least recently used evicted first
+    S3_BUCKET: Optional[str] = None
+    S3_PREFIX: str = "dce/"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_REGION: str = "us-east-1"
     
     # Execution mode
     TEST_MODE: bool = True  # Run immediately vs. scheduled
@@ -32,6 +87,12 @@ class Settings(BaseSettings):
     # API
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
+    COMPRESSION_MIN_BYTES: int = 1024  # Smaller responses are not compressed
+    # Preload the scraper, extractor and analyzer dependencies after startup
+    WARM_UP: bool = True
+    WARM_UP_DELAY_SECONDS: float = 2
+    # Open requests and event streams before uvicorn closes them on shutdown
+    GRACEFUL_SHUTDOWN_SECONDS: int = 10
     
     class Config:
         env_file = ".env"
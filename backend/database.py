@@ -6,8 +6,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
 import httpx
+from typing import Union
 
 from config import settings
+from services.metrics import SUPABASE_SECONDS, timed
 
 # SQLAlchemy setup
 engine = create_engine(
@@ -43,37 +45,83 @@ class SupabaseClient:
             "Content-Type": "application/json",
         }
     
-    async def insert(self, table: str, data: dict) -> dict:
-        """Insert a row into a table."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.url}/rest/v1/{table}",
-                headers={**self.headers, "Prefer": "return=representation"},
-                json=data,
-            )
-            response.raise_for_status()
-            return response.json()
+    async def insert(self, table: str, data: Union[dict, list]) -> list:
+        """Insert a row (or a list of rows) into a table."""
+        with timed(SUPABASE_SECONDS, table=table, operation="insert", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.url}/rest/v1/{table}",
+                    headers={**self.headers, "Prefer": "return=representation"},
+                    json=data,
+                )
+                response.raise_for_status()
+                return response.json()
     
+    async def upsert(
+        self, table: str, data: Union[dict, list], on_conflict: str, ignore_duplicates: bool = False
+    ) -> list:
+        """Insert rows, updating those that conflict on the given
+        comma-separated columns (a unique constraint), or leaving them
+        as they are with ignore_duplicates."""
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        with timed(SUPABASE_SECONDS, table=table, operation="upsert", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.url}/rest/v1/{table}?on_conflict={on_conflict}",
+                    headers={
+                        **self.headers,
+                        "Prefer": f"resolution={resolution},return=representation",
+                    },
+                    json=data,
+                )
+                response.raise_for_status()
+                return response.json()
+
     async def select(self, table: str, query: str = "") -> list:
         """Select rows from a table."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.url}/rest/v1/{table}?{query}",
-                headers=self.headers,
-            )
-            response.raise_for_status()
-            return response.json()
+        with timed(SUPABASE_SECONDS, table=table, operation="select", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    f"{self.url}/rest/v1/{table}?{query}",
+                    headers=self.headers,
+                )
+                response.raise_for_status()
+                return response.json()
     
     async def update(self, table: str, match: str, data: dict) -> dict:
         """Update rows in a table."""
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{self.url}/rest/v1/{table}?{match}",
-                headers={**self.headers, "Prefer": "return=representation"},
-                json=data,
-            )
-            response.raise_for_status()
-            return response.json()
+        with timed(SUPABASE_SECONDS, table=table, operation="update", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.patch(
+                    f"{self.url}/rest/v1/{table}?{match}",
+                    headers={**self.headers, "Prefer": "return=representation"},
+                    json=data,
+                )
+                response.raise_for_status()
+                return response.json()
+
+    async def delete(self, table: str, match: str):
+        """Delete rows from a table."""
+        with timed(SUPABASE_SECONDS, table=table, operation="delete", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.delete(
+                    f"{self.url}/rest/v1/{table}?{match}",
+                    headers=self.headers,
+                )
+                response.raise_for_status()
+
+    async def rpc(self, function: str, params: dict, query: str = "") -> list:
+        """Call a Postgres function (rows for set-returning functions,
+        which take select/order/... query parameters like tables)."""
+        with timed(SUPABASE_SECONDS, table=function, operation="rpc", outcome="ok"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.url}/rest/v1/rpc/{function}?{query}",
+                    headers=self.headers,
+                    json=params,
+                )
+                response.raise_for_status()
+                return response.json()
 
 
 # Initialize Supabase client if configured
@@ -4,22 +4,44 @@ Main entry point.
 """
 import sys
 import asyncio
+from contextlib import asynccontextmanager
 
 # Fix for Windows + Playwright + asyncio compatibility
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 from config import settings
-from routers import tenders, scraper, analysis
+from responses import CompressionMiddleware
+from routers import tenders, scraper, analysis, searches, analytics
+from services.document_extractor import deferred_extractions, shutdown_extraction_pool
+from services.metrics import render_metrics
+from services.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy dependencies load on first use; preload them once serving
+    warm_up_task = asyncio.create_task(warm_up()) if settings.WARM_UP else None
+    yield
+    if warm_up_task:
+        warm_up_task.cancel()
+    # Drain in dependency order: the scraper feeds the extraction pool
+    await scraper.shutdown()
+    await deferred_extractions.stop()
+    shutdown_extraction_pool()
+
 
 app = FastAPI(
     title="Tender AI Platform",
     description="Backend API for Moroccan Government Tender Analysis",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS for frontend
@@ -31,10 +53,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
 # Include routers
 app.include_router(tenders.router, prefix="/api/tenders", tags=["Tenders"])
 app.include_router(scraper.router, prefix="/api/scraper", tags=["Scraper"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["Analysis"])
+app.include_router(searches.router, prefix="/api/searches", tags=["Saved searches"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 
 
 @app.get("/")
@@ -52,10 +78,18 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=True,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
     )
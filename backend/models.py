@@ -1,7 +1,7 @@
 """
 SQLAlchemy models for local PostgreSQL (if not using Supabase).
 """
-from sqlalchemy import Column, String, Text, Date, Time, Numeric, Integer, Boolean, ForeignKey, ARRAY, Enum, JSON
+from sqlalchemy import Column, String, Text, Date, DateTime, Time, Numeric, Integer, BigInteger, Boolean, Float, ForeignKey, ARRAY, Enum, JSON, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -57,6 +57,12 @@ class Tender(Base):
     keywords_en = Column(ARRAY(Text), default=[])
     keywords_fr = Column(ARRAY(Text), default=[])
     keywords_ar = Column(ARRAY(Text), default=[])
+    lot_count = Column(Integer, default=0)  # Maintained by a tender_lots trigger
+
+    # Original DCE archive in the blob store (BLOB_STORE)
+    dce_blob_key = Column(Text)
+    dce_filename = Column(Text)
+    dce_size = Column(BigInteger)
 
     # Relationships
     documents = relationship("TenderDocument", back_populates="tender")
@@ -67,6 +73,7 @@ class Tender(Base):
 
 class TenderLot(Base):
     __tablename__ = "tender_lots"
+    __table_args__ = (UniqueConstraint("tender_id", "lot_number"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tender_id = Column(UUID(as_uuid=True), ForeignKey("tenders.id", ondelete="CASCADE"), nullable=False)
@@ -93,7 +100,38 @@ class TenderDocument(Base):
     source_date = Column(Date)
     is_annex_override = Column(Boolean, default=False)
 
+    # Near-duplicate detection (see services/fingerprints.py)
+    simhash = Column(BigInteger)
+    simhash_b0 = Column(Integer)
+    simhash_b1 = Column(Integer)
+    simhash_b2 = Column(Integer)
+    simhash_b3 = Column(Integer)
+    duplicate_of = Column(UUID(as_uuid=True), ForeignKey("tender_documents.id", ondelete="SET NULL"))
+    duplicate_count = Column(Integer, default=0)
+    is_boilerplate = Column(Boolean, default=False)
+
     tender = relationship("Tender", back_populates="documents")
+    price_items = relationship("TenderPriceItem", back_populates="document")
+
+
+class TenderPriceItem(Base):
+    __tablename__ = "tender_price_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tender_id = Column(UUID(as_uuid=True), ForeignKey("tenders.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("tender_documents.id", ondelete="CASCADE"), nullable=False)
+
+    sheet_name = Column(Text)
+    row_number = Column(Integer)
+    item_number = Column(Text)
+    designation = Column(Text)
+    unit = Column(Text)
+    quantity = Column(Numeric(18, 3))
+    unit_price = Column(Numeric(15, 2))
+    total_price = Column(Numeric(15, 2))
+    row_data = Column(JSON, default=[])
+
+    document = relationship("TenderDocument", back_populates="price_items")
 
 
 class TenderAnalysis(Base):
@@ -106,10 +144,22 @@ class TenderAnalysis(Base):
     model_used = Column(Text)
     tokens_used = Column(Integer)
     analysis_cost = Column(Numeric(10, 6))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     tender = relationship("Tender", back_populates="analysis")
 
 
+class AnalysisLock(Base):
+    __tablename__ = "analysis_locks"
+
+    key = Column(Text, primary_key=True)  # <pipeline>:<tender id>
+    holder = Column(Text, nullable=False)
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+    result = Column(JSON)
+
+
 class TenderChat(Base):
     __tablename__ = "tender_chats"
 
@@ -119,5 +169,110 @@ class TenderChat(Base):
     user_message = Column(Text, nullable=False)
     ai_response = Column(Text)
     detected_language = Column(Text)
+    conversation = Column(Boolean, nullable=False, default=True)  # False: standalone question
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     tender = relationship("Tender", back_populates="chats")
+
+
+class TenderChatMemory(Base):
+    __tablename__ = "tender_chat_memory"
+
+    tender_id = Column(UUID(as_uuid=True), ForeignKey("tenders.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    summarized_turns = Column(Integer, nullable=False, default=0)  # Oldest conversation turns covered
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SavedSearch(Base):
+    __tablename__ = "saved_searches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(Text, nullable=False)
+    query = Column(Text)
+    institution = Column(Text)
+    tender_type = Column(Enum(TenderType))
+    min_value = Column(Numeric(15, 2))
+    max_value = Column(Numeric(15, 2))
+    active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SavedSearchMatch(Base):
+    __tablename__ = "saved_search_matches"
+    __table_args__ = (UniqueConstraint("search_id", "tender_id"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    search_id = Column(UUID(as_uuid=True), ForeignKey("saved_searches.id", ondelete="CASCADE"), nullable=False)
+    tender_id = Column(UUID(as_uuid=True), ForeignKey("tenders.id", ondelete="CASCADE"), nullable=False)
+    matched_terms = Column(ARRAY(Text), default=[])
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AnalyticsWeekly(Base):
+    # Rollups maintained by database triggers
+    __tablename__ = "analytics_weekly"
+
+    week = Column(Date, primary_key=True)
+    institution = Column(Text, primary_key=True)  # '' when unknown
+    tender_type = Column(Text, primary_key=True)  # '' when unknown
+    tenders = Column(Integer, default=0)
+    valued_tenders = Column(Integer, default=0)
+    total_estimated_value = Column(Numeric(18, 2), default=0)
+    lots = Column(Integer, default=0)
+
+
+class AnalyticsDeadline(Base):
+    __tablename__ = "analytics_deadlines"
+
+    day = Column(Date, primary_key=True)
+    tenders = Column(Integer, default=0)
+
+
+class ScraperRun(Base):
+    __tablename__ = "scraper_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    target_date = Column(Date, nullable=False)
+    status = Column(Text, default="running")
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    error = Column(Text)
+
+    links_found = Column(Integer, default=0)
+    downloaded = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    documents_extracted = Column(Integer, default=0)
+    bytes_downloaded = Column(BigInteger, default=0)
+    retries = Column(Integer, default=0)
+
+    failure_reasons = Column(JSON, default={})
+    failures = Column(JSON, default=[])
+    durations = Column(JSON, default={})
+
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+    __table_args__ = (UniqueConstraint("run_id", "url"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id = Column(UUID(as_uuid=True), ForeignKey("scraper_runs.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Text, nullable=False)  # collect | tender
+    target_date = Column(Date, nullable=False)
+    url = Column(Text)
+    idx = Column(Integer)
+    status = Column(Text, default="queued")
+    attempts = Column(Integer, default=0)
+    worker_id = Column(Text)
+    heartbeat_at = Column(DateTime(timezone=True))
+
+    bytes = Column(BigInteger)
+    documents = Column(Integer)
+    retries = Column(Integer, default=0)
+    seconds = Column(Float)
+    failure_reason = Column(Text)
+    error = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,112 @@
+"""
+Response serialization and compression.
+Rows read from the database are already in their API shape: RowsResponse
+serializes them with orjson without a pydantic round trip, and
+CompressionMiddleware compresses large responses with brotli (when
+installed) or gzip, as negotiated with Accept-Encoding.
+"""
+import gzip
+from typing import Optional
+
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+GZIP_LEVEL = 6
+# Quality 4 compresses about like gzip -9 at gzip -6 speed
+BROTLI_QUALITY = 4
+
+
+class RowsResponse(ORJSONResponse):
+    """Trusted database rows, serialized as they are (no response_model
+    validation; select the response model's columns in the query)."""
+
+
+def _accepted(accept_encoding: str) -> set:
+    """Codings of an Accept-Encoding header, except those with q=0."""
+    codings = set()
+    for part in accept_encoding.split(","):
+        coding, _, param = part.partition(";")
+        name, _, value = param.partition("=")
+        try:
+            q = float(value) if name.strip().lower() == "q" else 1.0
+        except ValueError:
+            q = 1.0
+        if coding.strip() and q > 0:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress complete responses of at least minimum_size bytes.
+
+    Streamed responses (event streams, exports) pass through untouched,
+    so their chunks are not held back.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                # Body already going out as is
+                await send(message)
+                return
+
+            response_start, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=response_start["headers"])
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(response_start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(response_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,10 +1,12 @@
 """
 AI Analysis endpoints.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+from urllib.parse import quote
+from uuid import UUID
 
 from database import get_db, supabase
 from services.ai_analyzer import AIAnalyzer
@@ -20,6 +22,7 @@ class AnalyzeRequest(BaseModel):
 class AskRequest(BaseModel):
     tender_id: str
     question: str
+    conversation: bool = True  # Follow-up to the tender's earlier questions
 
 
 @router.post("/avis")
@@ -53,16 +56,21 @@ async def deep_analysis(request: AnalyzeRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/ask")
-async def ask_ai(request: AskRequest, db: Session = Depends(get_db)):
+async def ask_ai(
+    request: AskRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+):
     """
     AI Pipeline 3: Ask AI.
     Accept French and Moroccan Darija questions.
+    Older turns are summarized after the response is sent.
     """
     if not settings.DEEPSEEK_API_KEY:
         raise HTTPException(status_code=503, detail="DeepSeek API key not configured")
     
     analyzer = AIAnalyzer()
-    response = await analyzer.ask_question(request.tender_id, request.question)
+    response = await analyzer.ask_question(
+        request.tender_id, request.question, request.conversation
+    )
     
     # Store in chat history
     if supabase:
@@ -71,17 +79,45 @@ async def ask_ai(request: AskRequest, db: Session = Depends(get_db)):
             "user_message": request.question,
             "ai_response": response["answer"],
             "detected_language": response.get("language"),
+            "conversation": request.conversation,
         })
+        if request.conversation:
+            background_tasks.add_task(_summarize_chat, analyzer, request.tender_id)
     
     return {"status": "success", "data": response}
 
 
+async def _summarize_chat(analyzer: AIAnalyzer, tender_id: str):
+    try:
+        await analyzer.summarize_chat(tender_id)
+    except Exception as e:
+        print(f"Warning: chat summary failed for tender {tender_id}: {e}")
+
+
 @router.get("/chats/{tender_id}")
-async def get_chat_history(tender_id: str):
-    """Get chat history for a tender."""
+async def get_chat_history(
+    tender_id: str,
+    before: Optional[str] = Query(
+        None, description="Turns asked before this ISO timestamp (created_at of the oldest turn shown)"
+    ),
+    before_id: Optional[UUID] = Query(
+        None, description="id of the oldest turn shown, for turns sharing its created_at"
+    ),
+    limit: int = Query(50, le=200),
+):
+    """A page of a tender's chat history: the latest `limit` turns (before
+    the (`before`, `before_id`) turn), oldest first."""
     if supabase:
-        return await supabase.select(
-            "tender_chats",
-            f"tender_id=eq.{tender_id}&order=created_at.asc"
-        )
+        query_parts = [f"tender_id=eq.{tender_id}"]
+        if before and before_id:
+            # Keyset on (created_at, id), the order of the page
+            created_at = f'"{before}"'
+            keyset = f"(created_at.lt.{created_at},and(created_at.eq.{created_at},id.lt.{before_id}))"
+            query_parts.append(f"or={quote(keyset, safe='')}")
+        elif before:
+            query_parts.append(f"created_at=lt.{quote(before, safe='')}")
+        query_parts.append("order=created_at.desc,id.desc")
+        query_parts.append(f"limit={limit}")
+        rows = await supabase.select("tender_chats", "&".join(query_parts))
+        return rows[::-1]
     return []
@@ -0,0 +1,59 @@
+"""
+Analytics endpoints.
+Read the rollup tables (analytics_weekly, analytics_deadlines) that
+database triggers keep up to date as tenders and lots are written, so
+responses do not depend on the size of tenders.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import get_db, supabase
+
+router = APIRouter()
+
+
+async def _call(db: Session, function: str, params: dict):
+    """Run a JSON-returning analytics function."""
+    if supabase:
+        return await supabase.rpc(function, params)
+    names = ", ".join(f"{name} => :{name}" for name in params)
+    return db.execute(text(f"SELECT public.{function}({names})"), params).scalar()
+
+
+@router.get("/institutions")
+async def institutions(
+    weeks: int = Query(12, ge=1, le=520, description="Publication weeks, the current one included"),
+    limit: int = Query(20, le=200),
+    db: Session = Depends(get_db),
+):
+    """Top institutions by tenders, with tenders per week, estimated value and lots."""
+    return await _call(db, "analytics_institutions", {"p_weeks": weeks, "p_limit": limit})
+
+
+@router.get("/types")
+async def tender_types(
+    weeks: int = Query(12, ge=1, le=520),
+    db: Session = Depends(get_db),
+):
+    """Tenders, total and average estimated value and lots per tender type."""
+    return await _call(db, "analytics_types", {"p_weeks": weeks})
+
+
+@router.get("/weekly")
+async def weekly(
+    weeks: int = Query(12, ge=1, le=520),
+    db: Session = Depends(get_db),
+):
+    """Tenders, estimated value and lots per publication week."""
+    return await _call(db, "analytics_weeks", {"p_weeks": weeks})
+
+
+@router.get("/deadlines")
+async def upcoming_deadlines(
+    days: int = Query(14, ge=1, le=365),
+    limit: int = Query(20, le=200),
+    db: Session = Depends(get_db),
+):
+    """Submission deadlines of the coming days: tenders per day and the next tenders."""
+    return await _call(db, "analytics_upcoming_deadlines", {"p_days": days, "p_limit": limit})
@@ -1,43 +1,68 @@
 """
 Scraper control endpoints.
+Runs scrape in this process, or with SCRAPER_QUEUE are enqueued for
+scraper workers (services/worker.py) and followed through scraper_runs.
 """
-from fastapi import APIRouter, BackgroundTasks
+import asyncio
+import json
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
 from typing import Optional
 
+from config import settings
+from database import supabase
+from services.run_progress import RunProgress, run_events
 from services.tender_scraper import TenderScraper
 
 router = APIRouter()
 
-# Global scraper instance
+# Seconds between keep-alive messages on idle event streams
+HEARTBEAT_SECONDS = 15
+# Seconds between scraper_runs polls for event streams in queue mode
+QUEUE_POLL_SECONDS = 2
+# Queued runs still in progress
+ACTIVE_RUN_STATUSES = ("running", "stopping")
+
+# Global scraper instance and the task running it. The run is not a
+# request background task, so server shutdown does not wait for it but
+# stops it through shutdown() below.
 scraper_instance: Optional[TenderScraper] = None
+scraper_task: Optional[asyncio.Task] = None
+stop_task: Optional[asyncio.Task] = None
 scraper_status = {"running": False, "last_run": None, "error": None}
+# Progress of the current (or last) run
+current_run: Optional[RunProgress] = None
 
 
 @router.post("/run")
 async def run_scraper(
-    background_tasks: BackgroundTasks,
     target_date: Optional[str] = None,  # Format: YYYY-MM-DD
 ):
     """
     Trigger the scraper manually.
     If target_date is not provided, defaults to yesterday.
     """
-    global scraper_status
-    
-    if scraper_status["running"]:
-        return {"status": "error", "message": "Scraper is already running"}
-    
+    global scraper_status, current_run, scraper_task
+
     if target_date:
         date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
     else:
         date_obj = (datetime.now() - timedelta(days=1)).date()
-    
+
+    if settings.SCRAPER_QUEUE:
+        return await enqueue_run(date_obj)
+
+    if scraper_status["running"]:
+        return {"status": "error", "message": "Scraper is already running"}
+
     scraper_status["running"] = True
     scraper_status["error"] = None
-    
-    background_tasks.add_task(run_scraper_task, date_obj)
-    
+    current_run = RunProgress(date_obj)
+
+    scraper_task = asyncio.create_task(run_scraper_task(date_obj, current_run))
+
     return {
         "status": "started",
         "target_date": str(date_obj),
@@ -45,13 +70,13 @@ async def run_scraper(
     }
 
 
-async def run_scraper_task(target_date):
+async def run_scraper_task(target_date, progress: RunProgress):
     """Background task to run the scraper."""
     global scraper_status, scraper_instance
-    
+
     try:
         scraper_instance = TenderScraper()
-        await scraper_instance.run(target_date)
+        await scraper_instance.run(target_date, progress)
         scraper_status["last_run"] = datetime.now().isoformat()
     except Exception as e:
         scraper_status["error"] = str(e)
@@ -59,22 +84,210 @@ async def run_scraper_task(target_date):
         scraper_status["running"] = False
 
 
+async def enqueue_run(target_date) -> dict:
+    """Queue a run for the scraper workers."""
+    if not supabase:
+        return {"status": "error", "message": "SCRAPER_QUEUE needs a database connection"}
+    if await _active_run():
+        return {"status": "error", "message": "Scraper is already running"}
+
+    runs = await supabase.insert("scraper_runs", RunProgress(target_date)._row())
+    run_id = runs[0]["id"]
+    await supabase.insert("scrape_jobs", {
+        "run_id": run_id,
+        "kind": "collect",
+        "target_date": target_date.isoformat(),
+    })
+    return {
+        "status": "queued",
+        "run_id": run_id,
+        "target_date": str(target_date),
+        "message": "Run queued for the scraper workers",
+    }
+
+
+async def _active_run() -> Optional[dict]:
+    runs = await supabase.select(
+        "scraper_runs",
+        f"status=in.({','.join(ACTIVE_RUN_STATUSES)})&order=started_at.desc&limit=1",
+    )
+    return runs[0] if runs else None
+
+
+def _snapshot() -> dict:
+    return {
+        **scraper_status,
+        "run": current_run.summary() if current_run else None,
+    }
+
+
+async def _queue_snapshot() -> dict:
+    """Status of the latest queued run, with its pending jobs and workers."""
+    runs = await supabase.select("scraper_runs", "order=started_at.desc&limit=1")
+    run = runs[0] if runs else None
+    snapshot = {
+        "running": bool(run and run["status"] in ACTIVE_RUN_STATUSES),
+        "last_run": run["finished_at"] if run else None,
+        "error": run["error"] if run else None,
+        "run": run,
+        "jobs": {"queued": 0, "running": 0},
+        "workers": [],
+    }
+    if run:
+        jobs = await supabase.select(
+            "scrape_jobs",
+            f"run_id=eq.{run['id']}&status=in.(queued,running)&select=status,worker_id",
+        )
+        for job in jobs:
+            snapshot["jobs"][job["status"]] += 1
+        snapshot["workers"] = sorted({j["worker_id"] for j in jobs if j["worker_id"]})
+    return snapshot
+
+
+async def _current_snapshot() -> dict:
+    if settings.SCRAPER_QUEUE and supabase:
+        return await _queue_snapshot()
+    return _snapshot()
+
+
+async def _next_events(queue: Optional[asyncio.Queue]):
+    """Run events for a stream; None when idle for HEARTBEAT_SECONDS.
+
+    Events come from `queue` (a run_events subscription), or in queue
+    mode from polling scraper_runs, as run_progress snapshots.
+    """
+    if queue is not None:
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+
+    last, idle = None, 0.0
+    while True:
+        await asyncio.sleep(QUEUE_POLL_SECONDS)
+        snapshot = await _queue_snapshot()
+        if snapshot != last:
+            last, idle = snapshot, 0.0
+            yield {"type": "run_progress", **snapshot}
+            continue
+        idle += QUEUE_POLL_SECONDS
+        if idle >= HEARTBEAT_SECONDS:
+            idle = 0.0
+            yield None
+
+
+def _subscribe() -> Optional[asyncio.Queue]:
+    if settings.SCRAPER_QUEUE and supabase:
+        return None
+    return run_events.subscribe()
+
+
+def _unsubscribe(queue: Optional[asyncio.Queue]):
+    if queue is not None:
+        run_events.unsubscribe(queue)
+
+
 @router.get("/status")
 async def get_scraper_status():
-    """Get current scraper status."""
-    return scraper_status
+    """Get current scraper status and run statistics."""
+    return await _current_snapshot()
+
+
+@router.get("/runs")
+async def list_runs(limit: int = Query(20, le=100)):
+    """Statistics of past runs, newest first."""
+    if supabase:
+        return await supabase.select(
+            "scraper_runs", f"order=started_at.desc&limit={limit}"
+        )
+    return [current_run.summary()] if current_run else []
+
+
+@router.get("/events")
+async def stream_events(request: Request):
+    """
+    Server-Sent Events: a snapshot, then every run event
+    (run_started, links_collected, tender_downloaded, tender_retrying,
+    tender_failed, run_finished), each carrying the updated run statistics.
+    In queue mode, run_progress snapshots whenever the run changes.
+    """
+    queue = _subscribe()
+
+    async def events():
+        try:
+            yield f"data: {json.dumps({'type': 'snapshot', **await _current_snapshot()})}\n\n"
+            async for event in _next_events(queue):
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            _unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """Same events as /events over a WebSocket."""
+    await websocket.accept()
+    queue = _subscribe()
+    try:
+        await websocket.send_json({"type": "snapshot", **await _current_snapshot()})
+        async for event in _next_events(queue):
+            await websocket.send_json(event or {"type": "heartbeat"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _unsubscribe(queue)
 
 
 @router.post("/stop")
 async def stop_scraper():
-    """Attempt to stop the running scraper."""
-    global scraper_instance, scraper_status
-    
-    if not scraper_status["running"]:
+    """
+    Stop the running scraper gracefully.
+    Downloads in flight get SCRAPER_STOP_GRACE_SECONDS to finish;
+    `running` turns false once the run has wound down.
+    """
+    global stop_task
+
+    if settings.SCRAPER_QUEUE and supabase:
+        return await stop_queued_run()
+
+    if not scraper_status["running"] or not scraper_instance:
         return {"status": "error", "message": "Scraper is not running"}
-    
-    if scraper_instance:
+
+    if stop_task is None or stop_task.done():
+        stop_task = asyncio.create_task(scraper_instance.stop())
+    return {"status": "stopping", "grace_seconds": settings.SCRAPER_STOP_GRACE_SECONDS}
+
+
+async def stop_queued_run() -> dict:
+    """Cancel the queued tenders of the active run; workers finish the
+    ones in flight and the run closes as stopped."""
+    run = await _active_run()
+    if not run:
+        return {"status": "error", "message": "Scraper is not running"}
+    await supabase.update("scraper_runs", f"id=eq.{run['id']}", {"status": "stopping"})
+    await supabase.update(
+        "scrape_jobs", f"run_id=eq.{run['id']}&status=eq.queued", {"status": "cancelled"}
+    )
+    await supabase.rpc("refresh_scraper_run", {"p_run_id": run["id"]})
+    return {"status": "stopping", "run_id": run["id"]}
+
+
+async def shutdown():
+    """Drain a running scrape on application shutdown."""
+    if scraper_instance and scraper_status["running"]:
+        print("Shutdown: stopping scraper")
         await scraper_instance.stop()
-    
-    scraper_status["running"] = False
-    return {"status": "stopped"}
+    pending = [task for task in (stop_task, scraper_task) if task and not task.done()]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
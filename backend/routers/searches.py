@@ -0,0 +1,87 @@
+"""
+Saved search endpoints.
+Searches are matched against tenders as AVIS extraction completes (see
+services/saved_searches.py); their matches are listed here.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from urllib.parse import quote
+
+from database import supabase
+from schemas import SavedSearchCreate, SavedSearchResponse
+from services.saved_searches import matches_everything, saved_search_index
+
+router = APIRouter()
+
+MATCH_COLUMNS = "search_id,matched_terms,created_at,tenders(*)"
+
+
+@router.get("/", response_model=List[SavedSearchResponse])
+async def list_searches():
+    """All saved searches."""
+    if supabase:
+        return await supabase.select("saved_searches", "order=created_at.asc")
+    return []
+
+
+@router.post("/", response_model=SavedSearchResponse)
+async def create_search(search: SavedSearchCreate):
+    """Save a search; tenders analyzed from now on are matched against it."""
+    if not supabase:
+        raise HTTPException(status_code=503, detail="Saved searches need a database connection")
+    if matches_everything(search.model_dump()):
+        raise HTTPException(
+            status_code=422, detail="A saved search needs query words (not only stopwords) or a filter"
+        )
+    rows = await supabase.insert("saved_searches", search.model_dump())
+    saved_search_index.add(rows[0])
+    return rows[0]
+
+
+@router.delete("/{search_id}")
+async def delete_search(search_id: str):
+    """Delete a saved search and its matches."""
+    if not supabase:
+        raise HTTPException(status_code=503, detail="Saved searches need a database connection")
+    await supabase.delete("saved_searches", f"id=eq.{search_id}")
+    saved_search_index.remove(search_id)
+    return {"status": "deleted"}
+
+
+@router.get("/matches")
+async def list_matches(
+    since: Optional[str] = Query(None, description="Matches recorded after this ISO timestamp"),
+    limit: int = Query(100, le=500),
+    offset: int = Query(0),
+):
+    """Matches of every saved search, newest first, with their tenders."""
+    if not supabase:
+        return []
+    return await supabase.select("saved_search_matches", _match_query(None, since, limit, offset))
+
+
+@router.get("/{search_id}/matches")
+async def list_search_matches(
+    search_id: str,
+    since: Optional[str] = Query(None, description="Matches recorded after this ISO timestamp"),
+    limit: int = Query(100, le=500),
+    offset: int = Query(0),
+):
+    """Matches of one saved search, newest first, with their tenders."""
+    if not supabase:
+        return []
+    return await supabase.select(
+        "saved_search_matches", _match_query(search_id, since, limit, offset)
+    )
+
+
+def _match_query(search_id: Optional[str], since: Optional[str], limit: int, offset: int) -> str:
+    query_parts = [f"select={MATCH_COLUMNS}"]
+    if search_id:
+        query_parts.append(f"search_id=eq.{search_id}")
+    if since:
+        query_parts.append(f"created_at=gt.{quote(since, safe='')}")
+    query_parts.append("order=created_at.desc")
+    query_parts.append(f"limit={limit}")
+    query_parts.append(f"offset={offset}")
+    return "&".join(query_parts)
@@ -2,59 +2,162 @@
 Tender CRUD endpoints.
 """
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, text
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import date
 
 from database import get_db, supabase
 from models import Tender
+from responses import RowsResponse
 from schemas import TenderResponse, TenderCreate
+from services import export
 
 router = APIRouter()
 
+# Columns selected for rows returned without response_model validation
+RESPONSE_COLUMNS = ",".join(TenderResponse.model_fields)
+
+
+class TenderFilters:
+    """Filters shared by the tender list and its facet counts."""
+
+    def __init__(
+        self,
+        search: Optional[str] = Query(None, description="Search query"),
+        status: Optional[str] = Query(None, description="Filter by status"),
+        keyword: List[str] = Query([], description="Keyword (repeatable, any language)"),
+        keywords_all: bool = Query(False, description="Require every keyword, not any"),
+        institution: List[str] = Query([], description="Issuing institution (repeatable)"),
+        tender_type: Optional[Literal["AOON", "AOOI"]] = Query(None),
+        deadline_from: Optional[date] = Query(None),
+        deadline_to: Optional[date] = Query(None),
+        min_value: Optional[float] = Query(None, description="Minimum estimated value"),
+        max_value: Optional[float] = Query(None, description="Maximum estimated value"),
+    ):
+        self.search = search
+        self.status = status
+        self.keywords = keyword
+        self.keywords_all = keywords_all
+        self.institutions = institution
+        self.tender_type = tender_type
+        self.deadline_from = deadline_from
+        self.deadline_to = deadline_to
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def params(self) -> dict:
+        """Arguments of filter_tenders() and the functions built on it."""
+        return {
+            "p_search": self.search,
+            "p_status": self.status,
+            "p_keywords": self.keywords or None,
+            "p_keywords_all": self.keywords_all,
+            "p_institutions": self.institutions or None,
+            "p_tender_type": self.tender_type,
+            "p_deadline_from": self.deadline_from.isoformat() if self.deadline_from else None,
+            "p_deadline_to": self.deadline_to.isoformat() if self.deadline_to else None,
+            "p_min_value": self.min_value,
+            "p_max_value": self.max_value,
+        }
+
+    def apply(self, query):
+        """The same filters on a SQLAlchemy query."""
+        if self.search:
+            query = query.filter(
+                Tender.subject.ilike(f"%{self.search}%") |
+                Tender.issuing_institution.ilike(f"%{self.search}%")
+            )
+        if self.status:
+            query = query.filter(Tender.status == self.status)
+        if self.keywords:
+            columns = (Tender.keywords_en, Tender.keywords_fr, Tender.keywords_ar)
+            operator = "@>" if self.keywords_all else "&&"
+            query = query.filter(or_(*[c.op(operator)(array(self.keywords)) for c in columns]))
+        if self.institutions:
+            query = query.filter(Tender.issuing_institution.in_(self.institutions))
+        if self.tender_type:
+            query = query.filter(Tender.tender_type == self.tender_type)
+        if self.deadline_from:
+            query = query.filter(Tender.submission_deadline_date >= self.deadline_from)
+        if self.deadline_to:
+            query = query.filter(Tender.submission_deadline_date <= self.deadline_to)
+        if self.min_value is not None:
+            query = query.filter(Tender.total_estimated_value >= self.min_value)
+        if self.max_value is not None:
+            query = query.filter(Tender.total_estimated_value <= self.max_value)
+        return query
+
 
 @router.get("/", response_model=List[TenderResponse])
 async def list_tenders(
-    search: Optional[str] = Query(None, description="Search query"),
-    status: Optional[str] = Query(None, description="Filter by status"),
+    filters: TenderFilters = Depends(),
     limit: int = Query(100, le=500),
     offset: int = Query(0),
     db: Session = Depends(get_db),
 ):
     """List tenders with optional filtering."""
     if supabase:
-        # Use Supabase REST API
-        query_parts = []
-        if search:
-            query_parts.append(f"or=(subject.ilike.*{search}*,issuing_institution.ilike.*{search}*)")
-        if status:
-            query_parts.append(f"status=eq.{status}")
-        query_parts.append(f"limit={limit}")
-        query_parts.append(f"offset={offset}")
-        query_parts.append("order=scrape_date.desc")
-        
-        return await supabase.select("tenders", "&".join(query_parts))
+        # Use Supabase REST API (keyword filters use the GIN indexes).
+        # The rows already have the TenderResponse shape: sent as they are.
+        return RowsResponse(await supabase.rpc("filtered_tenders_page", {
+            **filters.params(),
+            "p_limit": limit,
+            "p_offset": offset,
+        }, f"select={RESPONSE_COLUMNS}"))
     else:
         # Use SQLAlchemy
-        query = db.query(Tender)
-        if search:
-            query = query.filter(
-                Tender.subject.ilike(f"%{search}%") |
-                Tender.issuing_institution.ilike(f"%{search}%")
-            )
-        if status:
-            query = query.filter(Tender.status == status)
+        query = filters.apply(db.query(Tender))
         return query.order_by(Tender.scrape_date.desc()).offset(offset).limit(limit).all()
 
 
+@router.get("/facets")
+async def tender_facets(
+    filters: TenderFilters = Depends(),
+    limit: int = Query(20, le=100, description="Values per facet"),
+    db: Session = Depends(get_db),
+):
+    """Counts of the filtered tenders: total, top keywords per language,
+    top institutions, tender types and statuses."""
+    params = {**filters.params(), "p_limit": limit}
+    if supabase:
+        return await supabase.rpc("tender_facets", params)
+    names = ", ".join(f"{name} => :{name}" for name in params)
+    return db.execute(text(f"SELECT public.tender_facets({names})"), params).scalar()
+
+
+@router.get("/export")
+async def export_tenders(
+    format: Literal["ndjson", "csv", "parquet"] = Query("ndjson"),
+    date_from: Optional[date] = Query(None, description="Scraped on or after"),
+    date_to: Optional[date] = Query(None, description="Scraped on or before"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+):
+    """Stream every matching tender with its lots and latest analysis."""
+    try:
+        writer = export.WRITERS[format]()
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Parquet export needs pyarrow")
+    filename = f"tenders-{date.today():%Y%m%d}.{format}"
+    return StreamingResponse(
+        export.export_tenders(writer, date_from, date_to, status),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{tender_id}", response_model=TenderResponse)
 async def get_tender(tender_id: str, db: Session = Depends(get_db)):
     """Get a single tender by ID."""
     if supabase:
-        result = await supabase.select("tenders", f"id=eq.{tender_id}")
+        result = await supabase.select(
+            "tenders", f"id=eq.{tender_id}&select={RESPONSE_COLUMNS}"
+        )
         if not result:
             raise HTTPException(status_code=404, detail="Tender not found")
-        return result[0]
+        return RowsResponse(result[0])
     else:
         tender = db.query(Tender).filter(Tender.id == tender_id).first()
         if not tender:
@@ -2,7 +2,7 @@
 Pydantic schemas for API validation.
 """
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import date, time
 from uuid import UUID
 
@@ -53,6 +53,25 @@ class TenderDocumentResponse(BaseModel):
     original_filename: Optional[str] = None
     page_count: Optional[int] = None
     extraction_method: Optional[str] = None
+    duplicate_of: Optional[UUID] = None
+    is_boilerplate: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class SavedSearchCreate(BaseModel):
+    name: str
+    query: Optional[str] = None  # Every word must appear in the tender
+    institution: Optional[str] = None
+    tender_type: Optional[Literal["AOON", "AOOI"]] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    active: bool = True
+
+
+class SavedSearchResponse(SavedSearchCreate):
+    id: UUID
 
     class Config:
         from_attributes = True
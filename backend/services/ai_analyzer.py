@@ -3,11 +3,29 @@ AI Analyzer Service.
 Uses DeepSeek API for tender analysis.
 """
 import json
-from typing import Optional
-from openai import AsyncOpenAI
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ValidationError, field_validator
 
 from config import settings
 from database import supabase
+from services.avis_rules import extract_avis_fields, parse_amount
+from services.chat_memory import (
+    context_cache,
+    format_turns,
+    history_messages,
+    load_memory,
+    save_summary,
+    turns_to_fold,
+)
+from services.document_extractor import PREVIEW_SUFFIX, deferred_extractions
+from services.metrics import LLM_SECONDS, PROMPT_BYTES_SAVED, record_llm_usage, timed
+from services.partial_json import PartialJSONParser
+from services.prompt_preparation import prepare_document_text
+from services.saved_searches import record_matches
+from services.single_flight import SingleFlight
 
 # Avis metadata extraction schema
 AVIS_SCHEMA = {
@@ -33,6 +51,12 @@ AVIS_SCHEMA = {
     ],
 }
 
+# Requested instead of "lots" when the rules read the lots: their
+# numbers, values and cautions are known, only the subjects are missing
+LOT_SUBJECTS_SCHEMA = {"lot_subjects": [{"lot_number": "", "lot_subject": ""}]}
+
+# Static instructions go in the system message so the rendered prefix is
+# byte-identical across calls (provider-side prefix caching)
 AVIS_EXTRACTION_PROMPT = """You are an expert at extracting structured data from Moroccan government tender documents.
 
 Extract the following information from the AVIS document text. Return a valid JSON object matching this schema:
@@ -47,22 +71,167 @@ Rules:
 5. Parse dates in DD/MM/YYYY format
 6. Parse monetary values as numbers (remove MAD suffix)
 
-AVIS Document Text:
-{text}
-
 Return ONLY the JSON object, no markdown or explanation."""
 
+AVIS_DOCUMENT_PROMPT = """AVIS Document Text:
+{text}"""
+
+# Calls per AVIS extraction: the first one plus retries of failed fields
+AVIS_MAX_ATTEMPTS = 2
+
+# System message of every question: the same for a tender's whole
+# conversation, so the provider can cache it
 ASK_AI_PROMPT = """You are an expert assistant on Moroccan government tenders.
 
 You have access to the following tender documents:
 {context}
 
-Answer the user's question about this tender. Be precise and cite specific sections when possible.
-Support French and Moroccan Darija (Arabic dialect) questions.
+Answer the user's questions about this tender. Be precise and cite specific sections when possible.
+Support French and Moroccan Darija (Arabic dialect) questions."""
 
-User Question: {question}
+CHAT_SUMMARY_PROMPT = """Update the summary of a conversation about a tender with the new exchanges below.
+Keep what later questions may refer to: the questions asked, the facts and figures given, the user's
+goals and decisions. Drop pleasantries. Write in the language of the conversation, in at most
+{max_chars} characters.
+
+Current summary:
+{summary}
+
+New exchanges:
+{exchanges}
 
-Provide a clear, expert answer:"""
+Updated summary:"""
+
+
+@lru_cache(maxsize=64)
+def _avis_instructions(fields: tuple) -> str:
+    """Render the static AVIS prompt for a set of schema fields once."""
+    schema = {field: {**AVIS_SCHEMA, **LOT_SUBJECTS_SCHEMA}[field] for field in fields}
+    return AVIS_EXTRACTION_PROMPT.format(schema=json.dumps(schema, indent=2))
+
+
+def _excerpt(text: str, limit: int) -> str:
+    """Cleaned-up start of a document for multi-document prompts."""
+    return prepare_document_text(text)[0][:limit]
+
+
+def _rejects_response_format(error) -> bool:
+    """Whether a 400 is about response_format (not, say, the context length)."""
+    return getattr(error, "param", None) == "response_format" or (
+        "response_format" in str(getattr(error, "message", error))
+    )
+
+
+def _to_amount(value) -> Optional[float]:
+    """Coerce an extracted monetary value (number or French string) to float."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_amount(re.sub(r"[^\d.,\s]", "", str(value)))
+
+
+class AvisDeadline(BaseModel):
+    date: str = ""
+    time: str = ""
+
+    @field_validator("date")
+    @classmethod
+    def _check_date(cls, value: str) -> str:
+        value = value.strip()
+        if value and not re.fullmatch(r"\d{1,2}/\d{1,2}/\d{4}", value):
+            raise ValueError("expected DD/MM/YYYY")
+        return value
+
+    @field_validator("time")
+    @classmethod
+    def _check_time(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            return value
+        match = re.fullmatch(r"(\d{1,2})\s*[:hH]\s*(\d{2})?", value)
+        if not match:
+            raise ValueError("expected HH:MM")
+        return f"{int(match.group(1)):02d}:{match.group(2) or '00'}"
+
+
+class AvisKeywords(BaseModel):
+    keywords_eng: List[str] = []
+    keywords_fr: List[str] = []
+    keywords_ar: List[str] = []
+
+
+class AvisLot(BaseModel):
+    lot_number: int
+    lot_subject: Optional[str] = None
+    lot_estimated_value: Optional[float] = None
+    caution_provisoire: Optional[float] = None
+
+    @field_validator("lot_estimated_value", "caution_provisoire", mode="before")
+    @classmethod
+    def _parse_amount(cls, value):
+        return _to_amount(value)
+
+
+class AvisMetadata(BaseModel):
+    """Pydantic model of AVIS_SCHEMA (and LOT_SUBJECTS_SCHEMA), used to
+    validate LLM output per field."""
+
+    reference_tender: Optional[str] = None
+    tender_type: Optional[Literal["AOON", "AOOI"]] = None
+    issuing_institution: Optional[str] = None
+    submission_deadline: Optional[AvisDeadline] = None
+    folder_opening_location: Optional[str] = None
+    subject: Optional[str] = None
+    total_estimated_value: Optional[float] = None
+    keywords: Optional[AvisKeywords] = None
+    lots: List[AvisLot] = []
+    lot_subjects: List[AvisLot] = []
+
+    @field_validator("tender_type", mode="before")
+    @classmethod
+    def _normalize_type(cls, value):
+        if isinstance(value, str):
+            return value.strip().upper() or None
+        return value
+
+    @field_validator("total_estimated_value", mode="before")
+    @classmethod
+    def _parse_amount(cls, value):
+        return _to_amount(value)
+
+    @field_validator("lots", "lot_subjects", mode="before")
+    @classmethod
+    def _drop_empty_lots(cls, value):
+        # The schema template lot comes back blank when there are no lots
+        if isinstance(value, list):
+            return [lot for lot in value if not isinstance(lot, dict) or any(lot.values())]
+        return value
+
+
+def _validate_avis_fields(data: dict, fields: list) -> tuple:
+    """Validate each requested field on its own.
+
+    Returns (valid values, failed field names); missing fields count as failed.
+    """
+    valid, failed = {}, []
+    for field in fields:
+        if field not in data:
+            failed.append(field)
+            continue
+        try:
+            model = AvisMetadata.model_validate({field: data[field]})
+        except ValidationError:
+            failed.append(field)
+            continue
+        valid[field] = model.model_dump(include={field})[field]
+    return valid, failed
+
+
+# AIAnalyzer is created per request; in-flight analyses are shared here
+avis_flights = SingleFlight("avis")
+deep_analysis_flights = SingleFlight("deep_analysis")
+chat_summary_flights = SingleFlight("chat_summary")
 
 
 class AIAnalyzer:
@@ -70,15 +239,26 @@ class AIAnalyzer:
 
     def __init__(self):
         if settings.DEEPSEEK_API_KEY:
+            from openai import AsyncOpenAI
+
             self.client = AsyncOpenAI(
                 api_key=settings.DEEPSEEK_API_KEY,
                 base_url=settings.DEEPSEEK_API_BASE,
             )
         else:
             self.client = None
+        self.json_mode = settings.DEEPSEEK_JSON_MODE
 
     async def extract_avis_metadata(self, tender_id: str) -> dict:
-        """Extract metadata from AVIS document using AI."""
+        """Extract metadata from AVIS document using AI.
+
+        Concurrent calls for the same tender share one extraction.
+        """
+        return await avis_flights.do(
+            tender_id, lambda: self._extract_avis_metadata(tender_id)
+        )
+
+    async def _extract_avis_metadata(self, tender_id: str) -> dict:
         if not self.client:
             raise Exception("DeepSeek API not configured")
 
@@ -98,71 +278,227 @@ class AIAnalyzer:
         if not docs or not docs[0].get("extracted_text"):
             raise Exception("No AVIS or RC document found")
 
-        avis_text = docs[0]["extracted_text"]
+        avis_text, prompt_stats = prepare_document_text(docs[0]["extracted_text"])
+        source_type = docs[0].get("document_type", "AVIS")
+        PROMPT_BYTES_SAVED.labels(pipeline="avis").inc(prompt_stats["bytes_saved"])
+
+        # Fixed-template fields are read by rules first; the LLM is asked
+        # only for the others (the free-text ones, keywords, subject and
+        # institution, always) and, for rule-read lots, their subjects
+        rule_fields = extract_avis_fields(avis_text)
+        field_sources = {field: "rules" for field in rule_fields}
+        missing = [field for field in AVIS_SCHEMA if field not in rule_fields]
+        if "lots" in rule_fields and any(
+            not lot.get("lot_subject") for lot in rule_fields["lots"]
+        ):
+            missing.append("lot_subjects")
+
+        metadata = await self._extract_avis_with_llm(avis_text, missing)
+        for field in missing:
+            if metadata.get(field):
+                field_sources[field] = "llm"
+
+        metadata.update(rule_fields)
+        lot_subjects = metadata.pop("lot_subjects", None)
+        if lot_subjects:
+            metadata["lots"] = self._add_lot_subjects(metadata["lots"], lot_subjects)
+            field_sources["lots"] = "rules+llm"
+        field_sources.pop("lot_subjects", None)
+        metadata["field_sources"] = field_sources
+        metadata["prompt_stats"] = prompt_stats
 
-        # Call DeepSeek
-        prompt = AVIS_EXTRACTION_PROMPT.format(
-            schema=json.dumps(AVIS_SCHEMA, indent=2),
-            text=avis_text[:15000],  # Limit context
-        )
+        # Update tender with extracted metadata
+        update_data = self._build_tender_update(metadata, source_type)
+        update_data["status"] = "LISTED"
 
-        response = await self.client.chat.completions.create(
-            model=settings.DEEPSEEK_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-        )
+        tenders = await supabase.update("tenders", f"id=eq.{tender_id}", update_data)
+
+        # Upsert lots: extracting again updates them instead of adding copies
+        lots = {}
+        for lot in metadata.get("lots", []):
+            if lot.get("lot_number"):
+                lots[int(lot["lot_number"])] = {
+                    "tender_id": tender_id,
+                    "lot_number": int(lot["lot_number"]),
+                    "lot_subject": lot.get("lot_subject"),
+                    "lot_estimated_value": _to_amount(lot.get("lot_estimated_value")),
+                    "caution_provisoire": _to_amount(lot.get("caution_provisoire")),
+                }
+        if lots:
+            await supabase.upsert(
+                "tender_lots", list(lots.values()), on_conflict="tender_id,lot_number"
+            )
 
-        result_text = response.choices[0].message.content
+        if tenders:
+            try:
+                await record_matches(tenders[0])
+            except Exception as e:
+                print(f"Warning: tender {tender_id} not matched against saved searches: {e}")
 
-        # Parse JSON
-        try:
-            # Clean markdown if present
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0]
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0]
+        return metadata
 
-            metadata = json.loads(result_text)
-        except json.JSONDecodeError:
-            metadata = {"error": "Failed to parse AI response", "raw": result_text}
+    async def _extract_avis_with_llm(self, avis_text: str, fields: list) -> dict:
+        """Ask DeepSeek for the given AVIS_SCHEMA fields.
+
+        Fields that are missing or fail validation are requested again
+        on their own, up to AVIS_MAX_ATTEMPTS calls in total.
+        """
+        metadata = {}
+        pending = list(fields)
+        raw = ""
+        for _ in range(AVIS_MAX_ATTEMPTS):
+            parsed, raw = await self._request_avis_fields(avis_text, pending)
+            valid, pending = _validate_avis_fields(parsed, pending)
+            metadata.update(valid)
+            if not pending:
+                break
+
+        if pending:
+            metadata["invalid_fields"] = pending
+            if not any(field in metadata for field in fields):
+                metadata.update({"error": "Failed to parse AI response", "raw": raw})
+        return metadata
 
-        # Update tender with extracted metadata
+    async def _request_avis_fields(self, avis_text: str, fields: list) -> tuple:
+        """Stream one AVIS extraction call and parse it tolerantly.
+
+        Returns (parsed object, raw text). A truncated or interrupted
+        response still yields the fields that were fully received.
+        """
+        request = {
+            "model": settings.DEEPSEEK_MODEL,
+            "messages": [
+                {"role": "system", "content": _avis_instructions(tuple(fields))},
+                {"role": "user", "content": AVIS_DOCUMENT_PROMPT.format(
+                    text=avis_text[:15000],  # Limit context
+                )},
+            ],
+            "temperature": 0.1,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+
+        from openai import APIError, BadRequestError
+
+        parser = PartialJSONParser()
+        try:
+            with timed(LLM_SECONDS, pipeline="avis", outcome="ok") as labels:
+                stream = await self.client.chat.completions.create(**request)
+                try:
+                    async for chunk in stream:
+                        if chunk.usage:
+                            record_llm_usage("avis", chunk.usage)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parser.feed(chunk.choices[0].delta.content)
+                except APIError as e:
+                    labels["outcome"] = "interrupted"
+                    print(f"AVIS extraction stream interrupted: {e}")
+        except BadRequestError as e:
+            if not self.json_mode or not _rejects_response_format(e):
+                raise
+            # Endpoint without JSON response-format support
+            self.json_mode = False
+            return await self._request_avis_fields(avis_text, fields)
+
+        parsed = parser.result() or {}
+        if parsed and parser.partial_tail:
+            # The last field was cut short inside a nested value
+            parsed.pop(list(parsed)[-1])
+        return parsed, parser.text
+
+    async def _context_documents(self, docs: list) -> list:
+        """Documents to put in a prompt: boilerplate dropped, texts completed."""
+        docs = [d for d in docs if not d.get("is_boilerplate")]
+        await self._complete_deferred(docs)
+
+        # Near-duplicates store their text once, on the original document,
+        # which also carries the up-to-date boilerplate flag
+        originals = {d["duplicate_of"] for d in docs if d.get("duplicate_of")}
+        if originals:
+            rows = await supabase.select(
+                "tender_documents",
+                f"select=id,extracted_text,is_boilerplate&id=in.({','.join(originals)})",
+            )
+            by_id = {row["id"]: row for row in rows}
+            docs = [
+                d for d in docs
+                if not by_id.get(d.get("duplicate_of"), {}).get("is_boilerplate")
+            ]
+            for d in docs:
+                original = by_id.get(d.get("duplicate_of"))
+                if original and not d.get("extracted_text"):
+                    d["extracted_text"] = original.get("extracted_text")
+        return docs
+
+    @staticmethod
+    async def _complete_deferred(docs: list):
+        """Finish two-phase extraction of documents that only hold a preview."""
+        for doc in docs:
+            if (doc.get("extraction_method") or "").endswith(PREVIEW_SUFFIX):
+                text = await deferred_extractions.extract_now(doc["id"])
+                if text:
+                    doc["extracted_text"] = text
+
+    @staticmethod
+    def _add_lot_subjects(rule_lots: list, llm_lots: list) -> list:
+        """Rule-extracted lots with the LLM subjects, by lot number."""
+        subjects = {lot["lot_number"]: lot.get("lot_subject") for lot in llm_lots}
+        return [
+            {**lot, "lot_subject": lot.get("lot_subject") or subjects.get(lot["lot_number"])}
+            for lot in rule_lots
+        ]
+
+    @staticmethod
+    def _build_tender_update(metadata: dict, source_type: str) -> dict:
+        """Map extracted AVIS metadata onto tenders columns."""
         update_data = {}
         if metadata.get("reference_tender"):
             update_data["reference_tender"] = metadata["reference_tender"]
-        if metadata.get("tender_type"):
+        if metadata.get("tender_type") in ("AOON", "AOOI"):
             update_data["tender_type"] = metadata["tender_type"]
         if metadata.get("issuing_institution"):
             update_data["issuing_institution"] = metadata["issuing_institution"]
         if metadata.get("subject"):
             update_data["subject"] = metadata["subject"]
-        if metadata.get("keywords", {}).get("keywords_eng"):
-            update_data["keywords_en"] = metadata["keywords"]["keywords_eng"]
-        if metadata.get("keywords", {}).get("keywords_fr"):
-            update_data["keywords_fr"] = metadata["keywords"]["keywords_fr"]
-        if metadata.get("keywords", {}).get("keywords_ar"):
-            update_data["keywords_ar"] = metadata["keywords"]["keywords_ar"]
-
-        update_data["status"] = "LISTED"
+        if metadata.get("folder_opening_location"):
+            update_data["folder_opening_location"] = metadata["folder_opening_location"]
+        if _to_amount(metadata.get("total_estimated_value")):
+            update_data["total_estimated_value"] = _to_amount(
+                metadata["total_estimated_value"]
+            )
 
-        if update_data:
-            await supabase.update("tenders", f"id=eq.{tender_id}", update_data)
+        deadline = metadata.get("submission_deadline") or {}
+        try:
+            dl_date = datetime.strptime(deadline.get("date", ""), "%d/%m/%Y").date()
+            update_data["submission_deadline_date"] = dl_date.isoformat()
+            update_data["deadline_source"] = source_type
+            if deadline.get("time"):
+                update_data["submission_deadline_time"] = deadline["time"]
+        except (TypeError, ValueError):
+            pass
+
+        keywords = metadata.get("keywords") or {}
+        if keywords.get("keywords_eng"):
+            update_data["keywords_en"] = keywords["keywords_eng"]
+        if keywords.get("keywords_fr"):
+            update_data["keywords_fr"] = keywords["keywords_fr"]
+        if keywords.get("keywords_ar"):
+            update_data["keywords_ar"] = keywords["keywords_ar"]
+        return update_data
 
-        # Insert lots
-        for lot in metadata.get("lots", []):
-            if lot.get("lot_number"):
-                await supabase.insert("tender_lots", {
-                    "tender_id": tender_id,
-                    "lot_number": int(lot["lot_number"]) if lot["lot_number"] else 0,
-                    "lot_subject": lot.get("lot_subject"),
-                    "lot_estimated_value": float(lot["lot_estimated_value"]) if lot.get("lot_estimated_value") else None,
-                    "caution_provisoire": float(lot["caution_provisoire"]) if lot.get("caution_provisoire") else None,
-                })
+    async def deep_analysis(self, tender_id: str) -> dict:
+        """Perform deep analysis on tender documents.
 
-        return metadata
+        Concurrent calls for the same tender share one analysis (and one
+        tender_analysis row).
+        """
+        return await deep_analysis_flights.do(
+            tender_id, lambda: self._deep_analysis(tender_id)
+        )
 
-    async def deep_analysis(self, tender_id: str) -> dict:
-        """Perform deep analysis on tender documents."""
+    async def _deep_analysis(self, tender_id: str) -> dict:
         if not self.client:
             raise Exception("DeepSeek API not configured")
 
@@ -175,26 +511,29 @@ class AIAnalyzer:
         if not docs:
             raise Exception("No documents found")
 
+        docs = await self._context_documents(docs)
+
         # Combine all text
         all_text = "\n\n---\n\n".join([
-            f"[{d['document_type']}]\n{d['extracted_text'][:5000]}"
+            f"[{d['document_type']}]\n{_excerpt(d['extracted_text'], 5000)}"
             for d in docs if d.get("extracted_text")
         ])
 
         # TODO: Add universal field extraction prompt
         # For now, return document summary
-        response = await self.client.chat.completions.create(
-            model=settings.DEEPSEEK_MODEL,
-            messages=[{
-                "role": "user",
-                "content": f"Analyze this tender and provide a structured summary:\n\n{all_text[:20000]}"
-            }],
-            temperature=0.2,
-        )
+        with timed(LLM_SECONDS, pipeline="deep_analysis", outcome="ok"):
+            response = await self.client.chat.completions.create(
+                model=settings.DEEPSEEK_MODEL,
+                messages=[{
+                    "role": "user",
+                    "content": f"Analyze this tender and provide a structured summary:\n\n{all_text[:20000]}"
+                }],
+                temperature=0.2,
+            )
 
         analysis = {
             "summary": response.choices[0].message.content,
-            "tokens_used": response.usage.total_tokens if response.usage else 0,
+            "tokens_used": record_llm_usage("deep_analysis", response.usage),
         }
 
         # Store analysis
@@ -210,8 +549,12 @@ class AIAnalyzer:
 
         return analysis
 
-    async def ask_question(self, tender_id: str, question: str) -> dict:
-        """Answer a question about a tender."""
+    async def ask_question(self, tender_id: str, question: str, conversation: bool = True) -> dict:
+        """Answer a question about a tender.
+
+        In a conversation the question follows the summary of the earlier
+        turns and the latest turns (services/chat_memory.py).
+        """
         if not self.client:
             raise Exception("DeepSeek API not configured")
 
@@ -220,27 +563,71 @@ class AIAnalyzer:
         if any(ord(c) > 1500 for c in question):  # Arabic characters
             language = "ar"
 
-        # Get all documents
-        docs = await supabase.select(
-            "tender_documents",
-            f"tender_id=eq.{tender_id}"
-        )
-
-        context = "\n\n".join([
-            f"=== {d['document_type']} ===\n{d['extracted_text'][:3000]}"
-            for d in docs if d.get("extracted_text")
-        ])
-
-        prompt = ASK_AI_PROMPT.format(context=context[:20000], question=question)
-
-        response = await self.client.chat.completions.create(
-            model=settings.DEEPSEEK_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
+        messages = [{
+            "role": "system",
+            "content": ASK_AI_PROMPT.format(context=await self._ask_context(tender_id)),
+        }]
+        if conversation:
+            memory, turns = await load_memory(tender_id)
+            messages += history_messages(memory, turns)
+        messages.append({"role": "user", "content": question})
+
+        with timed(LLM_SECONDS, pipeline="ask", outcome="ok"):
+            response = await self.client.chat.completions.create(
+                model=settings.DEEPSEEK_MODEL,
+                messages=messages,
+                temperature=0.3,
+            )
 
         return {
             "answer": response.choices[0].message.content,
             "language": language,
-            "tokens_used": response.usage.total_tokens if response.usage else 0,
+            "tokens_used": record_llm_usage("ask", response.usage),
         }
+
+    async def _ask_context(self, tender_id: str) -> str:
+        """The tender's document context block, built once per
+        ASK_CONTEXT_TTL_SECONDS."""
+        context = context_cache.get(tender_id)
+        if context is None:
+            docs = await supabase.select(
+                "tender_documents",
+                f"tender_id=eq.{tender_id}"
+            )
+            docs = await self._context_documents(docs)
+            context = "\n\n".join([
+                f"=== {d['document_type']} ===\n{_excerpt(d['extracted_text'], 3000)}"
+                for d in docs if d.get("extracted_text")
+            ])[:settings.ASK_CONTEXT_CHARS]
+            context_cache.put(tender_id, context)
+        return context
+
+    async def summarize_chat(self, tender_id: str):
+        """Fold a tender's older chat turns into its summary, when a batch
+        is due. Concurrent calls for the same tender share one run."""
+        await chat_summary_flights.do(tender_id, lambda: self._summarize_chat(tender_id))
+
+    async def _summarize_chat(self, tender_id: str):
+        memory, turns = await load_memory(tender_id)
+        folded = turns_to_fold(turns)
+        if not folded:
+            return
+
+        # Only the previous summary and the new turns: never the whole history
+        prompt = CHAT_SUMMARY_PROMPT.format(
+            max_chars=settings.CHAT_SUMMARY_MAX_CHARS,
+            summary=memory["summary"] or "(none)",
+            exchanges=format_turns(folded),
+        )
+        with timed(LLM_SECONDS, pipeline="chat_summary", outcome="ok"):
+            response = await self.client.chat.completions.create(
+                model=settings.DEEPSEEK_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+            )
+        record_llm_usage("chat_summary", response.usage)
+
+        summary = (response.choices[0].message.content or "").strip()
+        await save_summary(
+            tender_id, memory, summary[:settings.CHAT_SUMMARY_MAX_CHARS], len(folded)
+        )
@@ -0,0 +1,197 @@
+"""
+Rule-based AVIS field extraction.
+Fills the fixed-template fields of Moroccan AVIS documents with regexes
+before the LLM is called, so the LLM only sees what the rules missed.
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# Fields the rules can fill (top-level AVIS_SCHEMA keys)
+RULE_FIELDS = (
+    "reference_tender",
+    "tender_type",
+    "submission_deadline",
+    "total_estimated_value",
+    "lots",
+)
+
+FRENCH_MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
+    "juillet": 7, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11,
+    "decembre": 12,
+}
+
+_AMOUNT = r"(\d{1,3}(?:[ .,]?\d{3})*(?:[.,]\d{1,2})?)"
+_CURRENCY = r"\s*(?:dhs?|dirhams?|mad)\b"
+
+REFERENCE_PATTERN = re.compile(
+    r"(?:appel d'offres|\ba\.?o\.?|consultation)[^\n]{0,40}?"
+    r"\bn\s*[°o]?\s*[:.]?\s*([a-z0-9][a-z0-9/\-_.]*\d[a-z0-9/\-_.]*)",
+)
+TENDER_TYPE_PATTERNS = {
+    "AOOI": re.compile(r"\baooi\b|appel d'offres ouvert international"),
+    "AOON": re.compile(r"\baoon\b|appel d'offres ouvert national"),
+}
+DEADLINE_CONTEXT = re.compile(r"ouverture des plis|remise des plis|depot des plis|seance")
+NUMERIC_DATETIME = re.compile(
+    r"(\d{1,2})\s*[/.-]\s*(\d{1,2})\s*[/.-]\s*(\d{4})"
+    r"(?:\s*,?\s*(?:a|des)\s*(\d{1,2})\s*(?:h|heures?|:)\s*(\d{2})?)?"
+)
+WORDED_DATETIME = re.compile(
+    r"(\d{1,2})(?:er)?\s+(" + "|".join(FRENCH_MONTHS) + r")\s+(\d{4})"
+    r"(?:\s*,?\s*(?:a|des)\s*(\d{1,2})\s*(?:h|heures?|:)\s*(\d{2})?)?"
+)
+ESTIMATION_PATTERN = re.compile(
+    r"estimation[^\n]{0,200}?(?:fixee?|arretee?|etablie?|s'eleve)\s*(?:a|a la somme de)?"
+    r"\s*(?:la somme de)?\s*:?\s*" + _AMOUNT + _CURRENCY
+)
+CAUTION_PATTERN = re.compile(
+    r"(?:cautionnement|caution) provisoire[^\n]{0,120}?" + _AMOUNT + _CURRENCY
+)
+LOT_MARKER = re.compile(r"\blot\s*(?:n\s*[°o]?\s*)?[:.]?\s*(\d{1,3})\b")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and fold non-breaking spaces."""
+    text = text.replace("’", "'").replace("`", "'")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.lower()
+
+
+def parse_amount(raw: str) -> Optional[float]:
+    """Parse a French-formatted amount ("1 234 567,89", "1.234.567,89")."""
+    raw = raw.strip()
+    if "," in raw and "." in raw:
+        # The last separator is the decimal mark
+        if raw.rfind(",") > raw.rfind("."):
+            raw = raw.replace(".", "").replace(",", ".")
+        else:
+            raw = raw.replace(",", "")
+    elif "," in raw:
+        whole, _, frac = raw.rpartition(",")
+        raw = whole.replace(",", "") + ("." + frac if len(frac) <= 2 else frac)
+    elif raw.count(".") > 1 or re.search(r"\.\d{3}$", raw):
+        raw = raw.replace(".", "")
+    raw = raw.replace(" ", "")
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def _unique(values: list):
+    """Return the single distinct value, or None when absent or ambiguous."""
+    distinct = set(values)
+    return distinct.pop() if len(distinct) == 1 else None
+
+
+def _extract_reference(text: str) -> Optional[str]:
+    matches = [m.group(1).strip("._-/") for m in REFERENCE_PATTERN.finditer(text[:3000])]
+    reference = _unique(matches) if matches else None
+    return reference.upper() if reference else None
+
+
+def _extract_tender_type(text: str) -> Optional[str]:
+    found = [t for t, pattern in TENDER_TYPE_PATTERNS.items() if pattern.search(text)]
+    return found[0] if len(found) == 1 else None
+
+
+def _format_datetime(day, month, year, hour, minute) -> Optional[dict]:
+    day, month, year = int(day), int(month), int(year)
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return None
+    result = {"date": f"{day:02d}/{month:02d}/{year}", "time": ""}
+    if hour is not None and int(hour) < 24:
+        result["time"] = f"{int(hour):02d}:{int(minute or 0):02d}"
+    return result
+
+
+def _extract_deadline(text: str) -> Optional[dict]:
+    """Read the date closest to each "ouverture des plis" style mention.
+
+    The usual template puts the date before the mention ("Le 15 mars 2024
+    a 10 heures, il sera procede ... a l'ouverture des plis"), others after.
+    """
+    candidates = []
+    for context in DEADLINE_CONTEXT.finditer(text):
+        start = max(0, context.start() - 250)
+        window = text[start:context.end() + 250]
+        anchor = context.start() - start
+        matches = []
+        for match in NUMERIC_DATETIME.finditer(window):
+            matches.append((match, _format_datetime(*match.groups())))
+        for match in WORDED_DATETIME.finditer(window):
+            day, month, year, hour, minute = match.groups()
+            matches.append(
+                (match, _format_datetime(day, FRENCH_MONTHS[month], year, hour, minute))
+            )
+        if matches:
+            _, closest = min(matches, key=lambda m: abs(m[0].start() - anchor))
+            candidates.append(closest)
+    candidates = [c for c in candidates if c]
+    # Only trust a deadline when every mention agrees on the date
+    if not candidates or len({c["date"] for c in candidates}) != 1:
+        return None
+    return next((c for c in candidates if c["time"]), candidates[0])
+
+
+def _extract_estimation(text: str) -> Optional[float]:
+    values = [parse_amount(m.group(1)) for m in ESTIMATION_PATTERN.finditer(text)]
+    return _unique([v for v in values if v])
+
+
+def _extract_lots(text: str) -> Optional[list]:
+    """Split the text on "Lot n° X" markers and read the caution per lot."""
+    markers = list(LOT_MARKER.finditer(text))
+    if not markers:
+        caution = _unique(
+            [parse_amount(m.group(1)) for m in CAUTION_PATTERN.finditer(text)]
+        )
+        if not caution:
+            return None
+        return [{"lot_number": 1, "caution_provisoire": caution}]
+
+    lots = {}
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        segment = text[marker.start():end]
+        number = int(marker.group(1))
+        lot = lots.setdefault(number, {"lot_number": number})
+        caution = CAUTION_PATTERN.search(segment)
+        if caution and "caution_provisoire" not in lot:
+            lot["caution_provisoire"] = parse_amount(caution.group(1))
+        estimation = ESTIMATION_PATTERN.search(segment)
+        if estimation and "lot_estimated_value" not in lot:
+            lot["lot_estimated_value"] = parse_amount(estimation.group(1))
+
+    # Lot numbers must be contiguous from 1 and each lot must carry a caution,
+    # otherwise the markers were probably cross-references, not a lot table
+    numbers = sorted(lots)
+    if numbers != list(range(1, len(numbers) + 1)):
+        return None
+    if not all(lot.get("caution_provisoire") for lot in lots.values()):
+        return None
+    return [lots[n] for n in numbers]
+
+
+def extract_avis_fields(text: str) -> dict:
+    """Extract the fixed-template AVIS fields that can be read reliably.
+
+    Returns only the fields found, shaped like AVIS_SCHEMA.
+    """
+    text = normalize(text)
+    extractors = {
+        "reference_tender": _extract_reference,
+        "tender_type": _extract_tender_type,
+        "submission_deadline": _extract_deadline,
+        "total_estimated_value": _extract_estimation,
+        "lots": _extract_lots,
+    }
+    fields = {}
+    for field, extractor in extractors.items():
+        value = extractor(text)
+        if value:
+            fields[field] = value
+    return fields
@@ -0,0 +1,215 @@
+"""
+Content-addressed store for original DCE archives.
+Blobs are keyed by the SHA-256 of the original bytes, so the same
+archive is kept once. They are zlib-compressed unless that does not
+make them smaller; zip archives (most DCEs) are not even tried.
+Optional (BLOB_STORE): without it the scraper keeps nothing after
+extraction.
+
+- local: a directory capped at BLOB_STORE_MAX_GB, least recently used
+  blobs evicted first
+- s3: any S3-compatible service (AWS, MinIO, R2...); needs boto3
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import zlib
+from typing import Optional
+
+from config import settings
+
+COMPRESSION_LEVEL = 6
+# Stored as is: compressed formats (zip, rar, 7z, gzip)
+COMPRESSED_MAGIC = (b"PK\x03\x04", b"Rar!", b"7z\xbc\xaf", b"\x1f\x8b")
+# Marks an uncompressed blob; a zlib stream never starts with a zero byte
+RAW_PREFIX = b"\x00raw"
+# Eviction frees space down to this fraction of the cap
+EVICT_TO = 0.9
+
+
+def _encode(data: bytes) -> bytes:
+    """The data compressed, or marked as raw when that is not smaller."""
+    if not data.startswith(COMPRESSED_MAGIC):
+        blob = zlib.compress(data, COMPRESSION_LEVEL)
+        if len(blob) < len(data) + len(RAW_PREFIX):
+            return blob
+    return RAW_PREFIX + data
+
+
+class BlobStore:
+    """Blobs addressed by the SHA-256 of their content."""
+
+    name = ""
+
+    async def put(self, data: bytes) -> str:
+        """Store data (once) and return its key."""
+        key = hashlib.sha256(data).hexdigest()
+        if not await asyncio.to_thread(self._exists, key):
+            blob = await asyncio.to_thread(_encode, data)
+            await asyncio.to_thread(self._write, key, blob)
+        return key
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Original bytes, or None if the blob is missing (e.g. evicted)."""
+        blob = await asyncio.to_thread(self._read, key)
+        if blob is None:
+            return None
+        if blob.startswith(RAW_PREFIX):
+            return blob[len(RAW_PREFIX):]
+        return await asyncio.to_thread(zlib.decompress, blob)
+
+    def _path(self, key: str) -> str:
+        return f"{key[:2]}/{key}.z"
+
+    def _exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _write(self, key: str, blob: bytes):
+        raise NotImplementedError
+
+    def _read(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or settings.BLOB_STORE_PATH
+        self.max_bytes = max_bytes or int(settings.BLOB_STORE_MAX_GB * 1024 ** 3)
+        self._total: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _full_path(self, key: str) -> str:
+        return os.path.join(self.root, self._path(key))
+
+    def _exists(self, key: str) -> bool:
+        path = self._full_path(key)
+        if not os.path.exists(path):
+            return False
+        os.utime(path)  # Stored again: recently used
+        return True
+
+    def _write(self, key: str, blob: bytes):
+        path = self._full_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        with self._lock:
+            # Another put of the same content may have stored it meanwhile
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+            if self._total is None:
+                self._total = self._scan_size()
+            else:
+                self._total += len(blob) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._full_path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return blob
+
+    def _blobs(self) -> list:
+        """(mtime, size, path) of every blob."""
+        blobs = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".z"):
+                    path = os.path.join(directory, name)
+                    stat = os.stat(path)
+                    blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._blobs())
+
+    def _evict(self):
+        """Delete least recently used blobs down to EVICT_TO of the cap."""
+        target = int(self.max_bytes * EVICT_TO)
+        evicted = 0
+        for _, size, path in sorted(self._blobs()):
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._total -= size
+            evicted += 1
+        print(f"Blob store: evicted {evicted} blobs, {self._total / 1024 ** 2:.0f} MB kept")
+
+
+class S3BlobStore(BlobStore):
+    name = "s3"
+
+    def __init__(self):
+        import boto3
+
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET is not set")
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_PREFIX
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            region_name=settings.S3_REGION,
+        )
+        self._missing = self._client.exceptions.NoSuchKey
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{self._path(key)}"
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _write(self, key: str, blob: bytes):
+        self._client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=blob)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._missing:
+            return None
+        return response["Body"].read()
+
+
+BLOB_STORES = {store.name: store for store in (LocalBlobStore, S3BlobStore)}
+
+_instance: Optional[BlobStore] = None
+_configured = False
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """The BLOB_STORE store, or None when disabled or unavailable."""
+    global _instance, _configured
+    if not _configured:
+        _configured = True
+        name = settings.BLOB_STORE
+        if name:
+            try:
+                _instance = BLOB_STORES[name]()
+            except (KeyError, ImportError, ValueError) as e:
+                print(f"Warning: blob store {name!r} unavailable ({e}), archives not kept")
+    return _instance
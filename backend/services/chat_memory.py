@@ -0,0 +1,128 @@
+"""
+Conversation memory for Ask AI.
+A question is sent after the tender's document context block (built once
+and cached per tender, so the prompt prefix stays identical and hits the
+provider's context cache), a rolling summary of the earlier conversation
+and the latest turns verbatim. Turns older than CHAT_RECENT_TURNS are
+folded into the summary CHAT_SUMMARY_BATCH at a time, from the previous
+summary and those turns only, so prompts stay the same size however long
+a conversation grows.
+
+tender_chat_memory keeps, per tender, the summary and how many turns
+(in tender_chats order) it covers. Standalone questions (conversation
+false) are kept in tender_chats but are not turns of the conversation.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import httpx
+
+from config import settings
+from database import supabase
+
+CONTEXT_CACHE_SIZE = 128  # Tenders
+TURN_MAX_CHARS = 2000  # Of an answer, when quoted back to the model
+
+
+class ContextCache:
+    """Document context blocks per tender, least recently used evicted
+    first. Code rewriting a tender's documents invalidates its entry;
+    entries also expire after ASK_CONTEXT_TTL_SECONDS, for rewrites by
+    other processes (scraper workers, services.reprocess)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.blocks: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, tender_id: str) -> Optional[str]:
+        entry = self.blocks.get(tender_id)
+        if entry is None:
+            return None
+        built_at, block = entry
+        if time.monotonic() - built_at > settings.ASK_CONTEXT_TTL_SECONDS:
+            del self.blocks[tender_id]
+            return None
+        self.blocks.move_to_end(tender_id)
+        return block
+
+    def put(self, tender_id: str, block: str):
+        self.blocks[tender_id] = (time.monotonic(), block)
+        self.blocks.move_to_end(tender_id)
+        while len(self.blocks) > self.size:
+            self.blocks.popitem(last=False)
+
+    def invalidate(self, tender_id: str):
+        self.blocks.pop(tender_id, None)
+
+
+context_cache = ContextCache(CONTEXT_CACHE_SIZE)
+
+
+async def load_memory(tender_id: str) -> Tuple[dict, List[dict]]:
+    """The tender's summary row (a blank one if none) and the conversation
+    turns it does not cover yet, oldest first."""
+    rows = await supabase.select("tender_chat_memory", f"tender_id=eq.{tender_id}")
+    memory = rows[0] if rows else {"summary": "", "summarized_turns": 0}
+    turns = await supabase.select(
+        "tender_chats",
+        f"select=user_message,ai_response&tender_id=eq.{tender_id}&conversation=is.true"
+        f"&order=created_at.asc,id.asc&offset={memory['summarized_turns']}",
+    )
+    return memory, turns
+
+
+def history_messages(memory: dict, turns: List[dict]) -> List[dict]:
+    """Chat messages for the summary and the turns not summarized yet."""
+    messages = []
+    if memory["summary"]:
+        messages.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{memory['summary']}",
+        })
+    # Normally all of them; fewer if summarizing has fallen behind
+    for turn in turns[-(settings.CHAT_RECENT_TURNS + settings.CHAT_SUMMARY_BATCH):]:
+        messages.append({"role": "user", "content": turn["user_message"]})
+        if turn.get("ai_response"):
+            messages.append({
+                "role": "assistant", "content": turn["ai_response"][:TURN_MAX_CHARS],
+            })
+    return messages
+
+
+def turns_to_fold(turns: List[dict]) -> List[dict]:
+    """The oldest turns to fold into the summary, once a batch is due."""
+    due = len(turns) - settings.CHAT_RECENT_TURNS
+    return turns[:due] if due >= settings.CHAT_SUMMARY_BATCH else []
+
+
+def format_turns(turns: List[dict]) -> str:
+    return "\n\n".join(
+        f"User: {turn['user_message']}\n"
+        f"Assistant: {(turn.get('ai_response') or '')[:TURN_MAX_CHARS]}"
+        for turn in turns
+    )
+
+
+async def save_summary(tender_id: str, memory: dict, summary: str, folded: int) -> bool:
+    """Store a summary covering `folded` more turns, unless another worker
+    stored one from the same starting point first."""
+    data = {
+        "summary": summary,
+        "summarized_turns": memory["summarized_turns"] + folded,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if "tender_id" in memory:
+        rows = await supabase.update(
+            "tender_chat_memory",
+            f"tender_id=eq.{tender_id}&summarized_turns=eq.{memory['summarized_turns']}",
+            data,
+        )
+        return bool(rows)
+    try:
+        await supabase.insert("tender_chat_memory", {"tender_id": tender_id, **data})
+    except httpx.HTTPStatusError:
+        # Created meanwhile by another worker
+        return False
+    return True
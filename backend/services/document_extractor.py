@@ -1,73 +1,681 @@
 """
 Document Extractor Service.
-Extracts text from PDF, DOCX, XLSX files.
+Extracts text from PDF, DOCX, XLSX files and legacy DOC, XLS, RTF, ODT.
 Memory-only - no disk writes.
 """
+import asyncio
+import importlib
 import io
+import multiprocessing
+import os
+import re
+import signal
+import unicodedata
 import zipfile
-from typing import Optional, Tuple
-
-from pypdf import PdfReader
-from docx import Document as DocxDocument
-from openpyxl import load_workbook
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from config import settings
 from database import supabase
+from services.chat_memory import context_cache
+from services.fingerprints import (
+    MAX_DISTANCE,
+    bands,
+    distance,
+    from_signed,
+    simhash,
+    to_signed,
+)
+from services.pdf_backends import get_pdf_backend
+from services.metrics import EXTRACTION_SECONDS, file_format, timed
+from services.legacy_formats import (
+    extract_doc_text,
+    extract_odt_text,
+    extract_rtf_text,
+    sniff_format,
+)
+from services.prompt_preparation import PAGE_BREAK
 
-# Document classification keywords
+# Document classification keywords with weights.
+# Keywords are written accent-free and lowercase (see _normalize_text).
 CLASSIFICATION_KEYWORDS = {
-    "AVIS": ["avis de consultation", "aoon", "aooi", "avis d'appel"],
-    "RC": ["règlement de consultation", "reglement de consultation", "r.c."],
-    "CPS": ["cahier des prescriptions spéciales", "c.p.s.", "cahier des charges"],
-    "ANNEXE": ["annexe", "additif", "avenant"],
+    "AVIS": {
+        "avis de consultation": 6,
+        "avis d'appel d'offres": 6,
+        "avis d'appel": 4,
+        "appel d'offres ouvert": 3,
+        "aoon": 3,
+        "aooi": 3,
+        "caution provisoire": 1,
+    },
+    "RC": {
+        "reglement de consultation": 6,
+        "reglement de la consultation": 6,
+        "r.c.": 2,
+        "dossier d'appel d'offres": 1,
+        "pieces a produire": 1,
+    },
+    "CPS": {
+        "cahier des prescriptions speciales": 6,
+        "c.p.s.": 3,
+        "cahier des charges": 4,
+        "bordereau des prix": 2,
+        "detail estimatif": 2,
+    },
+    "ANNEXE": {
+        "annexe": 1,
+        "additif": 3,
+        "avenant": 3,
+        "modele de declaration": 2,
+        "acte d'engagement": 2,
+        "declaration sur l'honneur": 2,
+    },
+}
+
+# Filename tokens are a strong signal: DCE archives are usually named
+# by the buyer (e.g. "AVIS_AO_12-2024.pdf", "RC.docx", "CPS lot 1.pdf").
+FILENAME_KEYWORDS = {
+    "AVIS": {"avis": 8, "aoon": 6, "aooi": 6},
+    "RC": {"rc": 8, "reglement": 8},
+    "CPS": {"cps": 8, "cahier": 6, "bpu": 4, "bordereau": 4},
+    "ANNEXE": {"annexe": 8, "annexes": 8, "additif": 8, "avenant": 8, "modele": 4},
 }
 
+# Classification scans the first pages, not only the first lines
+CLASSIFICATION_WINDOW = 6000
+# Keyword hits in the title area count double
+CLASSIFICATION_TITLE_WINDOW = 500
+# Below this score the document is filed as OTHER
+CLASSIFICATION_MIN_SCORE = 2
+
+
+def _normalize_text(text: str) -> str:
+    """Lowercase, strip accents and unify apostrophes/whitespace.
+
+    Non-latin characters are dropped: classification keywords are ASCII.
+    """
+    text = text.replace("\u2019", "'").replace("`", "'")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text.lower())
+
+
+def _compile_keywords(keywords: Dict[str, Dict[str, int]], word_boundaries: bool):
+    """Compile all keywords into a single alternation regex.
+
+    Returns the pattern and a map of group name -> (doc_type, weight).
+    """
+    groups = {}
+    alternatives = []
+    # Longest keywords first so "avis d'appel d'offres" wins over "avis d'appel"
+    entries = sorted(
+        ((doc_type, kw, w) for doc_type, kws in keywords.items() for kw, w in kws.items()),
+        key=lambda e: -len(e[1]),
+    )
+    for i, (doc_type, keyword, weight) in enumerate(entries):
+        name = f"k{i}"
+        groups[name] = (doc_type, weight)
+        body = re.escape(keyword)
+        if word_boundaries:
+            body = rf"(?<![a-z0-9]){body}(?![a-z0-9])"
+        alternatives.append(f"(?P<{name}>{body})")
+    return re.compile("|".join(alternatives)), groups
+
+
+_CONTENT_PATTERN, _CONTENT_GROUPS = _compile_keywords(CLASSIFICATION_KEYWORDS, False)
+_FILENAME_PATTERN, _FILENAME_GROUPS = _compile_keywords(FILENAME_KEYWORDS, True)
+
+# Price schedule (BPU / bordereau des prix) header cells -> structured column.
+# Labels are whole words of the normalized header text, first column wins.
+PRICE_HEADER_COLUMNS = (
+    ("unit_price", ("prix unitaire", "p.u", "p.u.", "pu")),
+    ("total_price", ("prix total", "montant", "total")),
+    ("quantity", ("quantite", "quantites", "qte", "qte.")),
+    ("unit", ("unite", "u", "u.m", "um")),
+    ("designation", ("designation", "libelle", "description", "nature des prestations")),
+    ("item_number", ("n", "no", "numero", "article", "item", "prix n")),
+)
+_PRICE_HEADER_PATTERNS = tuple(
+    (column, re.compile(
+        "|".join(rf"(?<![a-z0-9]){re.escape(label)}(?![a-z0-9])" for label in labels)
+    ))
+    for column, labels in PRICE_HEADER_COLUMNS
+)
+# A row is a header when this many cells name a price schedule column
+PRICE_HEADER_MIN_COLUMNS = 3
+# Rows per insert request when storing price schedules
+PRICE_ROWS_BATCH_SIZE = 500
+
+
+def _cell_text(value) -> str:
+    """Compact text for a spreadsheet cell (TSV-safe)."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, datetime) and value.time() == datetime.min.time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return " ".join(str(value).split())
+
+
+def _header_columns(cells: List[str]) -> Dict[int, str]:
+    """Map cell index -> price schedule column for a candidate header row."""
+    columns = {}
+    for index, cell in enumerate(cells):
+        key = _normalize_text(cell).strip()
+        if not key or len(key) > 60:
+            continue
+        for column, pattern in _PRICE_HEADER_PATTERNS:
+            if column not in columns.values() and pattern.search(key):
+                columns[index] = column
+                break
+    return columns
+
+
+def _xls_rows(book, sheet) -> Iterable[tuple]:
+    """Yield xlrd sheet rows as Python values (dates as datetime)."""
+    import xlrd
+
+    for row_index in range(sheet.nrows):
+        values = []
+        for cell in sheet.row(row_index):
+            if cell.ctype == xlrd.XL_CELL_DATE:
+                try:
+                    values.append(xlrd.xldate.xldate_as_datetime(cell.value, book.datemode))
+                    continue
+                except (ValueError, OverflowError):
+                    pass
+            elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                values.append(None)
+                continue
+            values.append(cell.value)
+        yield tuple(values)
+
+
+def _to_number(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.replace(" ", "").replace("\u00a0", "").replace(",", ".")
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+# Two-phase mode: these types are extracted fully right away, others
+# are classified from a preview and completed in the background
+EAGER_DOCUMENT_TYPES = {"AVIS", "RC", "CPS"}
+# extraction_method suffix of documents that only hold their preview text
+PREVIEW_SUFFIX = "_preview"
+
+# Only template-like documents are stored once and referenced; AVIS, RC
+# and CPS carry tender-specific details even when they look alike
+DEDUP_DOCUMENT_TYPES = {"ANNEXE", "OTHER"}
+
+# Extraction runs in worker processes so CPU-bound parsing never blocks
+# the event loop (EXTRACTION_WORKERS=0 falls back to a thread). PDF page
+# ranges get a pool of their own: a PDF that hangs past its deadline has
+# its workers killed, which must not fail the other formats' work.
+_worker_extractor = None
+
+
+def _init_worker(pids, backend: str):
+    """Worker initializer: tell the API process this worker's pid, then
+    load the parsers so no task pays for them."""
+    pids.put(os.getpid())
+    try:
+        load_parsers(backend)
+    except ImportError as e:
+        # Raising would break the pool; the file types needing it fail alone
+        print(f"Warning: extraction worker could not load a parser ({e})")
+
+
+class WorkerPool:
+    """A process pool whose workers can be killed when one hangs.
+
+    ProcessPoolExecutor cannot stop a running task; the workers report
+    their pids at startup so they can be terminated. Workers start on
+    demand, each loading the parsers first.
+    """
+
+    def __init__(self, workers: int):
+        self.pids_queue = multiprocessing.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.pids_queue, settings.PDF_BACKEND),
+        )
+
+    def shutdown(self, kill: bool = False):
+        if kill:
+            while not self.pids_queue.empty():
+                try:
+                    os.kill(self.pids_queue.get(), signal.SIGTERM)
+                except OSError:
+                    pass  # Already gone
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: Dict[str, WorkerPool] = {}  # "default" | "pdf"
+
+
+def _get_pool(kind: str) -> Optional[WorkerPool]:
+    if settings.EXTRACTION_WORKERS <= 0:
+        return None
+    if kind not in _pools:
+        _pools[kind] = WorkerPool(settings.EXTRACTION_WORKERS)
+    return _pools[kind]
+
+
+def _replace_pool(kind: str, pool: WorkerPool, kill: bool = False):
+    """Shut a broken or hung pool down; the next task starts a new one.
+
+    Concurrent callers see the same failure: only the first one to
+    report it replaces the pool, later ones find a newer pool in place.
+    """
+    if _pools.get(kind) is pool:
+        del _pools[kind]
+        pool.shutdown(kill)
+
+
+def shutdown_extraction_pool(kill: bool = False):
+    """Stop the extraction worker processes (called on API shutdown).
+
+    With kill=True running workers are terminated; new pools are started
+    on the next extraction.
+    """
+    for kind, pool in list(_pools.items()):
+        _replace_pool(kind, pool, kill)
+
+
+# Imported on first use, so the API starts without them
+PARSER_MODULES = ("docx", "openpyxl", "xlrd")
+
+
+def load_parsers(backend: str):
+    """Import the document parsers and the PDF backend."""
+    for module in PARSER_MODULES:
+        importlib.import_module(module)
+    get_pdf_backend(backend)
+
+
+async def warm_up_extraction():
+    """Start the extraction workers, which load the parsers as they start
+    (or load them in this process when extraction runs in a thread)."""
+    if settings.EXTRACTION_WORKERS <= 0:
+        await asyncio.to_thread(load_parsers, settings.PDF_BACKEND)
+        return
+    loop = asyncio.get_running_loop()
+    # Submitted together, before any worker is idle: one worker each
+    await asyncio.gather(*(
+        loop.run_in_executor(_get_pool(kind).executor, os.getpid)
+        for kind in ("default", "pdf")
+        for _ in range(settings.EXTRACTION_WORKERS)
+    ))
+
+
+def extract_file(filename: str, data: bytes, collect_prices: bool) -> tuple:
+    """Worker entry point: extract one file from raw bytes.
+
+    Returns (content, method, pages, price_rows or None).
+    """
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = DocumentExtractor()
+    price_rows = [] if collect_prices else None
+    content, method, pages = _worker_extractor._extract_single(
+        filename, io.BytesIO(data), price_rows
+    )
+    return content, method, pages, price_rows
+
+
+def pdf_page_count(data: bytes, backend: str) -> Tuple[int, str]:
+    """Worker entry point: number of pages of a PDF, and the name of the
+    backend used (pypdf when the configured one is unavailable)."""
+    pdf_backend = get_pdf_backend(backend)
+    return pdf_backend.page_count(data), pdf_backend.name
+
+
+def extract_pdf_pages(data: bytes, start: int, end: int, backend: str) -> List[str]:
+    """Worker entry point: text of PDF pages [start, end)."""
+    return get_pdf_backend(backend).extract_pages(data, start, end)
+
+
+class DeferredExtractions:
+    """Full extractions postponed by two-phase mode.
+
+    Original bytes stay in memory (no disk writes) until a background task
+    extracts them, or until extract_now() is called because Ask AI or
+    deep analysis needs the document first.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, Tuple["DocumentExtractor", str, str, bytes]] = {}
+        self.running: Dict[str, asyncio.Future] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+
+    def add(
+        self,
+        extractor: "DocumentExtractor",
+        document_id: str,
+        doc_type: str,
+        filename: str,
+        data: bytes,
+    ):
+        self.pending[document_id] = (extractor, doc_type, filename, data)
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        self.queue.put_nowait(document_id)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._work())
+
+    def full(self) -> bool:
+        """Whether DEFERRED_EXTRACTION_MAX documents (and their bytes) are
+        already waiting."""
+        return len(self.pending) >= settings.DEFERRED_EXTRACTION_MAX
+
+    async def stop(self):
+        """Cancel the background worker; pending documents keep their preview."""
+        if self.worker and not self.worker.done():
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            document_id = await self.queue.get()
+            try:
+                await self.extract_now(document_id)
+            except Exception as e:
+                print(f"Deferred extraction error for document {document_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def extract_now(self, document_id: str) -> Optional[str]:
+        """Fully extract a deferred document and store its text.
+
+        Returns the text, or None if the document is not pending (already
+        done, or its bytes were lost with a restart).
+        """
+        if document_id in self.running:
+            return await asyncio.shield(self.running[document_id])
+        if document_id not in self.pending:
+            return None
+
+        extractor, doc_type, filename, data = self.pending.pop(document_id)
+        future = asyncio.get_running_loop().create_future()
+        self.running[document_id] = future
+        try:
+            with timed(EXTRACTION_SECONDS, format="pdf", method="error") as labels:
+                content, method, pages = await extractor._extract_pdf_in_workers(
+                    filename, io.BytesIO(data)
+                )
+                labels["method"] = method
+            if supabase and method not in ("error", "timeout"):
+                rows = await supabase.update("tender_documents", f"id=eq.{document_id}", {
+                    "extracted_text": content[:50000] if content else None,
+                    "extraction_method": method,
+                    "page_count": pages,
+                    **await extractor._fingerprint_fields(doc_type, content),
+                })
+                for row in rows:
+                    context_cache.invalidate(row["tender_id"])
+            future.set_result(content)
+        except BaseException:
+            # Waiters fall back to the preview text (also on cancellation)
+            future.set_result(None)
+            raise
+        finally:
+            del self.running[document_id]
+        return content
+
+
+deferred_extractions = DeferredExtractions()
+
 
 class DocumentExtractor:
     """Extract text from various document formats."""
 
     def __init__(self):
         self.ocr_engine = None  # Lazy load PaddleOCR
+        self.two_phase = settings.TWO_PHASE_EXTRACTION
 
     async def extract_and_store(
         self, tender_id: str, filename: str, file_bytes: io.BytesIO
-    ):
-        """Extract documents from a tender package and store them."""
+    ) -> int:
+        """Extract documents from a tender package and store them.
+
+        Returns the number of documents stored.
+        """
         file_bytes.seek(0)
 
         # Check if it's a ZIP file
         if filename.lower().endswith(".zip"):
-            await self._process_zip(tender_id, file_bytes)
-        else:
-            # Single file
-            content, method, pages = self._extract_single(filename, file_bytes)
-            doc_type = self._classify_document(content)
-            await self._store_document(
-                tender_id, filename, doc_type, content, method, pages
-            )
+            return await self._process_zip(tender_id, file_bytes)
+        # Single file
+        return int(await self._process_file(tender_id, filename, file_bytes))
+
+    async def _process_zip(self, tender_id: str, file_bytes: io.BytesIO) -> int:
+        """Process a ZIP file containing multiple documents.
 
-    async def _process_zip(self, tender_id: str, file_bytes: io.BytesIO):
-        """Process a ZIP file containing multiple documents."""
+        Entries are extracted concurrently in the worker pool.
+        """
         try:
             with zipfile.ZipFile(file_bytes) as zf:
+                entries = []
                 for name in zf.namelist():
                     if name.startswith("__MACOSX") or name.endswith("/"):
                         continue
 
                     with zf.open(name) as f:
-                        inner_bytes = io.BytesIO(f.read())
-                        content, method, pages = self._extract_single(name, inner_bytes)
-                        doc_type = self._classify_document(content)
-                        await self._store_document(
-                            tender_id, name, doc_type, content, method, pages
-                        )
+                        entries.append((name, io.BytesIO(f.read())))
         except zipfile.BadZipFile:
             print(f"Warning: Not a valid ZIP file for tender {tender_id}")
+            return 0
 
-    def _extract_single(
+        stored = await asyncio.gather(*[
+            self._process_file(tender_id, name, inner_bytes)
+            for name, inner_bytes in entries
+        ])
+        return sum(stored)
+
+    async def _process_file(
+        self, tender_id: str, filename: str, file_bytes: io.BytesIO
+    ) -> bool:
+        """Extract, classify and store one document; True once stored.
+
+        In two-phase mode a PDF is first classified from its opening
+        pages; full extraction of ANNEXE/OTHER documents is deferred.
+        """
+        if self.two_phase and filename.lower().endswith(".pdf"):
+            with timed(EXTRACTION_SECONDS, format="pdf", method="timeout") as labels:
+                try:
+                    preview = await self._extract_pdf_preview(filename, file_bytes)
+                except asyncio.TimeoutError:
+                    # A full extraction would hang the same way
+                    document = await self._store_document(
+                        tender_id, filename, self._classify_document("", filename),
+                        "", "timeout", 0,
+                    )
+                    return document is not None
+                backend = preview[2] if preview else settings.PDF_BACKEND
+                labels["method"] = method = f"{backend}{PREVIEW_SUFFIX}"
+            if preview:
+                content, pages, _ = preview
+                doc_type = self._classify_document(content, filename)
+                # With too many documents waiting, extract this one now
+                if doc_type not in EAGER_DOCUMENT_TYPES and not deferred_extractions.full():
+                    document = await self._store_document(
+                        tender_id, filename, doc_type, content, method, pages
+                    )
+                    if document:
+                        deferred_extractions.add(
+                            self, document["id"], doc_type, filename, file_bytes.getvalue()
+                        )
+                    return document is not None
+
+        with timed(
+            EXTRACTION_SECONDS, format=file_format(filename), method="error"
+        ) as labels:
+            content, method, pages, price_rows = await self._extract_in_worker(
+                filename, file_bytes
+            )
+            labels["method"] = method
+        doc_type = self._classify_document(content, filename)
+        document = await self._store_document(
+            tender_id, filename, doc_type, content, method, pages
+        )
+        if price_rows and document:
+            await self._store_price_rows(tender_id, document["id"], price_rows)
+        return document is not None
+
+    async def _extract_pdf_preview(
         self, filename: str, file_bytes: io.BytesIO
+    ) -> Optional[Tuple[str, int, str]]:
+        """Text of the first CLASSIFY_PREVIEW_PAGES pages, the page count
+        and the PDF backend used.
+
+        Returns None when the preview already is the whole document or has
+        no text layer, so the caller extracts it fully right away. Raises
+        asyncio.TimeoutError past PDF_TIMEOUT_SECONDS, once the workers
+        stuck on it are stopped.
+        """
+        data = file_bytes.getvalue()
+
+        async def preview() -> Optional[Tuple[List[str], int, str]]:
+            page_count, backend = await self._run_in_pool(
+                pdf_page_count, data, settings.PDF_BACKEND, kind="pdf"
+            )
+            if page_count <= settings.CLASSIFY_PREVIEW_PAGES:
+                return None
+            texts = await self._run_in_pool(
+                extract_pdf_pages, data, 0, settings.CLASSIFY_PREVIEW_PAGES, backend,
+                kind="pdf",
+            )
+            return texts, page_count, backend
+
+        try:
+            # Opening a malformed PDF can hang too: one deadline for both
+            result = await asyncio.wait_for(preview(), timeout=settings.PDF_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"PDF preview timeout for {filename}")
+            self._kill_pdf_workers()
+            raise
+        except Exception as e:
+            print(f"PDF preview error for {filename}: {e}")
+            return None
+        if result is None:
+            return None
+
+        texts, page_count, backend = result
+        text = PAGE_BREAK.join(texts)
+        if len(text.strip()) < 100:
+            return None
+        return text, page_count, backend
+
+    async def _extract_in_worker(self, filename: str, file_bytes: io.BytesIO) -> tuple:
+        """Run extract_file in the extraction pool.
+
+        PDFs are split into page ranges extracted in parallel.
+        """
+        if filename.lower().endswith(".pdf"):
+            content, method, pages = await self._extract_pdf_in_workers(
+                filename, file_bytes
+            )
+            return content, method, pages, None
+
+        try:
+            return await self._run_in_pool(
+                extract_file,
+                filename,
+                file_bytes.getvalue(),
+                settings.STORE_PRICE_SCHEDULES,
+            )
+        except BrokenProcessPool:
+            print(f"Extraction worker crashed on {filename}")
+            return ("", "error", 0, None)
+
+    async def _run_in_pool(self, func, *args, kind: str = "default"):
+        """Run func in an extraction pool, retrying once on a fresh pool.
+
+        A pool breaks when a worker dies (out of memory, or killed after
+        a PDF timeout while other tasks were running).
+        """
+        loop = asyncio.get_running_loop()
+        pool = _get_pool(kind)
+        try:
+            return await loop.run_in_executor(pool and pool.executor, func, *args)
+        except BrokenProcessPool:
+            _replace_pool(kind, pool)
+            pool = _get_pool(kind)
+            return await loop.run_in_executor(pool.executor, func, *args)
+
+    async def _extract_pdf_in_workers(
+        self, filename: str, file_bytes: io.BytesIO
+    ) -> Tuple[str, str, int]:
+        """Extract a PDF by page ranges in the pool, within PDF_TIMEOUT_SECONDS.
+
+        Only the first PDF_MAX_PAGES pages are extracted.
+        """
+        data = file_bytes.getvalue()
+        backend = settings.PDF_BACKEND
+
+        async def extract() -> Tuple[List[str], int, str]:
+            page_count, used = await self._run_in_pool(
+                pdf_page_count, data, backend, kind="pdf"
+            )
+            last = min(page_count, settings.PDF_MAX_PAGES)
+            step = max(1, settings.PDF_PAGES_PER_TASK)
+            chunks = await asyncio.gather(*[
+                self._run_in_pool(
+                    extract_pdf_pages, data, start, min(start + step, last), used, kind="pdf"
+                )
+                for start in range(0, last, step)
+            ])
+            return [text for chunk in chunks for text in chunk], page_count, used
+
+        try:
+            texts, page_count, used = await asyncio.wait_for(
+                extract(), timeout=settings.PDF_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            print(f"PDF extraction timeout for {filename}")
+            self._kill_pdf_workers()
+            return ("", "timeout", 0)
+        except Exception as e:
+            print(f"PDF extraction error for {filename}: {e}")
+            return ("", "error", 0)
+
+        return self._pdf_result(texts, page_count, file_bytes, used)
+
+    @staticmethod
+    def _kill_pdf_workers():
+        """Stop the PDF workers still busy with a timed-out PDF.
+
+        Killing a worker breaks its whole pool: PDF tasks of other
+        documents fail with BrokenProcessPool and are retried once on a
+        new pool; other formats are not affected.
+        """
+        pool = _pools.get("pdf")
+        if pool is not None:
+            _replace_pool("pdf", pool, kill=True)
+
+    def _extract_single(
+        self,
+        filename: str,
+        file_bytes: io.BytesIO,
+        price_rows: Optional[list] = None,
     ) -> Tuple[str, str, int]:
-        """Extract text from a single file."""
+        """Extract text from a single file.
+
+        If price_rows is a list, price schedule rows found in spreadsheets
+        are appended to it.
+        """
         filename_lower = filename.lower()
         file_bytes.seek(0)
 
@@ -76,14 +684,24 @@ class DocumentExtractor:
                 return self._extract_pdf(file_bytes)
             elif filename_lower.endswith(".docx"):
                 return self._extract_docx(file_bytes)
-            elif filename_lower.endswith(".doc"):
-                # Legacy DOC format - try as DOCX first
-                try:
+            elif filename_lower.endswith((".doc", ".rtf")):
+                # .doc files are often RTF or DOCX renamed: trust the content
+                container = sniff_format(file_bytes.getvalue()[:64])
+                if container == "ole":
+                    return self._extract_doc(file_bytes)
+                elif container == "rtf":
+                    return self._extract_rtf(file_bytes)
+                elif container == "zip":
                     return self._extract_docx(file_bytes)
-                except:
-                    return ("", "unsupported", 0)
-            elif filename_lower.endswith((".xlsx", ".xls")):
-                return self._extract_excel(file_bytes)
+                return ("", "unsupported", 0)
+            elif filename_lower.endswith(".odt"):
+                return self._extract_odt(file_bytes)
+            elif filename_lower.endswith(".xlsx"):
+                return self._extract_excel(file_bytes, price_rows)
+            elif filename_lower.endswith(".xls"):
+                if sniff_format(file_bytes.getvalue()[:8]) == "zip":
+                    return self._extract_excel(file_bytes, price_rows)
+                return self._extract_xls(file_bytes, price_rows)
             else:
                 return ("", "unsupported", 0)
         except Exception as e:
@@ -91,29 +709,31 @@ class DocumentExtractor:
             return ("", "error", 0)
 
     def _extract_pdf(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
-        """Extract text from PDF. Use OCR if needed."""
+        """Extract text from PDF (in-process, first PDF_MAX_PAGES pages)."""
         try:
-            reader = PdfReader(file_bytes)
-            text_parts = []
-            page_count = len(reader.pages)
-
-            for page in reader.pages:
-                text = page.extract_text() or ""
-                text_parts.append(text)
-
-            full_text = "\n\n".join(text_parts)
-
-            # Check if we got meaningful text
-            if len(full_text.strip()) < 100:
-                # Likely scanned PDF - use OCR
-                return self._ocr_pdf(file_bytes, page_count)
-
-            return (full_text, "pypdf", page_count)
+            backend = get_pdf_backend(settings.PDF_BACKEND)
+            data = file_bytes.getvalue()
+            page_count = backend.page_count(data)
+            texts = backend.extract_pages(data, 0, min(page_count, settings.PDF_MAX_PAGES))
+            return self._pdf_result(texts, page_count, file_bytes, backend.name)
 
         except Exception as e:
             print(f"PDF extraction error: {e}")
             return ("", "error", 0)
 
+    def _pdf_result(
+        self, texts: List[str], page_count: int, file_bytes: io.BytesIO, backend: str
+    ) -> Tuple[str, str, int]:
+        """Join page texts, or fall back to OCR when there is no text layer."""
+        full_text = PAGE_BREAK.join(texts)
+
+        # Check if we got meaningful text
+        if len(full_text.strip()) < 100:
+            # Likely scanned PDF - use OCR
+            return self._ocr_pdf(file_bytes, page_count)
+
+        return (full_text, backend, page_count)
+
     def _ocr_pdf(self, file_bytes: io.BytesIO, page_count: int) -> Tuple[str, str, int]:
         """OCR a scanned PDF using PaddleOCR."""
         try:
@@ -136,6 +756,8 @@ class DocumentExtractor:
 
     def _extract_docx(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
         """Extract text from DOCX file."""
+        from docx import Document as DocxDocument
+
         try:
             doc = DocxDocument(file_bytes)
             text_parts = [para.text for para in doc.paragraphs if para.text.strip()]
@@ -144,33 +766,178 @@ class DocumentExtractor:
             print(f"DOCX extraction error: {e}")
             return ("", "error", 0)
 
-    def _extract_excel(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
-        """Extract text from Excel file."""
+    def _extract_doc(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
+        """Extract text from a Word 97-2003 (OLE2) file."""
         try:
-            df = pd.read_excel(file_bytes, sheet_name=None)
-            text_parts = []
-            sheet_count = 0
+            text, pages = extract_doc_text(file_bytes.getvalue())
+            return (text, "doc", pages)
+        except Exception as e:
+            print(f"DOC extraction error: {e}")
+            return ("", "error", 0)
+
+    def _extract_rtf(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
+        """Extract text from an RTF file."""
+        try:
+            return (extract_rtf_text(file_bytes.getvalue()), "rtf", 0)
+        except Exception as e:
+            print(f"RTF extraction error: {e}")
+            return ("", "error", 0)
+
+    def _extract_odt(self, file_bytes: io.BytesIO) -> Tuple[str, str, int]:
+        """Extract text from an OpenDocument text file."""
+        try:
+            text, paragraphs = extract_odt_text(file_bytes.getvalue())
+            return (text, "odt", paragraphs)
+        except Exception as e:
+            print(f"ODT extraction error: {e}")
+            return ("", "error", 0)
 
-            for sheet_name, sheet_df in df.items():
-                sheet_count += 1
-                text_parts.append(f"=== {sheet_name} ===")
-                text_parts.append(sheet_df.to_string())
+    def _extract_excel(
+        self, file_bytes: io.BytesIO, price_rows: Optional[list] = None
+    ) -> Tuple[str, str, int]:
+        """Extract text from Excel file as compact TSV.
+
+        Rows are streamed in read-only mode, so large price schedules are
+        never loaded as a whole.
+        """
+        from openpyxl import load_workbook
+
+        try:
+            wb = load_workbook(file_bytes, read_only=True, data_only=True)
+        except Exception as e:
+            print(f"Excel extraction error: {e}")
+            return ("", "error", 0)
 
-            return ("\n\n".join(text_parts), "xlsx", sheet_count)
+        try:
+            text_parts = [
+                self._sheet_to_tsv(ws.title, ws.iter_rows(values_only=True), price_rows)
+                for ws in wb.worksheets
+            ]
         except Exception as e:
             print(f"Excel extraction error: {e}")
             return ("", "error", 0)
+        finally:
+            wb.close()
+
+        return ("\n\n".join(text_parts), "xlsx", len(text_parts))
+
+    def _extract_xls(
+        self, file_bytes: io.BytesIO, price_rows: Optional[list] = None
+    ) -> Tuple[str, str, int]:
+        """Extract text from a legacy Excel 97-2003 (BIFF) workbook."""
+        import xlrd
+
+        try:
+            book = xlrd.open_workbook(file_contents=file_bytes.getvalue(), on_demand=True)
+        except Exception as e:
+            print(f"XLS extraction error: {e}")
+            return ("", "error", 0)
+
+        try:
+            text_parts = []
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                text_parts.append(
+                    self._sheet_to_tsv(sheet.name, _xls_rows(book, sheet), price_rows)
+                )
+                book.unload_sheet(index)
+        except Exception as e:
+            print(f"XLS extraction error: {e}")
+            return ("", "error", 0)
+        finally:
+            book.release_resources()
+
+        return ("\n\n".join(text_parts), "xls", len(text_parts))
+
+    def _sheet_to_tsv(
+        self, title: str, rows: Iterable[tuple], price_rows: Optional[list]
+    ) -> str:
+        """Render sheet rows as compact TSV.
+
+        Empty rows and trailing empty cells are dropped. The first row
+        naming price schedule columns (designation, quantite, prix
+        unitaire...) is marked as the sheet header and, when price_rows
+        is given, every following row is captured as a structured price
+        item.
+        """
+        lines = [f"=== {title} ==="]
+        columns: Dict[int, str] = {}
+
+        for row_number, row in enumerate(rows, 1):
+            cells = [_cell_text(value) for value in row]
+            while cells and not cells[-1]:
+                cells.pop()
+            if not cells:
+                continue
+
+            if not columns:
+                found = _header_columns(cells)
+                if len(found) >= PRICE_HEADER_MIN_COLUMNS:
+                    columns = found
+                    lines.append("[header]\t" + "\t".join(cells))
+                    continue
+            elif price_rows is not None:
+                item = self._price_item(title, row_number, row, cells, columns)
+                if item:
+                    price_rows.append(item)
+
+            lines.append("\t".join(cells))
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _price_item(
+        sheet: str, row_number: int, row: tuple, cells: List[str], columns: Dict[int, str]
+    ) -> Optional[dict]:
+        """Structured price schedule row, or None for sub-totals/blank lines.
+
+        Every row has all the columns (None when the sheet has no such
+        column): rows are inserted in bulk, which needs identical keys.
+        """
+        item = {"sheet_name": sheet, "row_number": row_number}
+        item.update(dict.fromkeys(column for column, _ in PRICE_HEADER_COLUMNS))
+        for index, column in columns.items():
+            # Trailing blank cells (often unit and total price) are None
+            if index >= len(cells):
+                item[column] = None
+            elif column in ("quantity", "unit_price", "total_price"):
+                item[column] = _to_number(row[index])
+            else:
+                item[column] = cells[index] or None
+        if not item.get("designation"):
+            return None
+        # Sub-total lines carry no item number, quantity or unit price
+        if not any(item.get(c) for c in ("item_number", "quantity", "unit_price")):
+            return None
+        item["row_data"] = cells
+        return item
 
-    def _classify_document(self, text: str) -> str:
-        """Classify document type based on content."""
-        text_lower = text.lower()[:2000]  # Check first 2000 chars
+    def _classify_document(self, text: str, filename: str = "") -> str:
+        """Classify document type from filename and content.
 
-        for doc_type, keywords in CLASSIFICATION_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return doc_type
+        Scores every category with one regex pass over the normalized
+        first pages and the filename, then keeps the best score.
+        """
+        scores = {doc_type: 0 for doc_type in CLASSIFICATION_KEYWORDS}
 
-        return "OTHER"
+        if filename:
+            base = _normalize_text(os.path.splitext(os.path.basename(filename))[0])
+            base = base.replace("_", " ")
+            for match in _FILENAME_PATTERN.finditer(base):
+                doc_type, weight = _FILENAME_GROUPS[match.lastgroup]
+                scores[doc_type] += weight
+
+        window = _normalize_text(text[:CLASSIFICATION_WINDOW])
+        for match in _CONTENT_PATTERN.finditer(window):
+            doc_type, weight = _CONTENT_GROUPS[match.lastgroup]
+            if match.start() < CLASSIFICATION_TITLE_WINDOW:
+                weight *= 2
+            scores[doc_type] += weight
+
+        best_type = max(scores, key=scores.get)
+        if scores[best_type] < CLASSIFICATION_MIN_SCORE:
+            return "OTHER"
+        return best_type
 
     async def _store_document(
         self,
@@ -180,17 +947,91 @@ class DocumentExtractor:
         content: str,
         method: str,
         pages: int,
-    ):
+    ) -> Optional[dict]:
         """Store extracted document in database."""
         if not supabase:
             print(f"Warning: No database. Document {filename} not stored.")
-            return
+            return None
 
-        await supabase.insert("tender_documents", {
+        row = {
             "tender_id": tender_id,
             "document_type": doc_type,
             "original_filename": filename,
             "page_count": pages,
             "extracted_text": content[:50000] if content else None,  # Limit size
             "extraction_method": method,
+        }
+        if not method.endswith(PREVIEW_SUFFIX):
+            row.update(await self._fingerprint_fields(doc_type, content))
+
+        result = await supabase.insert("tender_documents", row)
+        return result[0] if result else None
+
+    async def _fingerprint_fields(
+        self, doc_type: str, content: str, deduplicate: bool = True
+    ) -> dict:
+        """SimHash columns for a document, deduplicated against the index.
+
+        A near-duplicate ANNEXE/OTHER document is stored without text and
+        points to the first copy (duplicate_of). Once a text has been seen
+        BOILERPLATE_MIN_DUPLICATES times it is flagged as boilerplate.
+        With deduplicate=False only the SimHash columns are returned.
+        """
+        if not content or not settings.DEDUPLICATE_DOCUMENTS:
+            return {}
+        fingerprint = await self._run_in_pool(simhash, content[:50000])
+        if fingerprint is None:
+            return {}
+
+        fields = {"simhash": to_signed(fingerprint)}
+        for i, band in enumerate(bands(fingerprint)):
+            fields[f"simhash_b{i}"] = band
+
+        if not deduplicate or doc_type not in DEDUP_DOCUMENT_TYPES:
+            return fields
+        original = await self._find_near_duplicate(fingerprint)
+        if not original:
+            return fields
+
+        # Counted in the database: concurrent duplicates all count
+        boilerplate = await supabase.rpc("record_duplicate", {
+            "p_original": original["id"],
+            "p_min_duplicates": settings.BOILERPLATE_MIN_DUPLICATES,
         })
+        if boilerplate is None:
+            # Deleted meanwhile: keep the text
+            return fields
+        fields.update({
+            "duplicate_of": original["id"],
+            "extracted_text": None,
+            "is_boilerplate": boilerplate,
+        })
+        return fields
+
+    async def _find_near_duplicate(self, fingerprint: int) -> Optional[dict]:
+        """Closest stored original within MAX_DISTANCE bits, via the band index."""
+        band_filter = ",".join(
+            f"simhash_b{i}.eq.{band}" for i, band in enumerate(bands(fingerprint))
+        )
+        types = ",".join(sorted(DEDUP_DOCUMENT_TYPES))
+        candidates = await supabase.select(
+            "tender_documents",
+            f"select=id,simhash&duplicate_of=is.null"
+            f"&document_type=in.({types})&or=({band_filter})&limit=100",
+        )
+        best, best_distance = None, MAX_DISTANCE + 1
+        for candidate in candidates:
+            if candidate.get("simhash") is None:
+                continue
+            d = distance(fingerprint, from_signed(candidate["simhash"]))
+            if d < best_distance:
+                best, best_distance = candidate, d
+        return best
+
+    async def _store_price_rows(self, tender_id: str, document_id: str, rows: list):
+        """Store price schedule rows in batches (one request per batch)."""
+        for i in range(0, len(rows), PRICE_ROWS_BATCH_SIZE):
+            await supabase.insert("tender_price_items", [
+                {"tender_id": tender_id, "document_id": document_id, **row}
+                for row in rows[i:i + PRICE_ROWS_BATCH_SIZE]
+            ])
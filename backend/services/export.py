@@ -0,0 +1,333 @@
+"""
+Streaming export of tenders with their lots and latest analysis.
+Tenders are read a page at a time (PostgREST keyset paging on id, or a
+server-side cursor with SQLAlchemy) and written as NDJSON, CSV or Parquet
+as they arrive, so memory stays constant whatever the export size.
+
+Parquet needs pyarrow (optional).
+"""
+import asyncio
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import AsyncIterator, Iterator, List, Optional
+
+from sqlalchemy.orm import selectinload
+
+from database import SessionLocal, supabase
+from models import Tender
+
+PAGE_SIZE = 500
+
+TENDER_COLUMNS = [
+    "id",
+    "reference_url",
+    "reference_tender",
+    "scrape_date",
+    "status",
+    "tender_type",
+    "issuing_institution",
+    "subject",
+    "total_estimated_value",
+    "submission_deadline_date",
+    "submission_deadline_time",
+    "folder_opening_location",
+    "keywords_en",
+    "keywords_fr",
+    "keywords_ar",
+]
+LOT_COLUMNS = ["lot_number", "lot_subject", "lot_estimated_value", "caution_provisoire"]
+ANALYSIS_COLUMNS = ["analysis_data", "model_used", "tokens_used", "created_at"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _plain(value):
+    """JSON-ready value from a PostgREST or SQLAlchemy column."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _record(tender: dict, lots: list, analysis: Optional[dict]) -> dict:
+    record = {column: _plain(tender.get(column)) for column in TENDER_COLUMNS}
+    record["lots"] = [{c: _plain(lot.get(c)) for c in LOT_COLUMNS} for lot in lots]
+    record["analysis"] = (
+        {c: _plain(analysis.get(c)) for c in ANALYSIS_COLUMNS} if analysis else None
+    )
+    return record
+
+
+# -- Sources: pages of records ---------------------------------------------
+
+async def supabase_pages(
+    date_from: Optional[date], date_to: Optional[date], status: Optional[str]
+) -> AsyncIterator[List[dict]]:
+    """Pages of records over PostgREST, lots and latest analysis embedded."""
+    query = [
+        f"select={','.join(TENDER_COLUMNS)},"
+        f"tender_lots({','.join(LOT_COLUMNS)}),"
+        f"tender_analysis({','.join(ANALYSIS_COLUMNS)})",
+        "tender_lots.order=lot_number",
+        "tender_analysis.order=created_at.desc",
+        "tender_analysis.limit=1",
+        "order=id",
+        f"limit={PAGE_SIZE}",
+    ]
+    if date_from:
+        query.append(f"scrape_date=gte.{date_from.isoformat()}")
+    if date_to:
+        query.append(f"scrape_date=lte.{date_to.isoformat()}")
+    if status:
+        query.append(f"status=eq.{status}")
+
+    last_id = None
+    while True:
+        # Keyset paging: each page costs the same, unlike a growing offset
+        page_query = query + [f"id=gt.{last_id}"] if last_id else query
+        rows = await supabase.select("tenders", "&".join(page_query))
+        if not rows:
+            return
+        yield [
+            _record(row, row.get("tender_lots") or [], (row.get("tender_analysis") or [None])[0])
+            for row in rows
+        ]
+        if len(rows) < PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _sqlalchemy_pages(
+    date_from: Optional[date], date_to: Optional[date], status: Optional[str]
+) -> Iterator[List[dict]]:
+    # Own session: the request's get_db session is closed before a
+    # streaming response is sent
+    db = SessionLocal()
+    try:
+        query = db.query(Tender).options(
+            selectinload(Tender.lots), selectinload(Tender.analysis)
+        )
+        if date_from:
+            query = query.filter(Tender.scrape_date >= date_from)
+        if date_to:
+            query = query.filter(Tender.scrape_date <= date_to)
+        if status:
+            query = query.filter(Tender.status == status)
+        query = query.order_by(Tender.id).execution_options(stream_results=True)
+
+        page = []
+        for tender in query.yield_per(PAGE_SIZE):
+            analyses = sorted(tender.analysis, key=lambda a: a.created_at, reverse=True)
+            page.append(_record(
+                {column: getattr(tender, column) for column in TENDER_COLUMNS},
+                sorted(
+                    ({c: getattr(lot, c) for c in LOT_COLUMNS} for lot in tender.lots),
+                    key=lambda lot: lot["lot_number"],
+                ),
+                {c: getattr(analyses[0], c) for c in ANALYSIS_COLUMNS} if analyses else None,
+            ))
+            if len(page) == PAGE_SIZE:
+                yield page
+                page = []
+        if page:
+            yield page
+    finally:
+        db.close()
+
+
+async def sqlalchemy_pages(
+    date_from: Optional[date], date_to: Optional[date], status: Optional[str]
+) -> AsyncIterator[List[dict]]:
+    """Pages of records from a server-side cursor, read off the event loop."""
+    pages = _sqlalchemy_pages(date_from, date_to, status)
+    try:
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                return
+            yield page
+    finally:
+        pages.close()
+
+
+# -- Writers: pages of records to bytes ------------------------------------
+
+class NdjsonWriter:
+    """One JSON object per line, lots and analysis nested."""
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, records: List[dict]) -> bytes:
+        return "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvWriter:
+    """One row per tender; keywords joined with "; ", lots and the
+    analysis as JSON cells."""
+
+    columns = TENDER_COLUMNS + ["lots", "analysis_model", "analysis_created_at", "analysis"]
+
+    def _rows(self, rows: list) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        # BOM so spreadsheet software reads the file as UTF-8
+        return "\ufeff".encode() + self._rows([self.columns])
+
+    def write(self, records: List[dict]) -> bytes:
+        rows = []
+        for record in records:
+            row = [
+                "; ".join(value) if isinstance(value, list) else value
+                for value in (record[column] for column in TENDER_COLUMNS)
+            ]
+            analysis = record["analysis"] or {}
+            row += [
+                json.dumps(record["lots"], ensure_ascii=False) if record["lots"] else "",
+                analysis.get("model_used"),
+                analysis.get("created_at"),
+                json.dumps(analysis["analysis_data"], ensure_ascii=False) if analysis else "",
+            ]
+            rows.append(row)
+        return self._rows(rows)
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _Chunks:
+    """Write-only file handing over what ParquetWriter wrote so far."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ParquetWriter:
+    """One row group per page; lots as a list of structs, the analysis
+    data as a JSON string."""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        keywords = pa.list_(pa.string())
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("reference_url", pa.string()),
+            ("reference_tender", pa.string()),
+            ("scrape_date", pa.date32()),
+            ("status", pa.string()),
+            ("tender_type", pa.string()),
+            ("issuing_institution", pa.string()),
+            ("subject", pa.string()),
+            ("total_estimated_value", pa.float64()),
+            ("submission_deadline_date", pa.date32()),
+            ("submission_deadline_time", pa.string()),
+            ("folder_opening_location", pa.string()),
+            ("keywords_en", keywords),
+            ("keywords_fr", keywords),
+            ("keywords_ar", keywords),
+            ("lots", pa.list_(pa.struct([
+                ("lot_number", pa.int32()),
+                ("lot_subject", pa.string()),
+                ("lot_estimated_value", pa.float64()),
+                ("caution_provisoire", pa.float64()),
+            ]))),
+            ("analysis_model", pa.string()),
+            ("analysis_created_at", pa.string()),
+            ("analysis", pa.string()),
+        ])
+        self.sink = _Chunks()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, records: List[dict]) -> bytes:
+        rows = []
+        for record in records:
+            analysis = record["analysis"] or {}
+            rows.append({
+                **{column: record[column] for column in TENDER_COLUMNS},
+                "scrape_date": _date(record["scrape_date"]),
+                "submission_deadline_date": _date(record["submission_deadline_date"]),
+                "lots": record["lots"],
+                "analysis_model": analysis.get("model_used"),
+                "analysis_created_at": analysis.get("created_at"),
+                "analysis": (
+                    json.dumps(analysis["analysis_data"], ensure_ascii=False) if analysis else None
+                ),
+            })
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if value else None
+
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+async def export_tenders(
+    writer,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """The export file, a page at a time."""
+    pages = supabase_pages if supabase else sqlalchemy_pages
+    yield writer.header()
+    async for records in pages(date_from, date_to, status):
+        chunk = writer.write(records)
+        if chunk:
+            yield chunk
+    yield writer.close()
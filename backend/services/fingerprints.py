@@ -0,0 +1,79 @@
+"""
+Near-duplicate fingerprints for extracted documents.
+64-bit SimHash over word shingles, split into bands for index lookups.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import List, Optional
+
+SHINGLE_SIZE = 3
+# Bands of the fingerprint stored as indexed columns. Two fingerprints
+# within MAX_DISTANCE bits share at least one band (pigeonhole), so an
+# exact match on any band finds every near-duplicate candidate.
+BAND_COUNT = 4
+BAND_BITS = 64 // BAND_COUNT
+MAX_DISTANCE = 3
+# Shorter texts, or texts with fewer distinct shingles (mostly numbers,
+# a few repeated words), give unreliable fingerprints
+MIN_TEXT_LENGTH = 300
+MIN_SHINGLES = 20
+
+_WORD = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> List[str]:
+    """Casefolded words of any script without combining marks (accents,
+    Arabic harakat); numbers collapse to "#" so dates, references and
+    amounts do not make templates look different."""
+    text = "".join(
+        c for c in unicodedata.normalize("NFKD", text.casefold())
+        if not unicodedata.combining(c)
+    )
+    return ["#" if token.isdigit() else token for token in _WORD.findall(text)]
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of a text, or None when it is too short or too
+    repetitive."""
+    if len(text.strip()) < MIN_TEXT_LENGTH:
+        return None
+    tokens = _tokens(text)
+    shingles = [
+        " ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    ]
+    if len(set(shingles)) < MIN_SHINGLES:
+        return None
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+        for shingle in shingles
+    ]
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(64):
+        mask = 1 << bit
+        if sum(1 for h in hashes if h & mask) > half:
+            fingerprint |= mask
+    return fingerprint
+
+
+def bands(fingerprint: int) -> List[int]:
+    """Split a fingerprint into BAND_COUNT integers for the index columns."""
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(BAND_COUNT)]
+
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def to_signed(fingerprint: int) -> int:
+    """Unsigned 64-bit fingerprint -> Postgres BIGINT."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def from_signed(value: int) -> int:
+    """Postgres BIGINT -> unsigned 64-bit fingerprint."""
+    return value + (1 << 64) if value < 0 else value
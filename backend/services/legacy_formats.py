@@ -0,0 +1,243 @@
+"""
+Legacy document formats.
+Pure-Python text extraction for Word 97-2003 (.doc, OLE2/CFB container),
+RTF and OpenDocument text (.odt). Memory-only - no disk writes, no
+LibreOffice subprocess.
+"""
+import io
+import re
+import struct
+import zipfile
+from typing import Tuple
+from xml.etree import ElementTree
+
+import olefile
+
+# First bytes of each container format
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+RTF_MAGIC = b"{\\rtf"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def sniff_format(data: bytes) -> str:
+    """Detect the real container of a file ("ole", "rtf", "zip" or "")."""
+    if data.startswith(OLE2_MAGIC):
+        return "ole"
+    if data.lstrip()[:5] == RTF_MAGIC:
+        return "rtf"
+    if data.startswith(ZIP_MAGIC):
+        return "zip"
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Word 97-2003 (.doc)
+# ---------------------------------------------------------------------------
+
+# FIB offsets ([MS-DOC] 2.5.1)
+_FIB_IDENT = 0xA5EC
+_FIB_FLAGS = 0x000A
+_FIB_CCP_TEXT = 0x004C
+_FIB_FC_CLX = 0x01A2
+_FLAG_ENCRYPTED = 0x0100
+_FLAG_TABLE_1 = 0x0200
+_FC_COMPRESSED = 0x40000000
+
+# Field instructions sit between \x13 and \x14; the shown result follows
+_FIELD_CODE = re.compile("\x13[^\x13\x14\x15]*\x14?")
+_DOC_CONTROL = re.compile("[\x00-\x08\x0e-\x1f]")
+
+
+def _doc_pieces(table: bytes, fc_clx: int, lcb_clx: int) -> list:
+    """Read the piece table (PlcPcd) from the Clx structure."""
+    clx = table[fc_clx:fc_clx + lcb_clx]
+    pos = 0
+    # Skip Prc entries (property modifiers)
+    while pos < len(clx) and clx[pos] == 0x01:
+        (cb_grpprl,) = struct.unpack_from("<h", clx, pos + 1)
+        pos += 3 + cb_grpprl
+    if pos >= len(clx) or clx[pos] != 0x02:
+        raise ValueError("piece table not found")
+    (lcb,) = struct.unpack_from("<I", clx, pos + 1)
+    plc = clx[pos + 5:pos + 5 + lcb]
+
+    count = (lcb - 4) // 12
+    cps = struct.unpack_from(f"<{count + 1}I", plc, 0)
+    pieces = []
+    for i in range(count):
+        (fc,) = struct.unpack_from("<I", plc, (count + 1) * 4 + i * 8 + 2)
+        pieces.append((cps[i], cps[i + 1], fc))
+    return pieces
+
+
+def extract_doc_text(data: bytes) -> Tuple[str, int]:
+    """Extract the main document text of a Word 97-2003 file.
+
+    Returns (text, page count from the summary information, 0 if unknown).
+    """
+    ole = olefile.OleFileIO(io.BytesIO(data))
+    try:
+        word = ole.openstream("WordDocument").read()
+        ident, = struct.unpack_from("<H", word, 0)
+        if ident != _FIB_IDENT:
+            raise ValueError("not a Word 97-2003 document")
+        flags, = struct.unpack_from("<H", word, _FIB_FLAGS)
+        if flags & _FLAG_ENCRYPTED:
+            raise ValueError("encrypted document")
+
+        table_name = "1Table" if flags & _FLAG_TABLE_1 else "0Table"
+        table = ole.openstream(table_name).read()
+        ccp_text, = struct.unpack_from("<i", word, _FIB_CCP_TEXT)
+        fc_clx, lcb_clx = struct.unpack_from("<II", word, _FIB_FC_CLX)
+
+        parts = []
+        for cp_start, cp_end, fc in _doc_pieces(table, fc_clx, lcb_clx):
+            if cp_start >= ccp_text:
+                break
+            length = min(cp_end, ccp_text) - cp_start
+            if fc & _FC_COMPRESSED:
+                offset = (fc & ~_FC_COMPRESSED) // 2
+                parts.append(word[offset:offset + length].decode("cp1252", "replace"))
+            else:
+                parts.append(word[fc:fc + 2 * length].decode("utf-16-le", "replace"))
+
+        pages = 0
+        try:
+            pages = ole.get_metadata().num_pages or 0
+        except Exception:
+            pass
+    finally:
+        ole.close()
+
+    text = _FIELD_CODE.sub("", "".join(parts))
+    text = text.replace("\r", "\n").replace("\x0b", "\n").replace("\x07", "\t")
+    text = _DOC_CONTROL.sub("", text.replace("\x15", ""))
+    return text, pages
+
+
+# ---------------------------------------------------------------------------
+# RTF
+# ---------------------------------------------------------------------------
+
+_RTF_TOKEN = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})? ?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|([^\\{}\r\n]+)",
+    re.IGNORECASE,
+)
+# Groups whose content is never document text
+_RTF_SKIP_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "themedata",
+    "colorschememapping", "latentstyles", "datastore", "listtable",
+    "listoverridetable", "rsidtbl", "generator", "xmlnstbl", "filetbl",
+}
+_RTF_CHARS = {
+    "par": "\n", "line": "\n", "sect": "\n\n", "page": "\n\n", "tab": "\t",
+    "cell": "\t", "row": "\n", "emdash": "\u2014", "endash": "\u2013",
+    "lquote": "\u2018", "rquote": "\u2019", "ldblquote": "\u201c",
+    "rdblquote": "\u201d", "bullet": "\u2022",
+}
+
+
+def extract_rtf_text(data: bytes) -> str:
+    """Extract plain text from an RTF document."""
+    source = data.decode("latin-1")
+    codepage = "cp1252"
+    out = []
+    stack = []
+    skip = False
+    uc_skip = 1  # Fallback characters following \uN
+    pending_skip = 0
+
+    for match in _RTF_TOKEN.finditer(source):
+        word, arg, hex_byte, symbol, brace, text = match.groups()
+
+        if brace == "{":
+            stack.append((skip, uc_skip))
+            continue
+        if brace == "}":
+            if stack:
+                skip, uc_skip = stack.pop()
+            continue
+
+        if pending_skip and (hex_byte or text):
+            # Drop the ANSI fallback of a preceding \uN
+            if hex_byte:
+                pending_skip -= 1
+                continue
+            consumed = min(pending_skip, len(text))
+            text = text[consumed:]
+            pending_skip -= consumed
+            if not text:
+                continue
+
+        if word:
+            word = word.lower()
+            if word in _RTF_SKIP_DESTINATIONS:
+                skip = True
+            elif word == "ansicpg" and arg:
+                codepage = f"cp{arg}"
+            elif word == "uc" and arg:
+                uc_skip = int(arg)
+            elif skip:
+                continue
+            elif word == "u" and arg:
+                value = int(arg)
+                out.append(chr(value + 65536 if value < 0 else value))
+                pending_skip = uc_skip
+            elif word in _RTF_CHARS:
+                out.append(_RTF_CHARS[word])
+        elif symbol:
+            if symbol == "*":
+                skip = True
+            elif not skip and symbol in "\\{}":
+                out.append(symbol)
+            elif not skip and symbol == "~":
+                out.append("\u00a0")
+        elif hex_byte and not skip:
+            try:
+                out.append(bytes([int(hex_byte, 16)]).decode(codepage))
+            except (LookupError, UnicodeDecodeError):
+                out.append(bytes([int(hex_byte, 16)]).decode("cp1252", "replace"))
+        elif text and not skip:
+            out.append(text)
+
+    return "".join(out)
+
+
+# ---------------------------------------------------------------------------
+# OpenDocument text (.odt)
+# ---------------------------------------------------------------------------
+
+_ODF_TEXT = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+_ODF_BLOCKS = {f"{{{_ODF_TEXT}}}p", f"{{{_ODF_TEXT}}}h"}
+
+
+def _odf_inline_text(element) -> str:
+    parts = [element.text or ""]
+    for child in element:
+        tag = child.tag
+        if tag == f"{{{_ODF_TEXT}}}s":
+            parts.append(" " * int(child.get(f"{{{_ODF_TEXT}}}c", "1")))
+        elif tag == f"{{{_ODF_TEXT}}}tab":
+            parts.append("\t")
+        elif tag == f"{{{_ODF_TEXT}}}line-break":
+            parts.append("\n")
+        elif tag not in _ODF_BLOCKS:
+            parts.append(_odf_inline_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def extract_odt_text(data: bytes) -> Tuple[str, int]:
+    """Extract paragraphs and headings from an ODT document.
+
+    Returns (text, paragraph count).
+    """
+    paragraphs = []
+    with zipfile.ZipFile(io.BytesIO(data)) as zf, zf.open("content.xml") as content:
+        for _, element in ElementTree.iterparse(content):
+            if element.tag in _ODF_BLOCKS:
+                text = _odf_inline_text(element)
+                if text.strip():
+                    paragraphs.append(text)
+                element.clear()
+    return "\n".join(paragraphs), len(paragraphs)
@@ -0,0 +1,223 @@
+"""
+Browserless tender link collection.
+Replays the PRADO consultation search of marchespublics.gov.ma over HTTP:
+the form is posted back with its page state (PRADO_PAGESTATE) and the
+controls TenderScraper fills in the browser, the page size is switched
+to 500 and every results page is parsed with lxml.
+
+Raises SearchLayoutChanged when the pages no longer look as expected, so
+the caller can fall back to the browser.
+"""
+import re
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+import httpx
+from lxml import html
+
+from services.rate_control import HostRateLimiter
+
+# Controls located the same way as in TenderScraper._collect_tender_links_browser
+HOME_LINK_TEXT = "Consultations en cours"
+CATEGORY_SELECT_ID = "ctl0_CONTENU_PAGE_AdvancedSearch_categorie"
+PUBLISHED_LABEL = "Date de mise en ligne :"
+DEADLINE_LABEL = "Date limite de remise des plis :"
+SEARCH_BUTTON_TITLE = "Lancer la recherche"
+PAGE_SIZE_SELECT_ID = "ctl0_CONTENU_PAGE_resultSearch_listePageSizeTop"
+PAGE_SIZE = "500"
+# Next page link of the results pager, and the prefix of every results control
+NEXT_PAGE_ID = "ctl0_CONTENU_PAGE_resultSearch_PagerTop_ctl2"
+RESULTS_ID_PREFIX = "ctl0_CONTENU_PAGE_resultSearch"
+# Safety stop when the pager never ends
+MAX_RESULT_PAGES = 50
+
+TIMEOUT_SECONDS = 30
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0 Safari/537.36"
+)
+
+
+class SearchLayoutChanged(Exception):
+    """The search pages changed; the HTTP replay cannot be trusted."""
+
+
+class HttpLinkCollector:
+    """Tender links for a publication date, without a browser."""
+
+    def __init__(
+        self,
+        home_url: str,
+        link_prefix: str,
+        category: str,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        self.home_url = home_url
+        self.link_prefix = link_prefix
+        self.category = category
+        self.rate_limiter = rate_limiter
+
+    async def collect(self, date_str: str) -> List[str]:
+        async with httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=TIMEOUT_SECONDS,
+            headers={"User-Agent": USER_AGENT},
+        ) as client:
+            url, page = await self._request(client, "GET", self.home_url)
+            search_url = urljoin(url, self._home_link(page))
+            url, page = await self._request(client, "GET", search_url)
+
+            action, fields = self._search_fields(url, page, date_str)
+            url, page = await self._request(client, "POST", action, fields)
+            if not self._is_results(page):
+                raise SearchLayoutChanged("no search results panel")
+
+            page_size = self._page_size_fields(url, page)
+            if page_size:
+                url, page = await self._request(client, "POST", *page_size)
+
+            links: Set[str] = set()
+            for _ in range(MAX_RESULT_PAGES):
+                found = self._links(url, page)
+                if found <= links:
+                    break
+                links |= found
+                next_page = self._next_page_fields(url, page)
+                if not next_page:
+                    break
+                url, page = await self._request(client, "POST", *next_page)
+            return list(links)
+
+    async def _request(
+        self, client: httpx.AsyncClient, method: str, url: str, data: Optional[dict] = None
+    ) -> Tuple[str, html.HtmlElement]:
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(url)
+        response = await client.request(method, url, data=data)
+        response.raise_for_status()
+        return str(response.url), html.fromstring(response.content)
+
+    # -- Pages -------------------------------------------------------------
+
+    def _home_link(self, page: html.HtmlElement) -> str:
+        for link in page.iter("a"):
+            href = link.get("href", "")
+            if link.text_content().strip() == HOME_LINK_TEXT and not href.startswith("javascript"):
+                return href
+        raise SearchLayoutChanged(f"no '{HOME_LINK_TEXT}' link")
+
+    def _search_fields(
+        self, url: str, page: html.HtmlElement, date_str: str
+    ) -> Tuple[str, Dict[str, str]]:
+        category = self._by_id(page, CATEGORY_SELECT_ID)
+        form = self._form_of(category)
+        fields = dict(form.form_values())
+        fields[self._name(category)] = self.category
+
+        published = self._labelled_inputs(form, PUBLISHED_LABEL)
+        for name in published[:2]:
+            fields[name] = date_str
+        for name in self._labelled_inputs(form, DEADLINE_LABEL)[:2]:
+            fields[name] = ""
+
+        buttons = form.xpath(f'.//input[@title="{SEARCH_BUTTON_TITLE}"]')
+        if not buttons:
+            raise SearchLayoutChanged("no search button")
+        self._click(fields, buttons[0])
+        return self._action(url, form), fields
+
+    def _is_results(self, page: html.HtmlElement) -> bool:
+        return bool(page.xpath(f'//*[starts-with(@id, "{RESULTS_ID_PREFIX}")]'))
+
+    def _page_size_fields(
+        self, url: str, page: html.HtmlElement
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Postback switching the results to PAGE_SIZE rows (None when
+        there is no page size select, e.g. no results)."""
+        found = page.xpath(f'//select[@id="{PAGE_SIZE_SELECT_ID}"]')
+        if not found:
+            return None
+        select = found[0]
+        if select.value == PAGE_SIZE:
+            return None
+        form = self._form_of(select)
+        fields = dict(form.form_values())
+        fields[self._name(select)] = PAGE_SIZE
+        self._postback(fields, self._name(select))
+        return self._action(url, form), fields
+
+    def _next_page_fields(
+        self, url: str, page: html.HtmlElement
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Postback of the pager's next link; None on the last page."""
+        found = page.xpath(f'//a[@id="{NEXT_PAGE_ID}"]')
+        if not found:
+            return None
+        # PRADO link buttons post back to the control named in their script
+        target = re.search(
+            r"""['"]ID['"]\s*:\s*['"]%s['"]\s*,\s*['"]EventTarget['"]\s*:\s*['"]([^'"]+)"""
+            % re.escape(NEXT_PAGE_ID),
+            html.tostring(page, encoding="unicode"),
+        )
+        if not target:
+            raise SearchLayoutChanged("pager link without PRADO event target")
+        form = self._form_of(found[0])
+        fields = dict(form.form_values())
+        self._postback(fields, target.group(1))
+        return self._action(url, form), fields
+
+    def _links(self, url: str, page: html.HtmlElement) -> Set[str]:
+        links = set()
+        for href in page.xpath("//a[contains(@href, 'EntrepriseDetailConsultation')]/@href"):
+            link = urljoin(url, href)
+            if link.startswith(self.link_prefix):
+                links.add(link)
+        return links
+
+    # -- Form helpers ------------------------------------------------------
+
+    def _by_id(self, page: html.HtmlElement, element_id: str) -> html.HtmlElement:
+        found = page.xpath(f'//*[@id="{element_id}"]')
+        if not found:
+            raise SearchLayoutChanged(f"no #{element_id}")
+        return found[0]
+
+    def _form_of(self, element: html.HtmlElement) -> html.FormElement:
+        forms = element.xpath("ancestor::form[1]")
+        if not forms:
+            raise SearchLayoutChanged(f"#{element.get('id')} is outside a form")
+        form = forms[0]
+        if not form.xpath('.//input[@name="PRADO_PAGESTATE"]'):
+            raise SearchLayoutChanged("form without PRADO_PAGESTATE")
+        return form
+
+    def _name(self, element: html.HtmlElement) -> str:
+        name = element.get("name")
+        if not name:
+            raise SearchLayoutChanged(f"#{element.get('id')} has no name")
+        return name
+
+    def _labelled_inputs(self, form: html.FormElement, label: str) -> List[str]:
+        """Names of the inputs next to a label, like the browser's
+        locator('text="label"').locator("..").locator("input")."""
+        names = form.xpath(
+            f'.//*[text()[normalize-space(.) = "{label}"]]/..//input/@name'
+        )
+        if len(names) < 2:
+            raise SearchLayoutChanged(f"no date inputs for '{label}'")
+        return names
+
+    def _action(self, url: str, form: html.FormElement) -> str:
+        return urljoin(url, form.get("action") or url)
+
+    def _click(self, fields: Dict[str, str], button: html.HtmlElement):
+        name = self._name(button)
+        if button.get("type") == "image":
+            fields[f"{name}.x"] = fields[f"{name}.y"] = "1"
+        else:
+            fields[name] = button.get("value", "")
+        self._postback(fields, name)
+
+    def _postback(self, fields: Dict[str, str], target: str):
+        fields["PRADO_POSTBACK_TARGET"] = target
+        fields["PRADO_POSTBACK_PARAMETER"] = ""
@@ -0,0 +1,168 @@
+"""
+Pipeline metrics.
+Prometheus counters and histograms for scraping, downloads, extraction,
+Supabase requests and LLM calls, exposed at /metrics.
+"""
+import os
+import time
+from functools import wraps
+from typing import Callable, List
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Buckets (seconds) for network round-trips and for slow pipeline stages
+FAST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# File formats reported as-is; anything else is "other"
+KNOWN_FORMATS = {
+    "pdf", "docx", "doc", "xlsx", "xls", "rtf", "odt", "zip", "txt",
+}
+
+# Called with (histogram, labels, seconds) for every timed() observation;
+# the benchmarks use it to compute exact percentiles
+observers: List[Callable[[Histogram, dict, float], None]] = []
+
+SCRAPE_NAVIGATION_SECONDS = Histogram(
+    "tender_scrape_navigation_seconds",
+    "Time spent navigating the tender portal",
+    ["step"],
+    buckets=SLOW_BUCKETS,
+)
+LINK_COLLECTIONS = Counter(
+    "tender_link_collections_total",
+    "Tender link collections by method (http, browser fallback)",
+    ["method"],
+)
+DOWNLOADS = Counter(
+    "tender_downloads_total",
+    "Tender DCE downloads (ok, timeout, error, cancelled)",
+    ["outcome"],
+)
+DOWNLOAD_RETRIES = Counter(
+    "tender_download_retries_total",
+    "Timed-out tender downloads scheduled for another attempt",
+)
+SCRAPER_CONCURRENCY = Gauge(
+    "tender_scraper_concurrency",
+    "Current adaptive limit on concurrent tender downloads",
+)
+DOWNLOAD_BYTES = Counter(
+    "tender_download_bytes_total",
+    "Bytes of downloaded DCE archives",
+)
+DOWNLOAD_SECONDS = Histogram(
+    "tender_download_seconds",
+    "Time from requesting a DCE archive to having it in memory",
+    buckets=SLOW_BUCKETS,
+)
+EXTRACTION_SECONDS = Histogram(
+    "document_extraction_seconds",
+    "Text extraction time per document",
+    ["format", "method"],
+    buckets=SLOW_BUCKETS,
+)
+SUPABASE_SECONDS = Histogram(
+    "supabase_request_seconds",
+    "Supabase REST request latency",
+    ["table", "operation", "outcome"],
+    buckets=FAST_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "llm_request_seconds",
+    "DeepSeek request latency, until the last streamed chunk",
+    ["pipeline", "outcome"],
+    buckets=SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "DeepSeek tokens used",
+    ["pipeline", "kind"],
+)
+PROMPT_BYTES_SAVED = Counter(
+    "llm_prompt_bytes_saved_total",
+    "Document text bytes removed by prompt preparation",
+    ["pipeline"],
+)
+ANALYSIS_COALESCED = Counter(
+    "tender_analysis_coalesced_total",
+    "AI pipeline calls answered by an identical call already in flight",
+    ["pipeline", "scope"],
+)
+
+SAVED_SEARCH_MATCHES = Counter(
+    "tender_saved_search_matches_total",
+    "Tenders matched by a saved search",
+)
+
+
+class timed:
+    """Observe the duration of a block or an async function.
+
+        with timed(EXTRACTION_SECONDS, format="pdf", method="error") as labels:
+            content, method, pages = ...
+            labels["method"] = method
+
+        @timed(SCRAPE_NAVIGATION_SECONDS, step="collect_links")
+        async def _collect_tender_links(...): ...
+
+    Labels can be updated inside the block; an "outcome" label is set
+    to "error" when the block raises.
+    """
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> dict:
+        self._start = time.perf_counter()
+        return self.labels
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and "outcome" in self.labels:
+            self.labels["outcome"] = "error"
+        elapsed = time.perf_counter() - self._start
+        metric = self.histogram.labels(**self.labels) if self.labels else self.histogram
+        metric.observe(elapsed)
+        for observer in observers:
+            observer(self.histogram, self.labels, elapsed)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # A fresh timer per call: concurrent calls must not share state
+            with timed(self.histogram, **self.labels):
+                return await func(*args, **kwargs)
+        return wrapper
+
+
+def file_format(filename: str) -> str:
+    """Bounded "format" label from a file name."""
+    extension = os.path.splitext(filename)[1].lstrip(".").lower()
+    return extension if extension in KNOWN_FORMATS else "other"
+
+
+def record_llm_usage(pipeline: str, usage) -> int:
+    """Count the tokens of an OpenAI-style usage object; returns the total."""
+    if not usage:
+        return 0
+    LLM_TOKENS.labels(pipeline=pipeline, kind="prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(pipeline=pipeline, kind="completion").inc(usage.completion_tokens or 0)
+    # DeepSeek reports context-cache hits separately
+    cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    if cached:
+        LLM_TOKENS.labels(pipeline=pipeline, kind="prompt_cache_hit").inc(cached)
+    return usage.total_tokens or 0
+
+
+def render_metrics() -> tuple:
+    """Exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,100 @@
+"""
+Tolerant incremental JSON parsing for LLM responses.
+Recovers the complete part of an object when the response is cut off,
+wrapped in markdown fences or followed by extra text.
+"""
+import json
+from typing import List, Optional, Tuple
+
+# How many recovery points to try, newest first
+MAX_RECOVERY_ATTEMPTS = 50
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class PartialJSONParser:
+    """Feed chunks of a streamed JSON object; read the best parse at any time.
+
+    The scan state is kept between feeds so every character is visited
+    once. Recovery points are positions right after a complete value,
+    together with the brackets still open there.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._cuts: List[Tuple[int, str]] = []
+        # True when the last result closed a nested value that was cut short
+        self.partial_tail = False
+
+    def feed(self, chunk: str):
+        self.text += chunk
+        self._scan()
+
+    def _scan(self):
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self._end is not None:
+                break
+            char = text[i]
+            if self._start is None:
+                if char == "{":
+                    self._start = i
+                    self._stack.append("}")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(_CLOSERS[char])
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._end = i + 1
+                else:
+                    self._cuts.append((i + 1, "".join(reversed(self._stack))))
+            elif char == ",":
+                self._cuts.append((i, "".join(reversed(self._stack))))
+        self._pos = len(text)
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    def result(self) -> Optional[dict]:
+        """Best-effort parse of everything fed so far (None if nothing usable)."""
+        self.partial_tail = False
+        if self._start is None:
+            return None
+        if self._end is not None:
+            parsed = _loads(self.text[self._start:self._end])
+            if parsed is not None:
+                return parsed
+        for cut, closers in reversed(self._cuts[-MAX_RECOVERY_ATTEMPTS:]):
+            parsed = _loads(self.text[self._start:cut] + closers)
+            if parsed is not None:
+                self.partial_tail = len(closers) > 1
+                return parsed
+        return None
+
+
+def _loads(text: str) -> Optional[dict]:
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
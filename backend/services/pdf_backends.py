@@ -0,0 +1,98 @@
+"""
+PDF text extraction backends.
+pypdf is the default; pdfium (pypdfium2) and PyMuPDF are optional and
+only imported when selected with PDF_BACKEND.
+"""
+import io
+from typing import Dict, List
+
+
+class PdfBackend:
+    """Extracts text page by page from PDF bytes."""
+
+    name = ""
+
+    def page_count(self, data: bytes) -> int:
+        raise NotImplementedError
+
+    def extract_pages(self, data: bytes, start: int, end: int) -> List[str]:
+        """Text of pages [start, end)."""
+        raise NotImplementedError
+
+
+class PypdfBackend(PdfBackend):
+    name = "pypdf"
+
+    def __init__(self):
+        from pypdf import PdfReader
+        self._reader_class = PdfReader
+
+    def page_count(self, data: bytes) -> int:
+        return len(self._reader_class(io.BytesIO(data)).pages)
+
+    def extract_pages(self, data: bytes, start: int, end: int) -> List[str]:
+        reader = self._reader_class(io.BytesIO(data))
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+class PdfiumBackend(PdfBackend):
+    name = "pdfium"
+
+    def __init__(self):
+        import pypdfium2
+        self._pdfium = pypdfium2
+
+    def page_count(self, data: bytes) -> int:
+        pdf = self._pdfium.PdfDocument(data)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extract_pages(self, data: bytes, start: int, end: int) -> List[str]:
+        pdf = self._pdfium.PdfDocument(data)
+        try:
+            texts = []
+            for i in range(start, end):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+
+
+class PymupdfBackend(PdfBackend):
+    name = "pymupdf"
+
+    def __init__(self):
+        import pymupdf
+        self._pymupdf = pymupdf
+
+    def page_count(self, data: bytes) -> int:
+        with self._pymupdf.open(stream=data, filetype="pdf") as doc:
+            return doc.page_count
+
+    def extract_pages(self, data: bytes, start: int, end: int) -> List[str]:
+        with self._pymupdf.open(stream=data, filetype="pdf") as doc:
+            return [doc[i].get_text() for i in range(start, end)]
+
+
+PDF_BACKENDS = {
+    backend.name: backend for backend in (PypdfBackend, PdfiumBackend, PymupdfBackend)
+}
+
+_instances: Dict[str, PdfBackend] = {}
+
+
+def get_pdf_backend(name: str) -> PdfBackend:
+    """Return the named backend, falling back to pypdf if it is unavailable."""
+    if name not in _instances:
+        try:
+            _instances[name] = PDF_BACKENDS[name]()
+        except (KeyError, ImportError) as e:
+            print(f"Warning: PDF backend {name!r} unavailable ({e}), using pypdf")
+            _instances[name] = get_pdf_backend("pypdf") if name != "pypdf" else PypdfBackend()
+    return _instances[name]
@@ -0,0 +1,88 @@
+"""
+Prompt preparation.
+Shrinks extracted document text before it is sent to DeepSeek:
+whitespace normalization and removal of page headers/footers that
+repeat across pages.
+"""
+import re
+from collections import Counter
+from typing import List, Tuple
+
+# Separator between pages in extracted text (written by DocumentExtractor)
+PAGE_BREAK = "\f"
+
+# Lines checked at the top and bottom of each page for headers/footers
+FURNITURE_LINES = 3
+# A line is page furniture when it repeats on this share of pages
+FURNITURE_MIN_RATIO = 0.5
+FURNITURE_MIN_PAGES = 3
+
+# Rough token estimate for French/English text
+CHARS_PER_TOKEN = 4
+
+_DIGITS = re.compile(r"\d+")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u200b]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _line_key(line: str) -> str:
+    """Compare lines ignoring page numbers and spacing ("Page 3/12")."""
+    return _DIGITS.sub("#", " ".join(line.split()).lower())
+
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Indexes of the first/last non-empty lines of a page."""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    # Short pages: never treat more than a third of the page as furniture
+    count = min(FURNITURE_LINES, len(non_empty) // 3)
+    if not count:
+        return []
+    return non_empty[:count] + non_empty[-count:]
+
+
+def strip_page_furniture(text: str) -> str:
+    """Remove header/footer lines repeated across most pages."""
+    pages = text.split(PAGE_BREAK)
+    if len(pages) < FURNITURE_MIN_PAGES:
+        return text
+
+    page_lines = [page.splitlines() for page in pages]
+    page_edges = [_edge_indexes(lines) for lines in page_lines]
+    counts = Counter()
+    for lines, edges in zip(page_lines, page_edges):
+        counts.update({_line_key(lines[i]) for i in edges})
+
+    threshold = max(2, len(pages) * FURNITURE_MIN_RATIO)
+    furniture = {key for key, count in counts.items() if count >= threshold}
+    if not furniture:
+        return text
+
+    cleaned = []
+    for lines, edges in zip(page_lines, page_edges):
+        drop = {i for i in edges if _line_key(lines[i]) in furniture}
+        cleaned.append("\n".join(
+            line for i, line in enumerate(lines) if i not in drop
+        ))
+    return PAGE_BREAK.join(cleaned)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines, drop page breaks."""
+    # One character for one: the cleaned text is never longer
+    text = text.replace(PAGE_BREAK, "\n")
+    text = "\n".join(_INLINE_SPACE.sub(" ", line).strip() for line in text.splitlines())
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def prepare_document_text(text: str) -> Tuple[str, dict]:
+    """Clean extracted text for a prompt and report what was saved."""
+    prepared = normalize_whitespace(strip_page_furniture(text))
+    original_bytes = len(text.encode("utf-8"))
+    prepared_bytes = len(prepared.encode("utf-8"))
+    stats = {
+        "original_bytes": original_bytes,
+        "prepared_bytes": prepared_bytes,
+        "bytes_saved": original_bytes - prepared_bytes,
+        "tokens_saved_est": (len(text) - len(prepared)) // CHARS_PER_TOKEN,
+    }
+    return prepared, stats
@@ -0,0 +1,119 @@
+"""
+Concurrency and rate control for the tender portal.
+AIMD concurrency limit driven by page-load latency and timeouts, per-host
+token buckets, and jittered exponential backoff for retries.
+"""
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted AIMD-style (additive increase,
+    multiplicative decrease).
+
+    Each fast page load adds 1/limit, about +1 per round of `limit`
+    requests. A timeout or a load slower than `latency_target` multiplies
+    the limit by `decrease_factor`, at most once per `latency_target`
+    seconds so one burst of failures counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 10,
+        latency_target: float = 10.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+        return False
+
+    async def record_latency(self, seconds: float):
+        """Feed the load time of a page that did not time out."""
+        if seconds > self.latency_target:
+            await self._decrease(f"slow page ({seconds:.1f}s)")
+            return
+        before = int(self.limit)
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        if int(self.limit) > before:
+            async with self._condition:
+                self._condition.notify_all()
+
+    async def record_timeout(self):
+        await self._decrease("timeout")
+
+    async def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < self.latency_target:
+            return
+        self._last_decrease = now
+        before = self.limit
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+        if int(self.limit) < int(before):
+            print(f"Concurrency {int(before)} -> {int(self.limit)}: {reason}")
+
+
+class TokenBucket:
+    """`rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """One token bucket per host."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await self.buckets[host].acquire()
+
+
+def retry_delay(attempt: int, base: float, cap: float, rng: Optional[random.Random] = None) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return (rng or random).uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,170 @@
+"""
+Re-extraction of stored DCE archives.
+Runs DocumentExtractor again over the archives kept in the blob store
+(BLOB_STORE), e.g. after an extractor or OCR improvement, without
+scraping the portal. From backend/:
+
+    python -m services.reprocess [--tender ID ...] [--status ERROR]
+        [--since YYYY-MM-DD] [--limit N] [--concurrency 4]
+
+Tenders are processed concurrently; their files are extracted in the
+EXTRACTION_WORKERS pool.
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+from typing import List, Optional
+
+from database import supabase
+from services.blob_store import get_blob_store
+from services.chat_memory import context_cache
+from services.document_extractor import DocumentExtractor, shutdown_extraction_pool
+
+
+class ReprocessingExtractor(DocumentExtractor):
+    """Re-extracts a DCE over the tender's existing documents.
+
+    Documents are matched by filename and updated in place, so their ids,
+    and the duplicate_of references of other tenders to them, stay valid.
+    Near-duplicates keep pointing at their original. Files not stored
+    before are inserted as usual. Extraction is always complete (no
+    two-phase preview).
+    """
+
+    def __init__(self, documents: List[dict]):
+        super().__init__()
+        self.two_phase = False
+        self.documents = {d["original_filename"]: d for d in documents}
+
+    async def _store_document(
+        self,
+        tender_id: str,
+        filename: str,
+        doc_type: str,
+        content: str,
+        method: str,
+        pages: int,
+    ) -> Optional[dict]:
+        existing = self.documents.get(filename)
+        if not existing:
+            return await super()._store_document(
+                tender_id, filename, doc_type, content, method, pages
+            )
+        if existing.get("duplicate_of"):
+            return existing
+
+        row = {
+            "document_type": doc_type,
+            "page_count": pages,
+            "extracted_text": content[:50000] if content else None,
+            "extraction_method": method,
+            **await self._fingerprint_fields(doc_type, content, deduplicate=False),
+        }
+        result = await supabase.update("tender_documents", f"id=eq.{existing['id']}", row)
+        return result[0] if result else existing
+
+    async def _store_price_rows(self, tender_id: str, document_id: str, rows: list):
+        await supabase.delete("tender_price_items", f"document_id=eq.{document_id}")
+        await super()._store_price_rows(tender_id, document_id, rows)
+
+
+async def reprocess_tender(tender: dict) -> Optional[int]:
+    """Re-extract one tender; the number of documents, or None when its
+    archive is no longer in the store."""
+    data = await get_blob_store().get(tender["dce_blob_key"])
+    if data is None:
+        return None
+    documents = await supabase.select(
+        "tender_documents",
+        f"tender_id=eq.{tender['id']}&select=id,original_filename,duplicate_of",
+    )
+    extractor = ReprocessingExtractor(documents)
+    count = await extractor.extract_and_store(
+        tender["id"], tender["dce_filename"], io.BytesIO(data)
+    )
+    context_cache.invalidate(tender["id"])
+    if tender.get("status") == "ERROR":
+        # e.g. extraction interrupted by a shutdown
+        await supabase.update("tenders", f"id=eq.{tender['id']}", {
+            "status": "SCRAPED",
+            "error_message": None,
+        })
+    return count
+
+
+async def reprocess(
+    tender_ids: List[str],
+    status: Optional[str],
+    since: Optional[str],
+    limit: Optional[int],
+    concurrency: int,
+) -> dict:
+    query = ["dce_blob_key=not.is.null", "select=id,status,dce_blob_key,dce_filename"]
+    if tender_ids:
+        query.append(f"id=in.({','.join(tender_ids)})")
+    if status:
+        query.append(f"status=eq.{status}")
+    if since:
+        query.append(f"scrape_date=gte.{since}")
+    query.append("order=scrape_date.desc")
+    if limit:
+        query.append(f"limit={limit}")
+    tenders = await supabase.select("tenders", "&".join(query))
+    print(f"Reprocessing {len(tenders)} tenders")
+
+    stats = {"tenders": 0, "documents": 0, "missing": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(tender: dict):
+        async with semaphore:
+            try:
+                count = await reprocess_tender(tender)
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"✗ Tender {tender['id']}: {e}")
+                return
+            if count is None:
+                stats["missing"] += 1
+                print(f"✗ Tender {tender['id']}: archive no longer in the blob store")
+                return
+            stats["tenders"] += 1
+            stats["documents"] += count
+            print(f"✓ Tender {tender['id']}: {count} documents")
+
+    await asyncio.gather(*[process(t) for t in tenders])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract stored DCE archives")
+    parser.add_argument("--tender", action="append", default=[], help="Tender id (repeatable)")
+    parser.add_argument("--status", help="Only tenders with this status, e.g. ERROR")
+    parser.add_argument("--since", help="Only tenders scraped on or after YYYY-MM-DD")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--concurrency", type=int, default=4, help="Tenders at a time")
+    args = parser.parse_args()
+
+    if not supabase:
+        raise SystemExit("Reprocessing needs SUPABASE_URL and SUPABASE_SERVICE_KEY")
+    if not get_blob_store():
+        raise SystemExit("No blob store configured (BLOB_STORE)")
+
+    start = time.perf_counter()
+    try:
+        stats = asyncio.run(reprocess(
+            args.tender, args.status, args.since, args.limit, args.concurrency
+        ))
+    finally:
+        shutdown_extraction_pool()
+    print(
+        f"\n{stats['tenders']} tenders, {stats['documents']} documents re-extracted "
+        f"in {time.perf_counter() - start:.1f}s ({stats['missing']} archives missing, "
+        f"{stats['failed']} failed)"
+    )
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Scraper run progress.
+Per-run statistics (links, downloads, failures, retries, bytes, durations),
+persisted in scraper_runs and broadcast to SSE / WebSocket subscribers.
+"""
+import asyncio
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import List, Optional, Set
+
+from database import supabase
+
+# Failures kept in detail per run (reasons are always counted)
+MAX_FAILURES = 200
+# Minimum interval between intermediate scraper_runs updates
+PERSIST_INTERVAL_SECONDS = 5.0
+# Events buffered per subscriber; the oldest are dropped for slow clients
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class RunEvents:
+    """Fan-out of run events to connected clients."""
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in self.subscribers:
+            if queue.full():
+                # Never block the scraper on a slow client
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+run_events = RunEvents()
+
+
+class RunProgress:
+    """Statistics of one scraper run."""
+
+    def __init__(self, target_date: date):
+        self.id: Optional[str] = None
+        self.target_date = target_date
+        self.status = "running"
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+        self.links_found = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.documents_extracted = 0
+        self.bytes_downloaded = 0
+        self.retries = 0
+        # Current adaptive concurrency limit, set by TenderScraper
+        self.concurrency: Optional[int] = None
+        self.failure_reasons = Counter()
+        self.failures: List[dict] = []
+
+        self.collect_seconds: Optional[float] = None
+        self.tender_seconds: List[float] = []
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._persisted = 0.0
+
+    # -- Events from TenderScraper -----------------------------------------
+
+    async def start(self):
+        if supabase:
+            try:
+                result = await supabase.insert("scraper_runs", self._row())
+                self.id = result[0]["id"] if result else None
+            except Exception as e:
+                print(f"Warning: scraper run not recorded: {e}")
+        self._publish("run_started")
+
+    async def links_collected(self, count: int, seconds: float):
+        self.links_found = count
+        self.collect_seconds = seconds
+        self._publish("links_collected")
+        await self._persist(force=True)
+
+    async def tender_downloaded(
+        self, idx: int, url: str, size: int, documents: int, seconds: float
+    ):
+        self.downloaded += 1
+        self.bytes_downloaded += size
+        self.documents_extracted += documents
+        self.tender_seconds.append(seconds)
+        self._publish("tender_downloaded", idx=idx, url=url, bytes=size, documents=documents)
+        await self._persist()
+
+    async def tender_failed(
+        self, idx: int, url: str, reason: str, message: str, seconds: float
+    ):
+        self.failed += 1
+        self.failure_reasons[reason] += 1
+        self.tender_seconds.append(seconds)
+        failure = {"idx": idx, "url": url, "reason": reason, "message": message[:500]}
+        if len(self.failures) < MAX_FAILURES:
+            self.failures.append(failure)
+        self._publish("tender_failed", **failure)
+        await self._persist()
+
+    async def tender_retrying(
+        self, idx: int, url: str, attempt: int, delay: float, message: str
+    ):
+        self.retries += 1
+        self._publish(
+            "tender_retrying", idx=idx, url=url, attempt=attempt,
+            delay=round(delay, 1), message=message[:500],
+        )
+        await self._persist()
+
+    async def finish(self, status: str = "completed", error: Optional[str] = None):
+        if self.finished_at:
+            return
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.now()
+        self._finished = time.perf_counter()
+        self._publish("run_finished")
+        await self._persist(force=True)
+
+    # -- Reporting ---------------------------------------------------------
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self._finished or time.perf_counter()) - self._started
+
+    def durations(self) -> dict:
+        durations = {
+            "elapsed": round(self.elapsed_seconds, 3),
+            "collect_links": round(self.collect_seconds, 3) if self.collect_seconds else None,
+        }
+        if self.tender_seconds:
+            ordered = sorted(self.tender_seconds)
+            durations.update({
+                "tender_avg": round(sum(ordered) / len(ordered), 3),
+                "tender_p95": round(ordered[round(0.95 * (len(ordered) - 1))], 3),
+                "tender_max": round(ordered[-1], 3),
+            })
+        return durations
+
+    def summary(self) -> dict:
+        processed = self.downloaded + self.failed
+        minutes = self.elapsed_seconds / 60
+        return {
+            "id": self.id,
+            "target_date": self.target_date.isoformat(),
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "links_found": self.links_found,
+            "processed": processed,
+            "downloaded": self.downloaded,
+            "failed": self.failed,
+            "documents_extracted": self.documents_extracted,
+            "bytes_downloaded": self.bytes_downloaded,
+            "retries": self.retries,
+            "concurrency": self.concurrency,
+            "failure_reasons": dict(self.failure_reasons),
+            "tenders_per_minute": round(processed / minutes, 2) if minutes else 0.0,
+            "durations": self.durations(),
+        }
+
+    def _row(self) -> dict:
+        summary = self.summary()
+        row = {key: summary[key] for key in (
+            "target_date", "status", "started_at", "finished_at", "error",
+            "links_found", "downloaded", "failed", "documents_extracted",
+            "bytes_downloaded", "retries", "failure_reasons", "durations",
+        )}
+        row["failures"] = self.failures
+        return row
+
+    def _publish(self, event_type: str, **data):
+        run_events.publish({"type": event_type, **data, "run": self.summary()})
+
+    async def _persist(self, force: bool = False):
+        if not supabase or not self.id:
+            return
+        now = time.monotonic()
+        if not force and now - self._persisted < PERSIST_INTERVAL_SECONDS:
+            return
+        self._persisted = now
+        try:
+            await supabase.update("scraper_runs", f"id=eq.{self.id}", self._row())
+        except Exception as e:
+            print(f"Warning: scraper run {self.id} not updated: {e}")
@@ -0,0 +1,177 @@
+"""
+Saved-search alerting.
+Standing queries of the bid team (saved_searches) are matched against
+each tender once AVIS extraction has filled its subject, institution,
+keywords and value; matches are stored in saved_search_matches.
+
+Query terms are kept in an in-memory inverted index (term -> searches),
+so a tender costs one lookup per distinct term of the tender instead of
+running every saved search.
+"""
+import asyncio
+import re
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from config import settings
+from database import supabase
+from services.avis_rules import normalize
+from services.metrics import SAVED_SEARCH_MATCHES
+
+_WORD = re.compile(r"\w+")
+# Left out of queries and tenders alike, so "travaux de voirie" matches
+# "Travaux d'entretien de la voirie"
+STOPWORDS = {
+    "a", "au", "aux", "d", "de", "des", "du", "en", "et", "l", "la", "le",
+    "les", "par", "pour", "sur", "un", "une", "and", "for", "of", "the", "to",
+}
+# Criteria other than the query
+FILTER_FIELDS = ("institution", "tender_type", "min_value", "max_value")
+# Tender columns whose words are indexed
+TEXT_FIELDS = ("subject", "issuing_institution")
+KEYWORD_FIELDS = ("keywords_en", "keywords_fr", "keywords_ar")
+
+
+def terms(text: Optional[str]) -> Set[str]:
+    """Normalized words of a text (lowercase, no accents, no stopwords)."""
+    if not text:
+        return set()
+    return {
+        word for word in _WORD.findall(normalize(text))
+        if word not in STOPWORDS and (len(word) > 1 or word.isdigit())
+    }
+
+
+def matches_everything(search: dict) -> bool:
+    """Whether a search has neither query terms (a query of stopwords
+    only has none) nor filters."""
+    return not terms(search.get("query")) and all(
+        search.get(field) in (None, "") for field in FILTER_FIELDS
+    )
+
+
+def tender_terms(tender: dict) -> Set[str]:
+    words = set()
+    for field in TEXT_FIELDS:
+        words |= terms(tender.get(field))
+    for field in KEYWORD_FIELDS:
+        for keyword in tender.get(field) or []:
+            words |= terms(keyword)
+    return words
+
+
+class SavedSearchIndex:
+    """Inverted index over the terms of the active saved searches.
+
+    A search matches a tender when every term of its query is among the
+    tender's terms and its filters (institution, tender type, value
+    range) accept the tender.
+    """
+
+    def __init__(self):
+        self.searches: Dict[str, dict] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.term_counts: Dict[str, int] = {}
+        # Searches without query terms, checked on filters only
+        self.unindexed: Set[str] = set()
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def add(self, search: dict):
+        self.remove(search["id"])
+        if not search.get("active", True) or matches_everything(search):
+            return
+        query_terms = terms(search.get("query"))
+        self.searches[search["id"]] = search
+        self.term_counts[search["id"]] = len(query_terms)
+        if not query_terms:
+            self.unindexed.add(search["id"])
+        for term in query_terms:
+            self.postings[term].add(search["id"])
+
+    def remove(self, search_id: str):
+        search = self.searches.pop(search_id, None)
+        if search is None:
+            return
+        del self.term_counts[search_id]
+        self.unindexed.discard(search_id)
+        for term in terms(search.get("query")):
+            self.postings[term].discard(search_id)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def replace(self, searches: Iterable[dict]):
+        self.searches.clear()
+        self.postings.clear()
+        self.term_counts.clear()
+        self.unindexed.clear()
+        for search in searches:
+            self.add(search)
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, force: bool = False):
+        """Reload the searches from the database, at most every
+        SAVED_SEARCH_REFRESH_SECONDS (other API workers edit them too)."""
+        async with self._lock:
+            age = time.monotonic() - self.loaded_at
+            if not force and self.loaded_at and age < settings.SAVED_SEARCH_REFRESH_SECONDS:
+                return
+            self.replace(await supabase.select("saved_searches", "active=is.true"))
+
+    def match(self, tender: dict) -> Dict[str, List[str]]:
+        """Matching search ids with the query terms found in the tender."""
+        hits: Dict[str, List[str]] = defaultdict(list)
+        for term in tender_terms(tender):
+            for search_id in self.postings.get(term, ()):
+                hits[search_id].append(term)
+
+        matches = {}
+        for search_id, found in hits.items():
+            if len(found) == self.term_counts[search_id]:
+                matches[search_id] = sorted(found)
+        for search_id in self.unindexed:
+            matches[search_id] = []
+        return {
+            search_id: found for search_id, found in matches.items()
+            if self._accepts(self.searches[search_id], tender)
+        }
+
+    @staticmethod
+    def _accepts(search: dict, tender: dict) -> bool:
+        if search.get("institution"):
+            if not terms(search["institution"]) <= terms(tender.get("issuing_institution")):
+                return False
+        if search.get("tender_type") and search["tender_type"] != tender.get("tender_type"):
+            return False
+        value = tender.get("total_estimated_value")
+        if search.get("min_value") is not None:
+            if value is None or float(value) < float(search["min_value"]):
+                return False
+        if search.get("max_value") is not None:
+            if value is None or float(value) > float(search["max_value"]):
+                return False
+        return True
+
+
+saved_search_index = SavedSearchIndex()
+
+
+async def record_matches(tender: dict) -> int:
+    """Match a tender against the saved searches and store the matches;
+    returns their number. Called again for the same tender, existing
+    matches are updated, not duplicated."""
+    await saved_search_index.refresh()
+    matches = saved_search_index.match(tender)
+    if not matches:
+        return 0
+    await supabase.upsert(
+        "saved_search_matches",
+        [
+            {"search_id": search_id, "tender_id": tender["id"], "matched_terms": found}
+            for search_id, found in matches.items()
+        ],
+        on_conflict="search_id,tender_id",
+    )
+    SAVED_SEARCH_MATCHES.inc(len(matches))
+    return len(matches)
@@ -0,0 +1,102 @@
+"""
+Request coalescing (single-flight) for AI pipelines.
+Concurrent calls for the same tender share one computation instead of
+each calling DeepSeek and storing its own rows.
+
+- In a process, callers await the task of the first call.
+- Across API workers (ANALYSIS_LOCKS), the first process takes a lease
+  in analysis_locks (acquire_analysis_lock(), under a Postgres advisory
+  lock); the others poll it and return the result its holder stored.
+"""
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict
+from urllib.parse import quote
+
+from config import settings
+from database import supabase
+from services.metrics import ANALYSIS_COALESCED
+
+
+class SingleFlight:
+    """One in-flight computation per key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, compute))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            ANALYSIS_COALESCED.labels(pipeline=self.name, scope="process").inc()
+        # A caller that goes away (client disconnect) must not cancel the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+
+    async def _run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if not (settings.ANALYSIS_LOCKS and supabase):
+            return await compute()
+
+        lock_key = f"{self.name}:{key}"
+        holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        try:
+            lease = await self._acquire(lock_key, holder)
+        except Exception as e:
+            print(f"Warning: analysis lock {lock_key} unavailable ({e}), running without it")
+            return await compute()
+
+        while lease["holder"] != holder:
+            flight = lease["acquired_at"]
+            await asyncio.sleep(settings.ANALYSIS_LOCK_POLL_SECONDS)
+            rows = await supabase.select(
+                "analysis_locks", f"key=eq.{quote(lock_key, safe='')}"
+            )
+            if rows and rows[0]["acquired_at"] == flight and rows[0]["finished_at"]:
+                if rows[0]["result"] is not None:
+                    ANALYSIS_COALESCED.labels(pipeline=self.name, scope="database").inc()
+                    return rows[0]["result"]
+            # Still running (same lease back), failed or expired (ours now)
+            lease = await self._acquire(lock_key, holder)
+
+        result = None
+        try:
+            result = await compute()
+            return result
+        finally:
+            await self._release(lock_key, holder, result)
+
+    async def _acquire(self, lock_key: str, holder: str) -> dict:
+        """The lease on the key: ours if it was free, finished or expired,
+        otherwise the current holder's."""
+        leases = await supabase.rpc("acquire_analysis_lock", {
+            "p_key": lock_key,
+            "p_holder": holder,
+            "p_ttl_seconds": settings.ANALYSIS_LOCK_TTL_SECONDS,
+        })
+        return leases[0]
+
+    async def _release(self, lock_key: str, holder: str, result: Any):
+        """Finish the lease, with the result for the waiters (None when
+        the computation failed, so a waiter takes over)."""
+        try:
+            await supabase.update(
+                "analysis_locks",
+                f"key=eq.{quote(lock_key, safe='')}&holder=eq.{quote(holder, safe='')}",
+                {
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                    "result": json.loads(json.dumps(result, default=str)),
+                },
+            )
+        except Exception as e:
+            print(f"Warning: analysis lock {lock_key} not released, expires on its own: {e}")
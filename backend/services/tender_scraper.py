@@ -4,13 +4,28 @@ Adapted from the user's Playwright-based scraper.
 """
 import asyncio
 import io
+import time
 from datetime import datetime, date
 from typing import List, Tuple, Set, Optional
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+import httpx
 
 from config import settings
 from database import supabase
+from services.blob_store import get_blob_store
 from services.document_extractor import DocumentExtractor
+from services.metrics import (
+    DOWNLOAD_BYTES,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_SECONDS,
+    DOWNLOADS,
+    LINK_COLLECTIONS,
+    SCRAPE_NAVIGATION_SECONDS,
+    SCRAPER_CONCURRENCY,
+    timed,
+)
+from services.rate_control import AdaptiveLimiter, HostRateLimiter, retry_delay
+from services.run_progress import RunProgress
 
 # Configuration
 HOMEPAGE_URL = "https://www.marchespublics.gov.ma/pmmp/"
@@ -35,50 +50,164 @@ class TenderScraper:
     def __init__(self):
         self.browser = None
         self.context = None
+        self._stopped = asyncio.Event()
         self.running = False
         self.extractor = DocumentExtractor()
+        self.progress: Optional[RunProgress] = None
+        self._tasks: List[asyncio.Task] = []
+        self._playwright = None
+        # Created per session in open()
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self.rate_limiter: Optional[HostRateLimiter] = None
+
+    @property
+    def running(self) -> bool:
+        return not self._stopped.is_set()
+
+    @running.setter
+    def running(self, value: bool):
+        # An event, so retry backoffs wake up on stop
+        if value:
+            self._stopped.clear()
+        else:
+            self._stopped.set()
 
-    async def run(self, target_date: date):
-        """Run the scraper for a specific date."""
+    async def run(self, target_date: date, progress: Optional[RunProgress] = None):
+        """Run the scraper for a specific date, reporting to `progress`."""
         self.running = True
+        self.progress = progress or RunProgress(target_date)
+        await self.progress.start()
         date_str = target_date.strftime("%d/%m/%Y")
 
-        async with async_playwright() as p:
-            self.browser = await p.chromium.launch(headless=settings.SCRAPER_HEADLESS)
-            self.context = await self.browser.new_context(accept_downloads=True)
+        try:
+            await self._run(date_str)
+            await self.progress.finish("completed" if self.running else "stopped")
+        except Exception as e:
+            if not self.running:
+                # Browser closed by stop() while collecting links
+                await self.progress.finish("stopped")
+                return
+            await self.progress.finish("failed", str(e))
+            raise
+        finally:
+            self.running = False
 
-            try:
-                # Phase 1: Collect tender links
-                tender_links = await self._collect_tender_links(date_str)
-                print(f"Found {len(tender_links)} tender links for {date_str}")
-
-                # Phase 2: Download each tender
-                semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_DOWNLOADS)
-                tasks = [
-                    self._download_tender(url, idx, semaphore)
-                    for idx, url in enumerate(tender_links, 1)
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Summary
-                success_count = sum(1 for r in results if r is True)
-                print(f"Downloaded: {success_count}/{len(tender_links)}")
-
-            finally:
-                await self.browser.close()
-                self.running = False
-
-    async def stop(self):
-        """Stop the scraper."""
+    async def _run(self, date_str: str):
+        await self.open()
+        try:
+            # Phase 1: Collect tender links
+            start = time.perf_counter()
+            tender_links = await self._collect_tender_links(date_str)
+            print(f"Found {len(tender_links)} tender links for {date_str}")
+            await self.progress.links_collected(
+                len(tender_links), time.perf_counter() - start
+            )
+
+            if not self.running:
+                return
+
+            # Phase 2: Download each tender
+            self._tasks = [
+                asyncio.create_task(self._download_tender(url, idx))
+                for idx, url in enumerate(tender_links, 1)
+            ]
+            results = await asyncio.gather(*self._tasks, return_exceptions=True)
+
+            # Summary
+            success_count = sum(1 for r in results if r is True)
+            print(f"Downloaded: {success_count}/{len(tender_links)}")
+
+        finally:
+            await self.close()
+
+    async def open(self):
+        """Start the browser and the per-session concurrency controls.
+
+        Called by run(); scraper workers keep one session open across jobs.
+        """
+        self.limiter = AdaptiveLimiter(
+            settings.MAX_CONCURRENT_DOWNLOADS,
+            minimum=settings.SCRAPER_MIN_CONCURRENCY,
+            maximum=settings.SCRAPER_MAX_CONCURRENCY,
+            latency_target=settings.SCRAPER_LATENCY_TARGET_SECONDS,
+        )
+        self.rate_limiter = HostRateLimiter(
+            settings.SCRAPER_REQUESTS_PER_SECOND, settings.SCRAPER_BURST
+        )
+        self._report_concurrency()
+
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=settings.SCRAPER_HEADLESS)
+        self.context = await self.browser.new_context(accept_downloads=True)
+
+    async def close(self):
+        await self._close_browser()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def stop(self, grace_seconds: Optional[float] = None):
+        """Stop the scraper gracefully.
+
+        No new tender is started. Downloads in flight get `grace_seconds`
+        (default SCRAPER_STOP_GRACE_SECONDS) to finish, then are cancelled;
+        the browser is closed last.
+        """
+        if not self.running:
+            return
         self.running = False
-        if self.browser:
+        if grace_seconds is None:
+            grace_seconds = settings.SCRAPER_STOP_GRACE_SECONDS
+
+        in_flight = [task for task in self._tasks if not task.done()]
+        if in_flight:
+            print(f"Stopping: waiting up to {grace_seconds:g}s for {len(in_flight)} tenders")
+            _, pending = await asyncio.wait(in_flight, timeout=grace_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if self.progress:
+            await self.progress.finish("stopped")
+        await self._close_browser()
+
+    async def _close_browser(self):
+        if self.browser and self.browser.is_connected():
             await self.browser.close()
 
+    @timed(SCRAPE_NAVIGATION_SECONDS, step="collect_links")
     async def _collect_tender_links(self, date_str: str) -> List[str]:
+        """Collect all tender links for the given date.
+
+        Over HTTP when SCRAPER_HTTP_LINKS is set; with the browser if
+        that is off, the search pages changed or the portal did not
+        answer over HTTP (errors, timeouts).
+        """
+        if settings.SCRAPER_HTTP_LINKS:
+            from services.link_collector import HttpLinkCollector, SearchLayoutChanged
+
+            collector = HttpLinkCollector(
+                HOMEPAGE_URL, TENDER_LINK_PREFIX, CATEGORY_FILTER, self.rate_limiter
+            )
+            try:
+                links = await collector.collect(date_str)
+                LINK_COLLECTIONS.labels(method="http").inc()
+                return links
+            except (SearchLayoutChanged, httpx.HTTPError) as e:
+                # Timeouts have an empty message
+                print(f"HTTP link collection failed ({type(e).__name__}: {e}), using the browser")
+        links = await self._collect_tender_links_browser(date_str)
+        LINK_COLLECTIONS.labels(method="browser").inc()
+        return links
+
+    async def _collect_tender_links_browser(self, date_str: str) -> List[str]:
         """Navigate and collect all tender links for the given date."""
         page = await self.context.new_page()
 
         try:
+            await self.rate_limiter.acquire(HOMEPAGE_URL)
             await page.goto(HOMEPAGE_URL)
             await page.click("text=Consultations en cours")
             await page.select_option(
@@ -102,6 +231,7 @@ class TenderScraper:
                 await page.keyboard.press("Delete")
 
             # Search
+            await self.rate_limiter.acquire(HOMEPAGE_URL)
             await page.locator('input[title="Lancer la recherche"]').nth(0).click()
             await page.wait_for_load_state("networkidle")
             await page.select_option(
@@ -129,16 +259,103 @@ class TenderScraper:
             await page.close()
 
     async def _download_tender(
-        self, tender_url: str, idx: int, semaphore: asyncio.Semaphore
+        self, tender_url: str, idx: int, progress: Optional[RunProgress] = None
     ) -> bool:
-        """Download a single tender and process its files."""
-        async with semaphore:
-            page = None
-            try:
-                page = await self.context.new_page()
+        """Download a single tender and process its files.
+
+        A timed-out attempt is retried after a jittered backoff, up to
+        SCRAPER_MAX_RETRIES times, before the tender counts as failed.
+        Outcomes go to `progress` (default: the run's progress).
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+        progress = progress or self.progress
+        start = time.perf_counter()
+        error: Optional[PlaywrightTimeout] = None
+        try:
+            for attempt in range(settings.SCRAPER_MAX_RETRIES + 1):
+                if attempt:
+                    await self._wait_before_retry(progress, tender_url, idx, attempt, error)
+                async with self.limiter:
+                    if not self.running:
+                        # Stopped while queued: never started, or not retried
+                        if error:
+                            raise error
+                        return False
+                    try:
+                        size, documents = await self._fetch_tender(tender_url)
+                        break
+                    except PlaywrightTimeout as e:
+                        error = e
+                        await self.limiter.record_timeout()
+                        self._report_concurrency()
+            else:
+                raise error
+
+        except PlaywrightTimeout as e:
+            print(f"✗ Tender #{idx} timeout: {e}")
+            DOWNLOADS.labels(outcome="timeout").inc()
+            await progress.tender_failed(
+                idx, tender_url, "timeout", str(e), time.perf_counter() - start
+            )
+            return False
+        except Exception as e:
+            print(f"✗ Tender #{idx} error: {e}")
+            DOWNLOADS.labels(outcome="error").inc()
+            await progress.tender_failed(
+                idx, tender_url, type(e).__name__, str(e), time.perf_counter() - start
+            )
+            return False
+        except asyncio.CancelledError:
+            print(f"✗ Tender #{idx} cancelled")
+            DOWNLOADS.labels(outcome="cancelled").inc()
+            await progress.tender_failed(
+                idx, tender_url, "cancelled", "Stopped before completion",
+                time.perf_counter() - start,
+            )
+            raise
+
+        print(f"✓ Tender #{idx} downloaded and processed")
+        DOWNLOADS.labels(outcome="ok").inc()
+        await progress.tender_downloaded(
+            idx, tender_url, size, documents, time.perf_counter() - start
+        )
+        return True
+
+    async def _wait_before_retry(
+        self, progress: RunProgress, tender_url: str, idx: int, attempt: int, error: Exception
+    ):
+        delay = retry_delay(
+            attempt,
+            settings.SCRAPER_RETRY_BASE_SECONDS,
+            settings.SCRAPER_RETRY_MAX_SECONDS,
+        )
+        print(f"↻ Tender #{idx} timed out, retry {attempt} in {delay:.1f}s")
+        DOWNLOAD_RETRIES.inc()
+        await progress.tender_retrying(idx, tender_url, attempt, delay, str(error))
+        try:
+            # Cut short by stop(): the retry is then given up
+            await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _fetch_tender(self, tender_url: str) -> Tuple[int, int]:
+        """One attempt at downloading and storing a tender.
+
+        Returns the archive size and the number of documents stored.
+        """
+        page = await self.context.new_page()
+        try:
+            await self.rate_limiter.acquire(tender_url)
+            with timed(SCRAPE_NAVIGATION_SECONDS, step="tender_page"):
+                load_start = time.perf_counter()
                 await page.goto(tender_url, timeout=TIMEOUT_PAGE_LOAD)
+            await self.limiter.record_latency(time.perf_counter() - load_start)
+            self._report_concurrency()
 
-                # Click download button
+            # Click download button and fill the request form
+            with timed(SCRAPE_NAVIGATION_SECONDS, step="download_form"):
+                await self.rate_limiter.acquire(tender_url)
                 await page.click(
                     'a[id="ctl0_CONTENU_PAGE_linkDownloadDce"]',
                     timeout=TIMEOUT_FORM_WAIT,
@@ -164,48 +381,50 @@ class TenderScraper:
                     "#ctl0_CONTENU_PAGE_EntrepriseFormulaireDemande_email",
                     FORM_DATA["email"],
                 )
+                await self.rate_limiter.acquire(tender_url)
                 await page.click("#ctl0_CONTENU_PAGE_validateButton")
                 await page.wait_for_selector(
                     "#ctl0_CONTENU_PAGE_EntrepriseDownloadDce_completeDownload",
                     timeout=TIMEOUT_FORM_WAIT,
                 )
 
-                # Download to memory
+            # Download to memory
+            await self.rate_limiter.acquire(tender_url)
+            with timed(DOWNLOAD_SECONDS):
                 async with page.expect_download(timeout=TIMEOUT_DOWNLOAD_WAIT) as download_info:
                     await page.click(
                         "#ctl0_CONTENU_PAGE_EntrepriseDownloadDce_completeDownload"
                     )
 
                 download = await download_info.value
-                
+
                 # Read file into memory (no disk writes!)
                 file_path = await download.path()
                 with open(file_path, "rb") as f:
                     file_bytes = io.BytesIO(f.read())
+            size = file_bytes.getbuffer().nbytes
+            DOWNLOAD_BYTES.inc(size)
+
+            # Extract deadline from page
+            deadline = await self._extract_deadline(page)
+
+            # Store in database
+            documents = await self._store_tender(
+                tender_url,
+                download.suggested_filename,
+                file_bytes,
+                deadline,
+            )
+            return size, documents
 
-                # Extract deadline from page
-                deadline = await self._extract_deadline(page)
-
-                # Store in database
-                await self._store_tender(
-                    tender_url,
-                    download.suggested_filename,
-                    file_bytes,
-                    deadline,
-                )
-
-                print(f"✓ Tender #{idx} downloaded and processed")
-                return True
+        finally:
+            await page.close()
 
-            except PlaywrightTimeout as e:
-                print(f"✗ Tender #{idx} timeout: {e}")
-                return False
-            except Exception as e:
-                print(f"✗ Tender #{idx} error: {e}")
-                return False
-            finally:
-                if page:
-                    await page.close()
+    def _report_concurrency(self):
+        limit = int(self.limiter.limit)
+        SCRAPER_CONCURRENCY.set(limit)
+        if self.progress:
+            self.progress.concurrency = limit
 
     async def _extract_deadline(self, page) -> Optional[dict]:
         """Extract deadline from tender page."""
@@ -231,14 +450,27 @@ class TenderScraper:
         filename: str,
         file_bytes: io.BytesIO,
         deadline: Optional[dict],
-    ):
-        """Store tender in database and trigger extraction."""
+    ) -> int:
+        """Store tender in database and trigger extraction.
+
+        Returns the number of documents stored.
+        """
         tender_data = {
             "reference_url": url,
             "scrape_date": date.today().isoformat(),
             "status": "SCRAPED",
         }
 
+        blob_store = get_blob_store()
+        if blob_store:
+            # Keep the original archive so it can be re-extracted later
+            try:
+                tender_data["dce_blob_key"] = await blob_store.put(file_bytes.getvalue())
+                tender_data["dce_filename"] = filename
+                tender_data["dce_size"] = file_bytes.getbuffer().nbytes
+            except Exception as e:
+                print(f"Warning: DCE archive of {url} not kept: {e}")
+
         if deadline:
             # Parse deadline
             try:
@@ -256,8 +488,16 @@ class TenderScraper:
             tender_id = result[0]["id"]
 
             # Extract documents (memory-only)
-            await self.extractor.extract_and_store(
-                tender_id, filename, file_bytes
-            )
-        else:
-            print("Warning: No database connection. Tender not stored.")
+            try:
+                return await self.extractor.extract_and_store(
+                    tender_id, filename, file_bytes
+                )
+            except asyncio.CancelledError:
+                # Checkpoint: keep the tender, flagged for re-extraction
+                await supabase.update("tenders", f"id=eq.{tender_id}", {
+                    "status": "ERROR",
+                    "error_message": "Extraction interrupted by shutdown",
+                })
+                raise
+        print("Warning: No database connection. Tender not stored.")
+        return 0
@@ -0,0 +1,36 @@
+"""
+Background warm-up of the heavy dependencies.
+Playwright, openai, lxml and the document parsers are imported on first
+use, so the API answers /health without them. warm_up() loads them once
+the server is up, off the event loop, so the first scrape or analysis
+does not pay for them either. With SCRAPER_QUEUE the scraper workers
+extract documents, so the API starts no extraction workers.
+"""
+import asyncio
+import importlib
+import time
+
+from config import settings
+from services.document_extractor import warm_up_extraction
+
+WARM_UP_MODULES = (
+    "openai",
+    "playwright.async_api",
+    "services.link_collector",
+)
+
+
+async def warm_up():
+    await asyncio.sleep(settings.WARM_UP_DELAY_SECONDS)
+    start = time.perf_counter()
+    for module in WARM_UP_MODULES:
+        try:
+            await asyncio.to_thread(importlib.import_module, module)
+        except ImportError as e:
+            print(f"Warm-up: {module} unavailable ({e})")
+    if not settings.SCRAPER_QUEUE:
+        try:
+            await warm_up_extraction()
+        except Exception as e:
+            print(f"Warm-up: extraction workers failed to start ({e})")
+    print(f"Warm-up done in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,289 @@
+"""
+Scraper worker.
+Claims jobs from the scrape_jobs queue and runs them with its own browser
+and extraction pool, so scraping scales across processes and machines
+independently of the API (which only enqueues runs when SCRAPER_QUEUE is
+set). Start it any number of times, from backend/:
+
+    python -m services.worker
+
+A run is one "collect" job, which enqueues a "tender" job per link; any
+worker picks those up. Run statistics are aggregated in scraper_runs by
+refresh_scraper_run() as jobs finish. SIGINT/SIGTERM stop claiming, give
+jobs in flight SCRAPER_STOP_GRACE_SECONDS, and queue the rest again.
+"""
+import asyncio
+import os
+import signal
+import socket
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from config import settings
+from database import supabase
+from services.document_extractor import deferred_extractions, shutdown_extraction_pool
+from services.tender_scraper import TenderScraper
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobReport:
+    """Outcome of one tender job.
+
+    Stands in for RunProgress in TenderScraper._download_tender; the run
+    itself is aggregated from all its jobs.
+    """
+
+    def __init__(self):
+        self.row: Optional[dict] = None
+        self.retries = 0
+
+    async def tender_downloaded(
+        self, idx: int, url: str, size: int, documents: int, seconds: float
+    ):
+        self.row = {"status": "done", "bytes": size, "documents": documents, "seconds": seconds}
+
+    async def tender_failed(
+        self, idx: int, url: str, reason: str, message: str, seconds: float
+    ):
+        self.row = {
+            "status": "failed",
+            "failure_reason": reason,
+            "error": message[:2000],
+            "seconds": seconds,
+        }
+
+    async def tender_retrying(
+        self, idx: int, url: str, attempt: int, delay: float, message: str
+    ):
+        self.retries += 1
+
+
+class ScrapeWorker:
+    """One worker process: a browser session and up to the scraper's
+    adaptive concurrency limit of jobs at a time."""
+
+    def __init__(self):
+        self.id = f"{socket.gethostname()}:{os.getpid()}"
+        self.scraper = TenderScraper()
+        self.jobs: Dict[str, asyncio.Task] = {}
+        self.stopping = asyncio.Event()
+
+    def stop(self):
+        if not self.stopping.is_set():
+            print(f"Worker {self.id} stopping")
+            self.stopping.set()
+
+    async def run(self):
+        print(f"Worker {self.id} started")
+        self.scraper.running = True
+        await self.scraper.open()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not self.stopping.is_set():
+                if len(self.jobs) >= int(self.scraper.limiter.limit):
+                    await asyncio.wait(
+                        list(self.jobs.values()),
+                        timeout=settings.WORKER_POLL_SECONDS,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    continue
+
+                job = await self._claim()
+                if job is None:
+                    await self._idle()
+                    continue
+                task = asyncio.create_task(self._handle(job))
+                self.jobs[job["id"]] = task
+                task.add_done_callback(lambda _, job_id=job["id"]: self.jobs.pop(job_id, None))
+        finally:
+            await self._drain()
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            print(f"Worker {self.id} stopped")
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self.stopping.wait(), settings.WORKER_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _drain(self):
+        """Stop after the jobs in flight, like TenderScraper.stop()."""
+        self.scraper.running = False
+        grace = settings.SCRAPER_STOP_GRACE_SECONDS
+        in_flight = list(self.jobs.values())
+        if in_flight:
+            print(f"Waiting up to {grace:g}s for {len(in_flight)} jobs")
+            _, pending = await asyncio.wait(in_flight, timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if deferred_extractions.queue is not None:
+            try:
+                await asyncio.wait_for(deferred_extractions.queue.join(), grace)
+            except asyncio.TimeoutError:
+                print("Deferred extractions left with their previews")
+        await deferred_extractions.stop()
+        await self.scraper.close()
+        shutdown_extraction_pool()
+
+    async def _claim(self) -> Optional[dict]:
+        try:
+            jobs = await supabase.rpc("claim_scrape_job", {
+                "p_worker_id": self.id,
+                "p_stale_seconds": settings.WORKER_STALE_SECONDS,
+                "p_max_attempts": settings.WORKER_MAX_ATTEMPTS,
+            })
+        except Exception as e:
+            print(f"Warning: could not claim a job: {e}")
+            return None
+        return jobs[0] if jobs else None
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.WORKER_HEARTBEAT_SECONDS)
+            if not self.jobs:
+                continue
+            try:
+                await supabase.update(
+                    "scrape_jobs",
+                    f"id=in.({','.join(self.jobs)})&{self._owned()}",
+                    {"heartbeat_at": _now()},
+                )
+            except Exception as e:
+                print(f"Warning: heartbeat failed: {e}")
+
+    def _owned(self) -> str:
+        # Only touch jobs still ours: a stale job may have been reclaimed
+        return f"worker_id=eq.{quote(self.id, safe='')}"
+
+    async def _handle(self, job: dict):
+        try:
+            if job["kind"] == "collect":
+                await self._collect(job)
+            else:
+                await self._download(job)
+        except asyncio.CancelledError:
+            await self._requeue(job)
+            raise
+        except Exception as e:
+            print(f"✗ Job {job['id']} ({job['kind']}) error: {e}")
+            if job["kind"] == "collect":
+                await self._fail_run(job["run_id"], str(e))
+            await self._finish(job, {
+                "status": "failed",
+                "failure_reason": type(e).__name__,
+                "error": str(e)[:2000],
+            })
+
+    async def _collect(self, job: dict):
+        run_id = job["run_id"]
+        target_date = date.fromisoformat(job["target_date"])
+        start = time.perf_counter()
+        links = await self.scraper._collect_tender_links(target_date.strftime("%d/%m/%Y"))
+        seconds = time.perf_counter() - start
+        print(f"Run {run_id}: {len(links)} tender links for {target_date}")
+
+        await supabase.update("scraper_runs", f"id=eq.{run_id}", {
+            "links_found": len(links),
+            "durations": {"collect_links": round(seconds, 3)},
+        })
+        runs = await supabase.select("scraper_runs", f"id=eq.{run_id}&select=status")
+        if links and runs and runs[0]["status"] == "running":
+            # Already enqueued if this job was reclaimed after its worker died
+            await supabase.upsert("scrape_jobs", [
+                {
+                    "run_id": run_id,
+                    "kind": "tender",
+                    "target_date": job["target_date"],
+                    "url": url,
+                    "idx": idx,
+                }
+                for idx, url in enumerate(sorted(links), 1)
+            ], on_conflict="run_id,url", ignore_duplicates=True)
+        await self._finish(job, {"status": "done", "seconds": seconds})
+
+    async def _download(self, job: dict):
+        url = job["url"]
+        if job["attempts"] > 1 and await self._already_stored(url):
+            # Reclaimed after its worker died between storing and reporting
+            await self._finish(job, {"status": "done", "bytes": 0, "documents": 0})
+            return
+
+        report = JobReport()
+        await self.scraper._download_tender(url, job["idx"], report)
+        if report.row is None:
+            # Worker stopping before the download started
+            await self._requeue(job)
+            return
+        await self._finish(job, {**report.row, "retries": report.retries})
+
+    async def _already_stored(self, url: str) -> bool:
+        tenders = await supabase.select(
+            "tenders", f"reference_url=eq.{quote(url, safe='')}&select=id"
+        )
+        return bool(tenders)
+
+    async def _finish(self, job: dict, row: dict):
+        try:
+            await supabase.update(
+                "scrape_jobs",
+                f"id=eq.{job['id']}&{self._owned()}",
+                {**row, "finished_at": _now()},
+            )
+            await supabase.rpc("refresh_scraper_run", {"p_run_id": job["run_id"]})
+        except Exception as e:
+            print(f"Warning: job {job['id']} result not recorded: {e}")
+
+    async def _fail_run(self, run_id: str, error: str):
+        try:
+            await supabase.update("scraper_runs", f"id=eq.{run_id}", {
+                "status": "failed",
+                "error": error,
+                "finished_at": _now(),
+            })
+        except Exception as e:
+            print(f"Warning: run {run_id} not marked failed: {e}")
+
+    async def _requeue(self, job: dict):
+        try:
+            await supabase.update("scrape_jobs", f"id=eq.{job['id']}&{self._owned()}", {
+                "status": "queued",
+                "worker_id": None,
+                # Interrupted by a shutdown, not a failed attempt
+                "attempts": job["attempts"] - 1,
+            })
+        except Exception as e:
+            print(f"Warning: job {job['id']} not requeued, reclaimed when stale: {e}")
+
+
+async def main():
+    if not supabase:
+        raise SystemExit("The worker needs SUPABASE_URL and SUPABASE_SERVICE_KEY")
+    if settings.WORKER_METRICS_PORT:
+        from prometheus_client import start_http_server
+
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+    worker = ScrapeWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:  # Windows
+            pass
+    await worker.run()
+
+
+if __name__ == "__main__":
+    # Same Playwright requirement as main.py
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+from services.fingerprints import MAX_DISTANCE, distance, simhash
+
+ARABIC_SUPPLIES = (
+    "يتعلق هذا الطلب بتوريد أجهزة الحاسوب المكتبية والطابعات لفائدة المديرية الإقليمية "
+    "للتعليم، ويجب على المتنافسين تقديم عروضهم مرفقة بالوثائق الإدارية والتقنية المطلوبة "
+    "وشهادة التسجيل في السجل التجاري وشهادة الضمان الاجتماعي، مع احترام الآجال المحددة "
+    "في نظام الاستشارة. تسلم الأجهزة في مقر المديرية خلال مدة لا تتجاوز ثلاثين يوما "
+    "ابتداء من تاريخ الأمر بالخدمة، ويتحمل المورد مصاريف النقل والتركيب والتكوين."
+)
+ARABIC_WORKS = (
+    "تهدف هذه الأشغال إلى تهيئة الطريق الجماعية الرابطة بين الدوار والمركز القروي، "
+    "وتشمل أعمال الحفر والردم ووضع طبقة الأساس والتزفيت وبناء قنوات صرف مياه الأمطار. "
+    "يلتزم المقاول بتوفير الآليات واليد العاملة المؤهلة وباحترام قواعد السلامة في الورش، "
+    "كما يخضع إنجاز الأشغال لمراقبة مكتب الدراسات المعتمد من طرف صاحب المشروع، "
+    "وتحدد مدة التنفيذ في ستة أشهر ابتداء من تاريخ تبليغ الأمر بالشروع في الأشغال."
+)
+
+
+def test_different_arabic_texts_are_not_near_duplicates():
+    a, b = simhash(ARABIC_SUPPLIES), simhash(ARABIC_WORKS)
+    assert a is not None and b is not None
+    assert distance(a, b) > MAX_DISTANCE
+
+
+def test_same_arabic_template_with_other_numbers_is_a_near_duplicate():
+    a = simhash(ARABIC_SUPPLIES + " المرجع 12/2024")
+    b = simhash(ARABIC_SUPPLIES + " المرجع 57/2025")
+    assert distance(a, b) <= MAX_DISTANCE
+
+
+def test_repetitive_text_has_no_fingerprint():
+    assert simhash("12/05/2024 " * 40) is None
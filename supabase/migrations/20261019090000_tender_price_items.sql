@@ -0,0 +1,38 @@
+-- =====================================================
+-- Price schedule rows (bordereau des prix / BPU)
+-- Filled when STORE_PRICE_SCHEDULES=true
+-- =====================================================
+
+CREATE TABLE public.tender_price_items (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  tender_id UUID NOT NULL REFERENCES public.tenders(id) ON DELETE CASCADE,
+  document_id UUID NOT NULL REFERENCES public.tender_documents(id) ON DELETE CASCADE,
+
+  sheet_name TEXT,
+  row_number INTEGER,
+  item_number TEXT,
+  designation TEXT,
+  unit TEXT,
+  quantity DECIMAL(18, 3),
+  unit_price DECIMAL(15, 2),
+  total_price DECIMAL(15, 2),
+
+  -- Original cells of the row, in column order
+  row_data JSONB NOT NULL DEFAULT '[]',
+
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_tender_price_items_tender_id ON public.tender_price_items(tender_id);
+CREATE INDEX idx_tender_price_items_document_id ON public.tender_price_items(document_id);
+
+ALTER TABLE public.tender_price_items ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for tender_price_items"
+  ON public.tender_price_items FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access tender_price_items"
+  ON public.tender_price_items FOR ALL
+  USING (true)
+  WITH CHECK (true);
@@ -0,0 +1,23 @@
+-- =====================================================
+-- Near-duplicate document fingerprints
+-- 64-bit SimHash split into four 16-bit bands for index lookups.
+-- Near-duplicate ANNEXE/OTHER documents keep no text of their own
+-- and point to the first copy through duplicate_of.
+-- =====================================================
+
+ALTER TABLE public.tender_documents
+  ADD COLUMN simhash BIGINT,
+  ADD COLUMN simhash_b0 INTEGER,
+  ADD COLUMN simhash_b1 INTEGER,
+  ADD COLUMN simhash_b2 INTEGER,
+  ADD COLUMN simhash_b3 INTEGER,
+  ADD COLUMN duplicate_of UUID REFERENCES public.tender_documents(id) ON DELETE SET NULL,
+  ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN is_boilerplate BOOLEAN NOT NULL DEFAULT false;
+
+-- Only originals are looked up as near-duplicate candidates
+CREATE INDEX idx_tender_documents_simhash_b0 ON public.tender_documents(simhash_b0) WHERE duplicate_of IS NULL;
+CREATE INDEX idx_tender_documents_simhash_b1 ON public.tender_documents(simhash_b1) WHERE duplicate_of IS NULL;
+CREATE INDEX idx_tender_documents_simhash_b2 ON public.tender_documents(simhash_b2) WHERE duplicate_of IS NULL;
+CREATE INDEX idx_tender_documents_simhash_b3 ON public.tender_documents(simhash_b3) WHERE duplicate_of IS NULL;
+CREATE INDEX idx_tender_documents_duplicate_of ON public.tender_documents(duplicate_of);
@@ -0,0 +1,41 @@
+-- =====================================================
+-- Scraper run statistics
+-- One row per run, updated while it progresses
+-- =====================================================
+
+CREATE TABLE public.scraper_runs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  target_date DATE NOT NULL,
+  status TEXT NOT NULL DEFAULT 'running',  -- running | completed | stopped | failed
+  started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  finished_at TIMESTAMPTZ,
+  error TEXT,
+
+  links_found INTEGER NOT NULL DEFAULT 0,
+  downloaded INTEGER NOT NULL DEFAULT 0,
+  failed INTEGER NOT NULL DEFAULT 0,
+  documents_extracted INTEGER NOT NULL DEFAULT 0,
+  bytes_downloaded BIGINT NOT NULL DEFAULT 0,
+
+  -- {"timeout": 3, "Error": 1}
+  failure_reasons JSONB NOT NULL DEFAULT '{}',
+  -- [{"idx", "url", "reason", "message"}], capped per run
+  failures JSONB NOT NULL DEFAULT '[]',
+  -- {"elapsed", "collect_links", "tender_avg", "tender_p95", "tender_max"} in seconds
+  durations JSONB NOT NULL DEFAULT '{}',
+
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_scraper_runs_started_at ON public.scraper_runs(started_at DESC);
+
+ALTER TABLE public.scraper_runs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for scraper_runs"
+  ON public.scraper_runs FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access scraper_runs"
+  ON public.scraper_runs FOR ALL
+  USING (true)
+  WITH CHECK (true);
@@ -0,0 +1,6 @@
+-- =====================================================
+-- Retries of timed-out tenders per scraper run
+-- =====================================================
+
+ALTER TABLE public.scraper_runs
+  ADD COLUMN retries INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,161 @@
+-- =====================================================
+-- Scrape job queue
+-- Runs enqueued by the API and claimed by scraper workers
+-- (python -m services.worker). A run starts as one "collect" job;
+-- the worker that claims it enqueues one "tender" job per link.
+-- =====================================================
+
+CREATE TABLE public.scrape_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  run_id UUID NOT NULL REFERENCES public.scraper_runs(id) ON DELETE CASCADE,
+  kind TEXT NOT NULL,  -- collect | tender
+  target_date DATE NOT NULL,
+  url TEXT,
+  idx INTEGER,
+  status TEXT NOT NULL DEFAULT 'queued',  -- queued | running | done | failed | cancelled
+  attempts INTEGER NOT NULL DEFAULT 0,
+  worker_id TEXT,
+  heartbeat_at TIMESTAMPTZ,
+
+  -- Outcome of a tender job
+  bytes BIGINT,
+  documents INTEGER,
+  retries INTEGER NOT NULL DEFAULT 0,
+  seconds DOUBLE PRECISION,
+  failure_reason TEXT,
+  error TEXT,
+
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX idx_scrape_jobs_queued ON public.scrape_jobs(created_at) WHERE status = 'queued';
+CREATE INDEX idx_scrape_jobs_running ON public.scrape_jobs(heartbeat_at) WHERE status = 'running';
+CREATE INDEX idx_scrape_jobs_run_id ON public.scrape_jobs(run_id);
+
+ALTER TABLE public.scrape_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for scrape_jobs"
+  ON public.scrape_jobs FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access scrape_jobs"
+  ON public.scrape_jobs FOR ALL
+  USING (true)
+  WITH CHECK (true);
+
+-- Recompute a run's statistics from its jobs, and close it once no job
+-- is queued or running. Safe to call from any number of workers.
+CREATE OR REPLACE FUNCTION public.refresh_scraper_run(p_run_id UUID)
+RETURNS SETOF public.scraper_runs AS $$
+BEGIN
+  RETURN QUERY
+  WITH tender_jobs AS (
+    SELECT * FROM public.scrape_jobs
+    WHERE run_id = p_run_id AND kind = 'tender'
+  ),
+  stats AS (
+    SELECT
+      count(*) FILTER (WHERE status = 'done') AS downloaded,
+      count(*) FILTER (WHERE status = 'failed') AS failed,
+      coalesce(sum(documents) FILTER (WHERE status = 'done'), 0) AS documents,
+      coalesce(sum(bytes) FILTER (WHERE status = 'done'), 0) AS bytes,
+      coalesce(sum(retries), 0) AS retries,
+      avg(seconds) AS tender_avg,
+      percentile_disc(0.95) WITHIN GROUP (ORDER BY seconds) AS tender_p95,
+      max(seconds) AS tender_max
+    FROM tender_jobs
+  ),
+  reasons AS (
+    SELECT coalesce(jsonb_object_agg(failure_reason, n), '{}') AS failure_reasons
+    FROM (
+      SELECT coalesce(failure_reason, 'unknown') AS failure_reason, count(*) AS n
+      FROM tender_jobs WHERE status = 'failed' GROUP BY 1
+    ) r
+  ),
+  failures AS (
+    SELECT coalesce(jsonb_agg(f), '[]') AS failures
+    FROM (
+      SELECT idx, url, failure_reason AS reason, left(error, 500) AS message
+      FROM tender_jobs WHERE status = 'failed'
+      ORDER BY idx LIMIT 200
+    ) f
+  ),
+  pending AS (
+    SELECT count(*) AS n FROM public.scrape_jobs
+    WHERE run_id = p_run_id AND status IN ('queued', 'running')
+  )
+  UPDATE public.scraper_runs run SET
+    downloaded = stats.downloaded,
+    failed = stats.failed,
+    documents_extracted = stats.documents,
+    bytes_downloaded = stats.bytes,
+    retries = stats.retries,
+    failure_reasons = reasons.failure_reasons,
+    failures = failures.failures,
+    durations = run.durations || jsonb_strip_nulls(jsonb_build_object(
+      'elapsed', round(extract(epoch FROM coalesce(run.finished_at, now()) - run.started_at)::numeric, 3),
+      'tender_avg', round(stats.tender_avg::numeric, 3),
+      'tender_p95', round(stats.tender_p95::numeric, 3),
+      'tender_max', round(stats.tender_max::numeric, 3)
+    )),
+    status = CASE
+      WHEN pending.n > 0 OR run.status NOT IN ('running', 'stopping') THEN run.status
+      WHEN run.status = 'stopping' THEN 'stopped'
+      ELSE 'completed'
+    END,
+    finished_at = CASE
+      WHEN pending.n = 0 AND run.status IN ('running', 'stopping') THEN now()
+      ELSE run.finished_at
+    END
+  FROM stats, reasons, failures, pending
+  WHERE run.id = p_run_id
+  RETURNING run.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Claim the next queued job for a worker (collect jobs first, then
+-- tenders in link order). Jobs whose worker stopped sending heartbeats
+-- for p_stale_seconds are queued again, or failed after p_max_attempts.
+CREATE OR REPLACE FUNCTION public.claim_scrape_job(
+  p_worker_id TEXT,
+  p_stale_seconds INTEGER DEFAULT 300,
+  p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS SETOF public.scrape_jobs AS $$
+DECLARE
+  abandoned_run UUID;
+BEGIN
+  FOR abandoned_run IN
+    UPDATE public.scrape_jobs SET
+      status = CASE WHEN attempts >= p_max_attempts THEN 'failed' ELSE 'queued' END,
+      failure_reason = CASE WHEN attempts >= p_max_attempts THEN 'abandoned' END,
+      error = CASE WHEN attempts >= p_max_attempts
+        THEN 'Worker ' || worker_id || ' stopped responding' END,
+      finished_at = CASE WHEN attempts >= p_max_attempts THEN now() END,
+      worker_id = NULL
+    WHERE status = 'running'
+      AND heartbeat_at < now() - make_interval(secs => p_stale_seconds)
+    RETURNING run_id
+  LOOP
+    PERFORM public.refresh_scraper_run(abandoned_run);
+  END LOOP;
+
+  RETURN QUERY
+  UPDATE public.scrape_jobs job SET
+    status = 'running',
+    attempts = job.attempts + 1,
+    worker_id = p_worker_id,
+    heartbeat_at = now(),
+    started_at = now()
+  WHERE job.id = (
+    SELECT id FROM public.scrape_jobs
+    WHERE status = 'queued'
+    ORDER BY (kind = 'collect') DESC, created_at, idx
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING job.*;
+END;
+$$ LANGUAGE plpgsql;
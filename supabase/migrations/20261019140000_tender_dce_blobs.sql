@@ -0,0 +1,13 @@
+-- =====================================================
+-- Original DCE archives in the blob store
+-- SHA-256 key of the archive (BLOB_STORE), for re-extraction
+-- without scraping the portal again
+-- =====================================================
+
+ALTER TABLE public.tenders
+  ADD COLUMN dce_blob_key TEXT,
+  ADD COLUMN dce_filename TEXT,
+  ADD COLUMN dce_size BIGINT;
+
+CREATE INDEX idx_tenders_dce_blob_key ON public.tenders(dce_blob_key)
+  WHERE dce_blob_key IS NOT NULL;
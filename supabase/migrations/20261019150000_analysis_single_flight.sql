@@ -0,0 +1,59 @@
+-- =====================================================
+-- Idempotent AVIS lots and shared in-flight analyses
+-- =====================================================
+
+-- One row per lot: extracting an AVIS again upserts its lots
+DELETE FROM public.tender_lots a
+  USING public.tender_lots b
+  WHERE a.tender_id = b.tender_id
+    AND a.lot_number = b.lot_number
+    AND (a.created_at, a.id) < (b.created_at, b.id);
+
+ALTER TABLE public.tender_lots
+  ADD CONSTRAINT tender_lots_tender_id_lot_number_key UNIQUE (tender_id, lot_number);
+
+-- Leases of analyses in flight (ANALYSIS_LOCKS), keyed by pipeline and
+-- tender, e.g. "deep_analysis:<tender id>". The holder stores its result
+-- on release for the API workers that waited on it.
+CREATE TABLE public.analysis_locks (
+  key TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  acquired_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  expires_at TIMESTAMPTZ NOT NULL,
+  finished_at TIMESTAMPTZ,
+  result JSONB
+);
+
+ALTER TABLE public.analysis_locks ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access analysis_locks"
+  ON public.analysis_locks FOR ALL
+  USING (true)
+  WITH CHECK (true);
+
+-- Take the lease on p_key if it is free, finished or expired. Returns the
+-- lease: holder = p_holder when taken, otherwise the current holder's.
+-- Callers of the same key are serialized by a transaction advisory lock.
+CREATE OR REPLACE FUNCTION public.acquire_analysis_lock(
+  p_key TEXT,
+  p_holder TEXT,
+  p_ttl_seconds INTEGER DEFAULT 300
+)
+RETURNS SETOF public.analysis_locks AS $$
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('analysis_locks'), hashtext(p_key));
+
+  INSERT INTO public.analysis_locks (key, holder, acquired_at, expires_at)
+  VALUES (p_key, p_holder, now(), now() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (key) DO UPDATE SET
+    holder = EXCLUDED.holder,
+    acquired_at = EXCLUDED.acquired_at,
+    expires_at = EXCLUDED.expires_at,
+    finished_at = NULL,
+    result = NULL
+  WHERE analysis_locks.finished_at IS NOT NULL
+     OR analysis_locks.expires_at < now();
+
+  RETURN QUERY SELECT * FROM public.analysis_locks WHERE key = p_key;
+END;
+$$ LANGUAGE plpgsql;
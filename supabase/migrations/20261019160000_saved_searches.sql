@@ -0,0 +1,50 @@
+-- =====================================================
+-- Saved searches and their matches
+-- Matched in the API as AVIS extraction completes
+-- (services/saved_searches.py)
+-- =====================================================
+
+CREATE TABLE public.saved_searches (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  name TEXT NOT NULL,
+  query TEXT,  -- every word must appear in the subject, institution or keywords
+  institution TEXT,
+  tender_type tender_type,
+  min_value DECIMAL(15, 2),
+  max_value DECIMAL(15, 2),
+  active BOOLEAN NOT NULL DEFAULT true,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE public.saved_search_matches (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  search_id UUID NOT NULL REFERENCES public.saved_searches(id) ON DELETE CASCADE,
+  tender_id UUID NOT NULL REFERENCES public.tenders(id) ON DELETE CASCADE,
+  matched_terms TEXT[] NOT NULL DEFAULT '{}',
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  UNIQUE (search_id, tender_id)
+);
+
+CREATE INDEX idx_saved_search_matches_created_at ON public.saved_search_matches(created_at DESC);
+CREATE INDEX idx_saved_search_matches_tender_id ON public.saved_search_matches(tender_id);
+
+ALTER TABLE public.saved_searches ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.saved_search_matches ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for saved_searches"
+  ON public.saved_searches FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access saved_searches"
+  ON public.saved_searches FOR ALL
+  USING (true)
+  WITH CHECK (true);
+
+CREATE POLICY "Public read access for saved_search_matches"
+  ON public.saved_search_matches FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access saved_search_matches"
+  ON public.saved_search_matches FOR ALL
+  USING (true)
+  WITH CHECK (true);
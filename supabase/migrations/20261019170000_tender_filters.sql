@@ -0,0 +1,128 @@
+-- =====================================================
+-- Tender filters and facet counts
+-- filtered_tenders_page() backs GET /api/tenders/ and tender_facets() counts
+-- the same filtered set, so the UI never downloads it. Keyword filters
+-- use the GIN indexes on keywords_en/fr/ar (&& any, @> all).
+-- =====================================================
+
+CREATE INDEX idx_tenders_issuing_institution ON public.tenders(issuing_institution);
+CREATE INDEX idx_tenders_submission_deadline_date ON public.tenders(submission_deadline_date);
+CREATE INDEX idx_tenders_total_estimated_value ON public.tenders(total_estimated_value);
+
+-- Tenders matching every given filter (NULL = no filter). Keywords match
+-- in any language column: any of them (&&), or all of them (@>).
+-- A single SQL statement, so the planner inlines it into its callers.
+CREATE OR REPLACE FUNCTION public.filter_tenders(
+  p_search TEXT DEFAULT NULL,
+  p_status TEXT DEFAULT NULL,
+  p_keywords TEXT[] DEFAULT NULL,
+  p_keywords_all BOOLEAN DEFAULT false,
+  p_institutions TEXT[] DEFAULT NULL,
+  p_tender_type TEXT DEFAULT NULL,
+  p_deadline_from DATE DEFAULT NULL,
+  p_deadline_to DATE DEFAULT NULL,
+  p_min_value NUMERIC DEFAULT NULL,
+  p_max_value NUMERIC DEFAULT NULL
+)
+RETURNS SETOF public.tenders AS $$
+  SELECT * FROM public.tenders t
+  WHERE (p_search IS NULL
+         OR t.subject ILIKE '%' || p_search || '%'
+         OR t.issuing_institution ILIKE '%' || p_search || '%')
+    AND (p_status IS NULL OR t.status::text = p_status)
+    AND (p_keywords IS NULL OR CASE WHEN p_keywords_all
+      THEN t.keywords_en @> p_keywords OR t.keywords_fr @> p_keywords OR t.keywords_ar @> p_keywords
+      ELSE t.keywords_en && p_keywords OR t.keywords_fr && p_keywords OR t.keywords_ar && p_keywords
+    END)
+    AND (p_institutions IS NULL OR t.issuing_institution = ANY(p_institutions))
+    AND (p_tender_type IS NULL OR t.tender_type::text = p_tender_type)
+    AND (p_deadline_from IS NULL OR t.submission_deadline_date >= p_deadline_from)
+    AND (p_deadline_to IS NULL OR t.submission_deadline_date <= p_deadline_to)
+    AND (p_min_value IS NULL OR t.total_estimated_value >= p_min_value)
+    AND (p_max_value IS NULL OR t.total_estimated_value <= p_max_value);
+$$ LANGUAGE sql STABLE;
+
+-- A page of filtered tenders, newest first
+CREATE OR REPLACE FUNCTION public.filtered_tenders_page(
+  p_search TEXT DEFAULT NULL,
+  p_status TEXT DEFAULT NULL,
+  p_keywords TEXT[] DEFAULT NULL,
+  p_keywords_all BOOLEAN DEFAULT false,
+  p_institutions TEXT[] DEFAULT NULL,
+  p_tender_type TEXT DEFAULT NULL,
+  p_deadline_from DATE DEFAULT NULL,
+  p_deadline_to DATE DEFAULT NULL,
+  p_min_value NUMERIC DEFAULT NULL,
+  p_max_value NUMERIC DEFAULT NULL,
+  p_limit INTEGER DEFAULT 100,
+  p_offset INTEGER DEFAULT 0
+)
+RETURNS SETOF public.tenders AS $$
+  SELECT * FROM public.filter_tenders(
+    p_search, p_status, p_keywords, p_keywords_all, p_institutions,
+    p_tender_type, p_deadline_from, p_deadline_to, p_min_value, p_max_value
+  )
+  ORDER BY scrape_date DESC, id
+  LIMIT p_limit OFFSET p_offset;
+$$ LANGUAGE sql STABLE;
+
+-- Facet counts of the filtered tenders in one query: total, top
+-- keywords per language, top institutions, tender types and statuses.
+CREATE OR REPLACE FUNCTION public.tender_facets(
+  p_search TEXT DEFAULT NULL,
+  p_status TEXT DEFAULT NULL,
+  p_keywords TEXT[] DEFAULT NULL,
+  p_keywords_all BOOLEAN DEFAULT false,
+  p_institutions TEXT[] DEFAULT NULL,
+  p_tender_type TEXT DEFAULT NULL,
+  p_deadline_from DATE DEFAULT NULL,
+  p_deadline_to DATE DEFAULT NULL,
+  p_min_value NUMERIC DEFAULT NULL,
+  p_max_value NUMERIC DEFAULT NULL,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS JSONB AS $$
+  WITH filtered AS MATERIALIZED (
+    SELECT issuing_institution, tender_type, status, keywords_en, keywords_fr, keywords_ar
+    FROM public.filter_tenders(
+      p_search, p_status, p_keywords, p_keywords_all, p_institutions,
+      p_tender_type, p_deadline_from, p_deadline_to, p_min_value, p_max_value
+    )
+  ),
+  keywords AS (
+    SELECT lang, keyword, count(*) AS n,
+      row_number() OVER (PARTITION BY lang ORDER BY count(*) DESC, keyword) AS rank
+    FROM filtered,
+      LATERAL (VALUES ('en', keywords_en), ('fr', keywords_fr), ('ar', keywords_ar)) AS k(lang, words),
+      LATERAL unnest(k.words) AS keyword
+    GROUP BY lang, keyword
+  ),
+  institutions AS (
+    SELECT issuing_institution AS value, count(*) AS n
+    FROM filtered WHERE issuing_institution IS NOT NULL
+    GROUP BY 1 ORDER BY n DESC, 1 LIMIT p_limit
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT count(*) FROM filtered),
+    'keywords', (
+      SELECT coalesce(jsonb_object_agg(lang, items), '{}')
+      FROM (
+        SELECT lang, jsonb_agg(jsonb_build_object('value', keyword, 'count', n) ORDER BY rank) AS items
+        FROM keywords WHERE rank <= p_limit GROUP BY lang
+      ) per_lang
+    ),
+    'institutions', (
+      SELECT coalesce(jsonb_agg(jsonb_build_object('value', value, 'count', n) ORDER BY n DESC, value), '[]')
+      FROM institutions
+    ),
+    'tender_types', (
+      SELECT coalesce(jsonb_object_agg(tender_type, n), '{}')
+      FROM (SELECT tender_type::text, count(*) AS n FROM filtered
+            WHERE tender_type IS NOT NULL GROUP BY 1) types
+    ),
+    'statuses', (
+      SELECT coalesce(jsonb_object_agg(status, n), '{}')
+      FROM (SELECT status::text, count(*) AS n FROM filtered GROUP BY 1) statuses
+    )
+  );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,262 @@
+-- =====================================================
+-- Analytics rollups
+-- Kept up to date incrementally by triggers as the scraper, AVIS
+-- extraction and re-extraction write tenders and lots, so dashboards
+-- (/api/analytics/*) read a few small tables whatever the size of
+-- tenders.
+-- =====================================================
+
+-- Lots per tender, maintained from tender_lots so the rollups follow
+-- lot changes through the tenders trigger
+ALTER TABLE public.tenders ADD COLUMN lot_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE public.tenders t SET lot_count = l.n
+FROM (SELECT tender_id, count(*) AS n FROM public.tender_lots GROUP BY 1) l
+WHERE t.id = l.tender_id;
+
+-- Tenders per publication week (scrape_date), institution and type.
+-- Unknown institutions and types are ''.
+CREATE TABLE public.analytics_weekly (
+  week DATE NOT NULL,
+  institution TEXT NOT NULL,
+  tender_type TEXT NOT NULL,
+  tenders INTEGER NOT NULL DEFAULT 0,
+  valued_tenders INTEGER NOT NULL DEFAULT 0,  -- with an estimated value
+  total_estimated_value DECIMAL(18, 2) NOT NULL DEFAULT 0,
+  lots INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (week, institution, tender_type)
+);
+
+-- Tenders per submission deadline day
+CREATE TABLE public.analytics_deadlines (
+  day DATE PRIMARY KEY,
+  tenders INTEGER NOT NULL DEFAULT 0
+);
+
+ALTER TABLE public.analytics_weekly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.analytics_deadlines ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for analytics_weekly"
+  ON public.analytics_weekly FOR SELECT
+  USING (true);
+
+CREATE POLICY "Public read access for analytics_deadlines"
+  ON public.analytics_deadlines FOR SELECT
+  USING (true);
+
+-- Add (p_sign = 1) or remove (-1) a tender's contribution
+CREATE OR REPLACE FUNCTION public.analytics_apply(p_tender public.tenders, p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.analytics_weekly AS a
+    (week, institution, tender_type, tenders, valued_tenders, total_estimated_value, lots)
+  VALUES (
+    date_trunc('week', p_tender.scrape_date)::date,
+    coalesce(p_tender.issuing_institution, ''),
+    coalesce(p_tender.tender_type::text, ''),
+    p_sign,
+    CASE WHEN p_tender.total_estimated_value IS NULL THEN 0 ELSE p_sign END,
+    coalesce(p_tender.total_estimated_value, 0) * p_sign,
+    p_tender.lot_count * p_sign
+  )
+  ON CONFLICT (week, institution, tender_type) DO UPDATE SET
+    tenders = a.tenders + EXCLUDED.tenders,
+    valued_tenders = a.valued_tenders + EXCLUDED.valued_tenders,
+    total_estimated_value = a.total_estimated_value + EXCLUDED.total_estimated_value,
+    lots = a.lots + EXCLUDED.lots;
+
+  IF p_tender.submission_deadline_date IS NOT NULL THEN
+    INSERT INTO public.analytics_deadlines AS d (day, tenders)
+    VALUES (p_tender.submission_deadline_date, p_sign)
+    ON CONFLICT (day) DO UPDATE SET tenders = d.tenders + EXCLUDED.tenders;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.analytics_track_tender()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND
+     (OLD.scrape_date, OLD.issuing_institution, OLD.tender_type,
+      OLD.total_estimated_value, OLD.lot_count, OLD.submission_deadline_date)
+     IS NOT DISTINCT FROM
+     (NEW.scrape_date, NEW.issuing_institution, NEW.tender_type,
+      NEW.total_estimated_value, NEW.lot_count, NEW.submission_deadline_date)
+  THEN
+    RETURN NULL;  -- e.g. a status change
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.analytics_apply(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.analytics_apply(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER analytics_track_tender
+  AFTER INSERT OR UPDATE OR DELETE ON public.tenders
+  FOR EACH ROW
+  EXECUTE FUNCTION public.analytics_track_tender();
+
+-- Upserted lots only fire the insert trigger when they are new; lots
+-- deleted with their tender find no tender to update
+CREATE OR REPLACE FUNCTION public.analytics_count_lots()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.tenders SET lot_count = lot_count + 1 WHERE id = NEW.tender_id;
+  ELSE
+    UPDATE public.tenders SET lot_count = lot_count - 1 WHERE id = OLD.tender_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER analytics_count_lots
+  AFTER INSERT OR DELETE ON public.tender_lots
+  FOR EACH ROW
+  EXECUTE FUNCTION public.analytics_count_lots();
+
+-- Recompute the rollups from scratch (initial load, or after bulk
+-- changes made with triggers disabled)
+CREATE OR REPLACE FUNCTION public.rebuild_analytics()
+RETURNS VOID AS $$
+BEGIN
+  LOCK TABLE public.analytics_weekly, public.analytics_deadlines IN EXCLUSIVE MODE;
+  DELETE FROM public.analytics_weekly;
+  DELETE FROM public.analytics_deadlines;
+
+  INSERT INTO public.analytics_weekly
+    (week, institution, tender_type, tenders, valued_tenders, total_estimated_value, lots)
+  SELECT
+    date_trunc('week', scrape_date)::date,
+    coalesce(issuing_institution, ''),
+    coalesce(tender_type::text, ''),
+    count(*),
+    count(total_estimated_value),
+    coalesce(sum(total_estimated_value), 0),
+    sum(lot_count)
+  FROM public.tenders
+  GROUP BY 1, 2, 3;
+
+  INSERT INTO public.analytics_deadlines (day, tenders)
+  SELECT submission_deadline_date, count(*)
+  FROM public.tenders
+  WHERE submission_deadline_date IS NOT NULL
+  GROUP BY 1;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT public.rebuild_analytics();
+
+-- Dashboard queries over the rollups. Periods are the last p_weeks
+-- publication weeks, the current one included.
+
+-- Top institutions by tenders, with their weekly series
+CREATE OR REPLACE FUNCTION public.analytics_institutions(
+  p_weeks INTEGER DEFAULT 12,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS JSONB AS $$
+  WITH period AS (
+    SELECT institution, week,
+      sum(tenders) AS tenders,
+      sum(total_estimated_value) AS total_estimated_value,
+      sum(lots) AS lots
+    FROM public.analytics_weekly
+    WHERE week >= date_trunc('week', current_date)::date - 7 * (p_weeks - 1)
+      AND institution <> ''
+    GROUP BY institution, week
+    HAVING sum(tenders) > 0
+  ),
+  top AS (
+    SELECT institution, sum(tenders) AS tenders,
+      sum(total_estimated_value) AS total_estimated_value, sum(lots) AS lots
+    FROM period
+    GROUP BY institution
+    ORDER BY tenders DESC, institution
+    LIMIT p_limit
+  )
+  SELECT coalesce(jsonb_agg(jsonb_build_object(
+    'institution', top.institution,
+    'tenders', top.tenders,
+    'total_estimated_value', top.total_estimated_value,
+    'lots', top.lots,
+    'weekly', (
+      SELECT jsonb_agg(jsonb_build_object('week', week, 'tenders', tenders) ORDER BY week)
+      FROM period WHERE period.institution = top.institution
+    )
+  ) ORDER BY top.tenders DESC, top.institution), '[]')
+  FROM top;
+$$ LANGUAGE sql STABLE;
+
+-- Totals per tender type
+CREATE OR REPLACE FUNCTION public.analytics_types(p_weeks INTEGER DEFAULT 12)
+RETURNS JSONB AS $$
+  SELECT coalesce(jsonb_agg(jsonb_build_object(
+    'tender_type', nullif(tender_type, ''),
+    'tenders', tenders,
+    'valued_tenders', valued_tenders,
+    'total_estimated_value', total_estimated_value,
+    'average_estimated_value',
+      CASE WHEN valued_tenders > 0 THEN round(total_estimated_value / valued_tenders, 2) END,
+    'lots', lots
+  ) ORDER BY tenders DESC), '[]')
+  FROM (
+    SELECT tender_type, sum(tenders) AS tenders, sum(valued_tenders) AS valued_tenders,
+      sum(total_estimated_value) AS total_estimated_value, sum(lots) AS lots
+    FROM public.analytics_weekly
+    WHERE week >= date_trunc('week', current_date)::date - 7 * (p_weeks - 1)
+    GROUP BY tender_type
+    HAVING sum(tenders) > 0
+  ) types;
+$$ LANGUAGE sql STABLE;
+
+-- Totals per week
+CREATE OR REPLACE FUNCTION public.analytics_weeks(p_weeks INTEGER DEFAULT 12)
+RETURNS JSONB AS $$
+  SELECT coalesce(jsonb_agg(jsonb_build_object(
+    'week', week,
+    'tenders', tenders,
+    'total_estimated_value', total_estimated_value,
+    'lots', lots
+  ) ORDER BY week), '[]')
+  FROM (
+    SELECT week, sum(tenders) AS tenders,
+      sum(total_estimated_value) AS total_estimated_value, sum(lots) AS lots
+    FROM public.analytics_weekly
+    WHERE week >= date_trunc('week', current_date)::date - 7 * (p_weeks - 1)
+    GROUP BY week
+    HAVING sum(tenders) > 0
+  ) weeks;
+$$ LANGUAGE sql STABLE;
+
+-- Deadlines of the next p_days days: tenders per day, and the first
+-- p_limit tenders (idx_tenders_submission_deadline_date)
+CREATE OR REPLACE FUNCTION public.analytics_upcoming_deadlines(
+  p_days INTEGER DEFAULT 14,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'per_day', (
+      SELECT coalesce(jsonb_agg(jsonb_build_object('day', day, 'tenders', tenders) ORDER BY day), '[]')
+      FROM public.analytics_deadlines
+      WHERE day >= current_date AND day < current_date + p_days AND tenders > 0
+    ),
+    'next', (
+      SELECT coalesce(jsonb_agg(to_jsonb(t) ORDER BY t.submission_deadline_date, t.submission_deadline_time), '[]')
+      FROM (
+        SELECT id, reference_tender, issuing_institution, subject, tender_type,
+          total_estimated_value, submission_deadline_date, submission_deadline_time
+        FROM public.tenders
+        WHERE submission_deadline_date >= current_date
+          AND submission_deadline_date < current_date + p_days
+        ORDER BY submission_deadline_date, submission_deadline_time
+        LIMIT p_limit
+      ) t
+    )
+  );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,30 @@
+-- =====================================================
+-- Ask AI conversation memory
+-- Per tender, a rolling summary of the chat turns older than the latest
+-- few (CHAT_RECENT_TURNS), so follow-up questions carry the thread at a
+-- constant prompt size (see backend/services/chat_memory.py).
+-- =====================================================
+
+CREATE TABLE public.tender_chat_memory (
+  tender_id UUID PRIMARY KEY REFERENCES public.tenders(id) ON DELETE CASCADE,
+  summary TEXT NOT NULL DEFAULT '',
+  -- The oldest tender_chats rows (created_at, id order) the summary covers
+  summarized_turns INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.tender_chat_memory ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access for tender_chat_memory"
+  ON public.tender_chat_memory FOR SELECT
+  USING (true);
+
+CREATE POLICY "Service role full access tender_chat_memory"
+  ON public.tender_chat_memory FOR ALL
+  USING (true)
+  WITH CHECK (true);
+
+-- Chat history pages (latest first) and the turns after the summary
+CREATE INDEX idx_tender_chats_tender_id_created_at
+  ON public.tender_chats(tender_id, created_at, id);
+DROP INDEX public.idx_tender_chats_tender_id;
@@ -0,0 +1,57 @@
+-- =====================================================
+-- Near-duplicate originals
+-- Duplicates keep no text of their own, so deleting an original (with
+-- its tender, by cascade) would lose their text: the oldest remaining
+-- duplicate, preferably of another tender, takes the text over and
+-- becomes the original of the others.
+-- duplicate_count is incremented in one statement, so concurrent
+-- duplicates of the same original are all counted.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.promote_duplicate()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_heir UUID;
+BEGIN
+  SELECT id INTO v_heir
+  FROM public.tender_documents
+  WHERE duplicate_of = OLD.id
+  ORDER BY tender_id = OLD.tender_id, created_at, id
+  LIMIT 1;
+
+  IF v_heir IS NOT NULL THEN
+    UPDATE public.tender_documents SET
+      extracted_text = OLD.extracted_text,
+      duplicate_of = NULL,
+      duplicate_count = greatest(OLD.duplicate_count - 1, 0),
+      is_boilerplate = OLD.is_boilerplate
+    WHERE id = v_heir;
+
+    UPDATE public.tender_documents SET duplicate_of = v_heir
+    WHERE duplicate_of = OLD.id AND id <> v_heir;
+  END IF;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- BEFORE: runs for cascaded deletes too, while the duplicates still
+-- reference the row
+CREATE TRIGGER promote_duplicate
+  BEFORE DELETE ON public.tender_documents
+  FOR EACH ROW
+  WHEN (OLD.duplicate_of IS NULL)
+  EXECUTE FUNCTION public.promote_duplicate();
+
+-- Count one more duplicate of an original; returns whether its text is
+-- now boilerplate, or NULL when the original is gone (store the text)
+CREATE OR REPLACE FUNCTION public.record_duplicate(
+  p_original UUID,
+  p_min_duplicates INTEGER
+)
+RETURNS BOOLEAN AS $$
+  UPDATE public.tender_documents SET
+    duplicate_count = duplicate_count + 1,
+    is_boilerplate = duplicate_count + 1 >= p_min_duplicates
+  WHERE id = p_original AND duplicate_of IS NULL
+  RETURNING is_boilerplate;
+$$ LANGUAGE sql;
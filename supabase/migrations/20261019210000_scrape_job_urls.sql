@@ -0,0 +1,21 @@
+-- =====================================================
+-- One tender job per link and run
+-- A collect job reclaimed after its worker died between enqueueing the
+-- tender jobs and reporting enqueues them again; the worker upserts
+-- them ignoring duplicates on (run_id, url). The collect job itself has
+-- no url (NULLs never conflict).
+-- =====================================================
+
+DELETE FROM public.scrape_jobs a
+USING public.scrape_jobs b
+WHERE a.run_id = b.run_id
+  AND a.url = b.url
+  AND (a.created_at, a.id) > (b.created_at, b.id);
+
+ALTER TABLE public.scrape_jobs
+  ADD CONSTRAINT scrape_jobs_run_id_url_key UNIQUE (run_id, url);
+
+-- The constraint's index serves lookups by run
+DROP INDEX public.idx_scrape_jobs_run_id;
+
+SELECT public.refresh_scraper_run(id) FROM public.scraper_runs WHERE status = 'running';
@@ -0,0 +1,10 @@
+-- =====================================================
+-- Standalone Ask AI questions
+-- Questions asked with "conversation": false stay in the chat history
+-- but are not part of the conversation: they are neither sent back as
+-- earlier turns nor folded into the summary, whose summarized_turns
+-- counts conversation turns only.
+-- =====================================================
+
+ALTER TABLE public.tender_chats
+  ADD COLUMN conversation BOOLEAN NOT NULL DEFAULT true;